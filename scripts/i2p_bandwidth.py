@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Bandwidth Rollups
+Pre-aggregated traffic totals from the Usage and Rate columns of the
+client, exploratory, participating and multi-peer tables, maintained while
+collecting. Before this, Usage ("123 KB") and Rate ("1.17 KBps") were kept
+as text, so any per-peer or per-country total meant re-parsing full raw
+files.
+
+Usage is cumulative per tunnel. Each poll is turned into deltas against the
+same tunnel's previous reading on that router. A tunnel is its row key plus
+its expiry (poll time + Expiration, matched within EXPIRY_TOLERANCE): client
+rows carry no tunnel IDs, so a tunnel rebuilt with the same peer, direction
+and role is a new tunnel. The first reading of a tunnel is only a baseline,
+unless it is provably new (younger than the time since the router's
+previous poll), so usage from before the collector started is not counted
+as traffic of the first bucket. Deltas and rates are added to rollup cubes:
+
+  resolution   minute, hour, day
+  source       client, exploratory, participating, multi_peers
+  dimension    peer      each peer of the row (participating: From and To)
+               country   their countries
+               role      Node Role / Role of the row ("" for multi_peers)
+               router    the observing router
+  values       Bytes (sum of deltas), Rate Sum (Bps) over Rate Samples
+               (rows with a Rate: participating only), Samples (rows)
+
+Client and exploratory rows are one per hop (one row per direction, peer
+and role), so their router and role totals count a tunnel once per hop.
+A multi_peers Usage is the sum over that peer's participating tunnels, so
+it is rolled up as its own source (delta of the total, never negative) and
+left out of totals across sources.
+A bucket is closed once a poll at least GRACE seconds past its end comes
+in; its rows then go to the bandwidth_rollups stream (Timestamp = bucket
+start, Router = the router for router rows, empty otherwise), and the last
+few closed buckets stay in memory for top(). Open buckets are written when
+the collector stops, so a bucket split by a restart has two rows per key
+that add up.
+
+Usage:
+  python3 i2p_bandwidth.py top ~/i2p_tunnel_snapshots [--resolution hour] [--dimension peer] [--source participating]
+  python3 i2p_bandwidth.py build ../data [captures.tar.gz ...] [--resolution hour] [--dimension country]
+
+Requires: nothing beyond the standard library
+"""
+
+import argparse
+import csv
+import glob
+import os
+import time
+from collections import defaultdict, deque
+
+from i2p_tunnel_tracker import tunnel_key
+from i2p_units import parse_bytes, parse_rate, parse_seconds
+
+# === Configuration ===
+RESOLUTIONS = {"minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+KEEP_CLOSED = {"minute": 60, "hour": 48, "day": 14}    # closed buckets kept in memory for top()
+GRACE = 60                                            # seconds after a bucket's end before it is closed
+TUNNEL_LIFETIME = 10 * 60                             # seconds from build to expiry
+EXPIRY_TOLERANCE = 90                                 # seconds; Expiration is shown in whole minutes
+DIMENSIONS = ("peer", "country", "role", "router")
+NON_PEERS = ("Local", "Unknown", "Error", "")
+TOP_N = 20
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+ROLLUP_HEADERS = ["Resolution", "Source", "Dimension", "Key", "Bytes", "Rate Sum", "Rate Samples", "Samples"]
+
+
+def _client_row(router, record):
+    peer = record.get("Full ID", "")
+    return ((router, record.get("Direction"), peer, record.get("Node Role")),
+            [(peer, record.get("Country", "Unknown"))], record.get("Node Role", ""))
+
+
+def _participating_row(router, record):
+    return (tunnel_key(router, record),
+            [(record.get("From Full ID", ""), record.get("From Country", "Unknown")),
+             (record.get("To Full ID", ""), record.get("To Country", "Unknown"))],
+            record.get("Role", ""))
+
+
+def _multi_peer_row(router, record):
+    peer = record.get("Full Peer ID", "")
+    return (router, peer), [(peer, record.get("Country", "Unknown"))], ""
+
+
+# source -> row(router, record) -> (tunnel key, [(peer, country)], role)
+SOURCES = {
+    "client": _client_row,
+    "exploratory": _client_row,
+    "participating": _participating_row,
+    "multi_peers": _multi_peer_row,
+}
+# aggregates over another source's tunnels, left out of totals across sources
+OVERLAPPING_SOURCES = ("multi_peers",)
+
+
+def _previous_usage(readings, expiry):
+    """Last usage of the tunnel expiring at `expiry` among a key's [(expiry, usage)] readings."""
+    for previous_expiry, usage in readings:
+        if expiry is None or previous_expiry is None or abs(previous_expiry - expiry) <= EXPIRY_TOLERANCE:
+            return usage
+    return None
+
+
+def _counts(cell_source, source):
+    return cell_source == source if source else cell_source not in OVERLAPPING_SOURCES
+
+
+class BandwidthRollup:
+    """Minute / hour / day cubes of usage deltas and rates, shared by the trackers of all sources."""
+
+    def __init__(self, resolutions=None, grace=GRACE, keep_closed=None):
+        self.resolutions = dict(RESOLUTIONS if resolutions is None else resolutions)
+        self.grace = grace
+        self.keep_closed = dict(KEEP_CLOSED if keep_closed is None else keep_closed)
+        self.open = {name: {} for name in self.resolutions}      # bucket start -> cell -> [bytes, rate, rate n, n]
+        self.closed = {name: deque() for name in self.resolutions}   # (bucket start, cells)
+        self.last_usage = {}      # (source, router) -> (poll ts, {row key: [(expiry, bytes)]})
+        self.newest = 0
+        self.stats = {"rows": 0, "bytes": 0, "baselines": 0, "late": 0, "unparsed": 0, "buckets": 0}
+
+    def add(self, source, router, ts, records):
+        """One poll of one source on one router; returns the rows of buckets it closed."""
+        row = SOURCES[source]
+        ts = int(ts)
+        polled, previous = self.last_usage.get((source, router), (None, {}))
+        current = {}
+        cells = defaultdict(lambda: [0, 0.0, 0, 0])
+        for record in records:
+            usage = parse_bytes(record.get("Usage"))
+            if usage is None:
+                self.stats["unparsed"] += 1
+                continue
+            key, peers, role = row(router, record)
+            remaining = parse_seconds(record["Expiration"]) if "Expiration" in record else None
+            expiry = None if remaining is None else ts + remaining
+            last = _previous_usage(previous.get(key, ()), expiry)
+            if last is not None:
+                delta = max(0, usage - last)   # never negative: "1,023 KB" may be followed by "1.00 MB"
+            elif polled is not None and remaining is not None \
+                    and TUNNEL_LIFETIME - remaining <= ts - polled + EXPIRY_TOLERANCE:
+                delta = usage   # built since the router's previous poll: all of its usage is new
+            else:
+                delta = 0       # a tunnel of unknown age: its reading is the baseline
+                self.stats["baselines"] += 1
+            current.setdefault(key, []).append((expiry, usage))
+            rate = parse_rate(record.get("Rate"))
+            targets = [("router", router), ("role", role)]
+            for peer, country in peers:
+                if peer not in NON_PEERS:
+                    targets += [("peer", peer), ("country", country)]
+            for dimension, value in dict.fromkeys(targets):
+                cell = cells[(source, dimension, value)]
+                cell[0] += delta
+                if rate is not None:
+                    cell[1] += rate
+                    cell[2] += 1
+                cell[3] += 1
+            self.stats["rows"] += 1
+            self.stats["bytes"] += delta
+        self.last_usage[(source, router)] = (ts, current)
+
+        for name, seconds in self.resolutions.items():
+            bucket = ts - ts % seconds
+            if self.open[name] and bucket < min(self.open[name]):
+                self.stats["late"] += 1   # its bucket was closed and written already
+                continue
+            cube = self.open[name].setdefault(bucket, {})
+            for cell_key, values in cells.items():
+                cell = cube.setdefault(cell_key, [0, 0.0, 0, 0])
+                for i, value in enumerate(values):
+                    cell[i] += value
+        self.newest = max(self.newest, ts)
+        return self.close_buckets(self.newest)
+
+    def close_buckets(self, now=None):
+        """Close the buckets that ended GRACE seconds before `now` (all of them when None)."""
+        rows = []
+        for name, seconds in self.resolutions.items():
+            for bucket in sorted(self.open[name]):
+                if now is not None and bucket + seconds + self.grace > now:
+                    break
+                cube = self.open[name].pop(bucket)
+                rows += self._rows(name, bucket, cube)
+                closed = self.closed[name]
+                closed.append((bucket, cube))
+                while len(closed) > self.keep_closed.get(name, 0):
+                    closed.popleft()
+                self.stats["buckets"] += 1
+        return rows
+
+    @staticmethod
+    def _rows(resolution, bucket, cube):
+        timestamp = time.strftime(TIMESTAMP_FORMAT, time.localtime(bucket))
+        return [{"Timestamp": timestamp, "Router": value if dimension == "router" else "",
+                 "Resolution": resolution, "Source": source, "Dimension": dimension, "Key": value,
+                 "Bytes": int(nbytes), "Rate Sum": round(rate, 1), "Rate Samples": rate_n, "Samples": n}
+                for (source, dimension, value), (nbytes, rate, rate_n, n) in sorted(cube.items())]
+
+    def top(self, resolution="hour", dimension="peer", source=None, n=TOP_N, buckets=1):
+        """[(key, bytes, rate sum, rate samples, samples)] over the last `buckets` buckets
+        (closed ones and the open ones), largest first. Without a `source`, the sources
+        in OVERLAPPING_SOURCES are left out."""
+        cubes = [cube for _, cube in self.closed[resolution]] + [
+            self.open[resolution][b] for b in sorted(self.open[resolution])]
+        totals = defaultdict(lambda: [0, 0.0, 0, 0])
+        for cube in cubes[-buckets:]:
+            for (cell_source, cell_dimension, value), cell in cube.items():
+                if cell_dimension == dimension and _counts(cell_source, source):
+                    total = totals[value]
+                    for i, v in enumerate(cell):
+                        total[i] += v
+        return sorted(((value, *total) for value, total in totals.items()), key=lambda t: -t[1])[:n]
+
+
+class BandwidthTracker:
+    """SnapshotPipeline tracker feeding one extractor's records into a shared
+    BandwidthRollup. Every tracker of a rollup writes closed buckets to the
+    same bandwidth_rollups stream."""
+
+    name = "bandwidth_rollups"
+    headers = ROLLUP_HEADERS
+    column_types = {"Bytes": "int", "Rate Sum": "float", "Rate Samples": "int", "Samples": "int"}
+
+    def __init__(self, rollup, source):
+        self.rollup = rollup
+        self.source = source
+
+    def update(self, router, timestamp, records):
+        return self.rollup.add(self.source, router, time.mktime(time.strptime(timestamp, TIMESTAMP_FORMAT)),
+                               records)
+
+    def flush(self):
+        """Rows of the still open buckets (at the end of a run)."""
+        return self.rollup.close_buckets()
+
+    def state_dict(self):
+        """State of the shared rollup (saved once per tracker; restoring is idempotent)."""
+        return dict(vars(self.rollup))
+
+    def load_state_dict(self, state):
+        vars(self.rollup).update(state)
+
+
+def bandwidth_trackers(rollup, sources):
+    """{extractor name: BandwidthTracker} for the extractors with a Usage column."""
+    return {source: BandwidthTracker(rollup, source) for source in sources if source in SOURCES}
+
+
+# === Reading the rollup stream ===
+
+def read_rollups(paths):
+    """Rows of bandwidth_rollups CSV files (directories: every bandwidth_rollups*.csv in them)."""
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, "bandwidth_rollups*.csv"))) if os.path.isdir(path) else [path]
+    for path in files:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+
+def top_from_rows(rows, resolution="hour", dimension="peer", source=None, since=None, until=None, n=TOP_N):
+    """[(key, bytes, rate sum, rate samples, samples)] summed over the matching rows, largest first
+    (without a `source`, the sources in OVERLAPPING_SOURCES are left out)."""
+    totals = defaultdict(lambda: [0, 0.0, 0, 0])
+    for row in rows:
+        if row["Resolution"] != resolution or row["Dimension"] != dimension:
+            continue
+        if not _counts(row["Source"], source) or (since and row["Timestamp"] < since) \
+                or (until and row["Timestamp"] >= until):
+            continue
+        total = totals[row["Key"]]
+        total[0] += int(row["Bytes"])
+        total[1] += float(row["Rate Sum"] or 0)
+        total[2] += int(row["Rate Samples"] or 0)
+        total[3] += int(row["Samples"])
+    return sorted(((key, *total) for key, total in totals.items()), key=lambda t: -t[1])[:n]
+
+
+def _page_records(inputs):
+    """(router, epoch seconds, source, records) from saved pages, in time order."""
+    from i2p_reingest import discover, ingest_page   # page discovery shared with the re-ingest tool
+
+    for job in discover(inputs):
+        _, sections, _ = ingest_page(job)
+        ts = time.mktime(time.strptime(job[0], TIMESTAMP_FORMAT))
+        for source, records in sections.items():
+            if source in SOURCES:
+                yield job[1], ts, source, records
+
+
+def _human(nbytes):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(nbytes) < 1024 or unit == "GiB":
+            return f"{nbytes:.1f} {unit}" if unit != "B" else f"{nbytes:.0f} B"
+        nbytes /= 1024
+
+
+def print_top(rows, title):
+    print(title)
+    print(f"{'Key':<46} {'Bytes':>12} {'Mean Rate':>12} {'Samples':>8}")
+    for key, nbytes, rate, rate_samples, samples in rows:
+        mean_rate = _human(rate / rate_samples) + "/s" if rate_samples else "-"
+        print(f"{key:<46} {_human(nbytes):>12} {mean_rate:>12} {samples:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top talkers from the pre-aggregated bandwidth rollups.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("top", "read bandwidth_rollups CSVs written by the snapshot collector"),
+                            ("build", "roll up saved /tunnels pages (directories or tarballs)")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("inputs", nargs="+")
+        p.add_argument("--resolution", choices=list(RESOLUTIONS), default="hour")
+        p.add_argument("--dimension", choices=DIMENSIONS, default="peer")
+        p.add_argument("--source", choices=list(SOURCES))
+        p.add_argument("--top", type=int, default=TOP_N)
+        if name == "top":
+            p.add_argument("--since", help="first bucket, e.g. '2025-04-18 12:00:00'")
+            p.add_argument("--until", help="end bucket (exclusive)")
+    args = parser.parse_args()
+
+    title = f"Top {args.top} {args.dimension} by bytes ({args.resolution} rollups, " \
+            f"{args.source or 'all sources but ' + ', '.join(OVERLAPPING_SOURCES)})"
+    if args.command == "top":
+        print_top(top_from_rows(read_rollups(args.inputs), args.resolution, args.dimension, args.source,
+                                args.since, args.until, args.top), title)
+        return
+
+    start = time.time()
+    rollup = BandwidthRollup()
+    polls = 0
+    for router, ts, source, records in _page_records(args.inputs):
+        rollup.add(source, router, ts, records)
+        polls += 1
+    rollup.close_buckets()
+    print(f"[DONE] {polls} sections, {rollup.stats['rows']} rows ({rollup.stats['baselines']} baselines), "
+          f"{_human(rollup.stats['bytes'])} in {time.time() - start:.1f}s")
+    print_top(rollup.top(args.resolution, args.dimension, args.source, args.top,
+                         buckets=rollup.keep_closed[args.resolution]), title)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Collector Benchmark
+Measures how the collection pipeline behaves at swarm scale against the
+stub console (i2p_stub_console.py), in two parts:
+
+  parse   extract_sections() over every recorded /tunnels and /profiles
+          page: pages/s, rows/s, MB/s
+  swarm   SwarmPoller + SnapshotPipeline polling N stub routers for a few
+          cycles of compressed time (--time-scale 60 turns the 60 s
+          FETCH_INTERVAL into 1 s), reporting the achieved poll cadence
+          against FETCH_INTERVAL, overrunning cycles, failed polls, netdb
+          lookups per cycle, snapshot bytes written, netdb cache size
+          and RSS growth
+
+Each run appends one JSON object per router count to --results, tagged
+with the git revision, so collector versions can be compared; --compare
+prints the change of every metric against the previous run with the same
+parameters.
+
+Usage:
+  python3 i2p_benchmark.py --routers 1 10 100 1000 --cycles 5 --latency 0.02 --failure-rate 0.01
+  python3 i2p_benchmark.py --routers 100 --compare
+
+Requires: aiohttp, beautifulsoup4, html5lib (stub console and snapshot pipeline)
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from i2p_netdb_resolver import NETDB_PATH, NetDbResolver
+from i2p_stub_console import BASE_PORT, DATA_DIR, STUB_HOST
+from i2p_swarm_poller import FETCH_INTERVAL, MAX_CONCURRENCY, TARGET_DEADLINE, SwarmPoller, make_targets
+from i2p_tunnel_snapshot import (
+    DEFAULT_EXTRACTORS, ExploratoryTunnelExtractor, ProfileExtractor, SnapshotPipeline, extract_sections,
+)
+
+# === Configuration ===
+ROUTER_COUNTS = [1, 10, 100]
+CYCLES = 5
+TIME_SCALE = 60.0            # simulated seconds per real second
+PARSE_REPEAT = 5
+RESULTS_FILE = "benchmark_results.jsonl"
+STUB_STARTUP_TIMEOUT = 120   # seconds to wait for the stub consoles to listen
+# metrics where a larger value is better (the rest: smaller is better)
+HIGHER_IS_BETTER = ("pages_per_s", "rows_per_s", "mb_per_s", "ok_polls")
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc), or peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _dir_bytes(path, prefix=None, exclude=None):
+    """Bytes of the files under `path`, optionally only (or all but) those whose name starts with a prefix."""
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files
+               if (prefix is None or f.startswith(prefix)) and (exclude is None or not f.startswith(exclude)))
+
+
+# === Parse throughput ===
+
+def parse_benchmark(data_dir=DATA_DIR, repeat=PARSE_REPEAT, use_bs4=False):
+    """Pages/s, rows/s and MB/s of extract_sections() over the recorded pages."""
+    suites = [
+        ("tunnels", "tunnels_data_*.html", [cls() for cls in DEFAULT_EXTRACTORS] + [ExploratoryTunnelExtractor()]),
+        ("profiles", "high_capacity_routers_*.html", [ProfileExtractor()]),
+    ]
+    results = {}
+    for kind, pattern, extractors in suites:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(data_dir, pattern))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+        if not pages:
+            continue
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                rows += sum(len(records) for records in extract_sections(html, extractors, use_bs4).values())
+        elapsed = time.perf_counter() - start
+        size = sum(len(html.encode()) for html in pages) * repeat
+        results[kind] = {
+            "pages": len(pages) * repeat, "rows": rows, "seconds": round(elapsed, 4),
+            "pages_per_s": round(len(pages) * repeat / elapsed, 1), "rows_per_s": round(rows / elapsed, 1),
+            "mb_per_s": round(size / elapsed / 1e6, 2),
+        }
+    return results
+
+
+# === Swarm simulation ===
+
+class StubProcess:
+    """i2p_stub_console.py serving N virtual routers in a child process."""
+
+    def __init__(self, routers, base_port=BASE_PORT, data_dir=DATA_DIR, latency=0.0, jitter=0.0,
+                 failure_rate=0.0, timeout_rate=0.0, seed=0):
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "i2p_stub_console.py")
+        self.command = [sys.executable, script, "--data-dir", data_dir, "--routers", str(routers),
+                        "--base-port", str(base_port), "--latency", str(latency), "--jitter", str(jitter),
+                        "--failure-rate", str(failure_rate), "--timeout-rate", str(timeout_rate),
+                        "--seed", str(seed)]
+        self.ports = [base_port + i for i in range(routers)]
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, text=True)
+        deadline = time.monotonic() + STUB_STARTUP_TIMEOUT
+        line = ""
+        while time.monotonic() < deadline and not line.startswith("[START]"):
+            line = self.process.stdout.readline()
+            if not line and self.process.poll() is not None:
+                raise RuntimeError(f"stub console exited with code {self.process.returncode}")
+        if not line.startswith("[START]"):
+            self.__exit__()
+            raise RuntimeError("stub console did not start in time")
+        return self
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+
+async def swarm_benchmark(ports, cycles=CYCLES, interval=FETCH_INTERVAL, time_scale=TIME_SCALE,
+                          concurrency=MAX_CONCURRENCY, deadline=TARGET_DEADLINE, host=STUB_HOST, quiet=True):
+    """Poll `ports` for `cycles` compressed-time cycles through the snapshot pipeline."""
+    real_interval = interval / time_scale
+    cycle_starts, cycle_costs, netdb_counts, failed = [], [], [], []
+    netdb_lookups = [0]
+    netdb_db = "netdb_cache.sqlite"
+    rss_start = rss_bytes()
+    rss_peak = rss_start
+
+    with tempfile.TemporaryDirectory(prefix="i2p_bench_") as output_dir:
+        async with SwarmPoller(make_targets(host, ports), max_concurrency=concurrency, deadline=deadline) as poller:
+            async def counting_fetch(target, path):
+                if path.startswith(NETDB_PATH):
+                    netdb_lookups[0] += 1
+                return await poller.fetch_text(target, path)
+
+            resolver = NetDbResolver(counting_fetch, db_path=os.path.join(output_dir, netdb_db))
+            pipeline = SnapshotPipeline(poller, output_dir=output_dir, resolver=resolver)
+            try:
+                # SwarmPoller.run() timing, for a fixed number of cycles instead of a duration
+                for _ in range(cycles):
+                    cycle_start = time.monotonic()
+                    cycle_starts.append(cycle_start)
+                    results = await poller.poll_cycle()
+                    before = netdb_lookups[0]
+                    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                        await pipeline.process(results)
+                    cost = time.monotonic() - cycle_start
+                    cycle_costs.append(cost)
+                    netdb_counts.append(netdb_lookups[0] - before)
+                    failed.append(sum(r.status != "ok" for r in results))
+                    rss_peak = max(rss_peak, rss_bytes())
+                    await asyncio.sleep(max(0.0, real_interval - cost))
+            finally:
+                pipeline.close()
+                resolver.close()
+        written = _dir_bytes(output_dir, exclude=netdb_db)   # snapshot streams only
+        netdb_bytes = _dir_bytes(output_dir, prefix=netdb_db)  # cache database with its -wal/-shm files
+
+    gaps = [b - a for a, b in zip(cycle_starts, cycle_starts[1:])]
+    polls = len(ports) * len(cycle_costs)
+    return {
+        "cycles": len(cycle_costs),
+        "interval_s": interval,
+        "achieved_interval_s": round(sum(gaps) / len(gaps) * time_scale, 2) if gaps else None,
+        "cycle_cost_s": round(sum(cycle_costs) / len(cycle_costs), 4),
+        "max_cycle_cost_s": round(max(cycle_costs), 4),
+        "overrun_cycles": sum(cost > real_interval for cost in cycle_costs),
+        "ok_polls": polls - sum(failed),
+        "failed_polls": sum(failed),
+        "netdb_lookups_per_cycle": round(sum(netdb_counts) / len(netdb_counts), 1),
+        "netdb_lookups_first_cycle": netdb_counts[0],
+        "bytes_written": written,
+        "netdb_cache_bytes": netdb_bytes,
+        "rss_start_mb": round(rss_start / 1e6, 1),
+        "rss_growth_mb": round((rss_peak - rss_start) / 1e6, 1),
+    }
+
+
+# === Results ===
+
+def _flatten(result, prefix=""):
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def previous_result(path, params):
+    """The last stored result with the same parameters, or None."""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry.get("params") == params:
+                    previous = entry
+    return previous
+
+
+def compare(old, new):
+    """Lines of 'metric: old -> new (+x%)', flagged when worse."""
+    old_flat, new_flat = _flatten(old["metrics"]), _flatten(new["metrics"])
+    lines = [f"Compared with {old['revision']} ({old['timestamp']}):"]
+    for key, value in new_flat.items():
+        before = old_flat.get(key)
+        if before is None or key.endswith(("interval_s", "rss_start_mb", "cycles", ".pages", ".rows")):
+            continue
+        change = (value - before) / before * 100 if before else 0.0
+        worse = change < 0 if key.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change > 0
+        flag = "  <-- worse" if worse and abs(change) >= 10 else ""
+        lines.append(f"  {key}: {before} -> {value} ({change:+.1f}%){flag}")
+    return lines
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parse throughput and swarm-scale load simulation of the collectors.")
+    parser.add_argument("--routers", type=int, nargs="+", default=ROUTER_COUNTS, help="swarm sizes to simulate")
+    parser.add_argument("--cycles", type=int, default=CYCLES)
+    parser.add_argument("--interval", type=float, default=FETCH_INTERVAL, help="simulated seconds between cycles")
+    parser.add_argument("--time-scale", type=float, default=TIME_SCALE, help="simulated seconds per real second")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--deadline", type=float, default=TARGET_DEADLINE)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub response latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--parse-repeat", type=int, default=PARSE_REPEAT)
+    parser.add_argument("--base-port", type=int, default=BASE_PORT)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON lines file results are appended to")
+    parser.add_argument("--compare", action="store_true", help="show changes against the previous matching run")
+    parser.add_argument("--skip-parse", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    revision = git_revision()
+    print(f"[START] Benchmarking revision {revision}")
+    parse = {} if args.skip_parse else parse_benchmark(args.data_dir, args.parse_repeat)
+    for kind, stats in parse.items():
+        print(f"  parse {kind}: {stats['pages_per_s']} pages/s, {stats['rows_per_s']} rows/s, {stats['mb_per_s']} MB/s")
+
+    for routers in args.routers:
+        params = {"routers": routers, "cycles": args.cycles, "interval": args.interval, "time_scale": args.time_scale,
+                  "concurrency": args.concurrency, "latency": args.latency, "jitter": args.jitter,
+                  "failure_rate": args.failure_rate, "timeout_rate": args.timeout_rate}
+        with StubProcess(routers, args.base_port, args.data_dir, args.latency, args.jitter,
+                         args.failure_rate, args.timeout_rate) as stub:
+            swarm = asyncio.run(swarm_benchmark(stub.ports, args.cycles, args.interval, args.time_scale,
+                                                args.concurrency, args.deadline))
+        entry = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "revision": revision,
+                 "params": params, "metrics": {"parse": parse, "swarm": swarm}}
+        print(f"  {routers} routers: cadence {swarm['achieved_interval_s']}s (target {args.interval}s), "
+              f"cycle cost {swarm['cycle_cost_s']}s, {swarm['overrun_cycles']} overruns, "
+              f"{swarm['failed_polls']} failed polls, {swarm['netdb_lookups_per_cycle']} netdb lookups/cycle, "
+              f"{swarm['bytes_written']} snapshot bytes written, {swarm['netdb_cache_bytes']} bytes netdb cache, "
+              f"RSS +{swarm['rss_growth_mb']} MB")
+        if args.compare:
+            old = previous_result(args.results, params)
+            print("\n".join(compare(old, entry)) if old else "  (no previous run with these parameters)")
+        with open(args.results, "a") as f:
+            f.write(json.dumps(entry, sort_keys=True) + "\n")
+    print(f"[DONE] Results appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ import time
 import re
 from datetime import datetime
 
+from i2p_dedup import ChangeDetector
+
 URL = "http://127.0.0.1:7657/tunnels"
 NETDB_URL = "http://127.0.0.1:7657/netdb?r="
 FETCH_INTERVAL = 60  # in seconds
@@ -50,7 +52,8 @@ def get_node_ip(node_id):
     node_cache[node_id] = result
     return result
 
-seen = set()
+# rows are deduplicated within one capture round; older keys expire
+seen = ChangeDetector(ttl=2 * FETCH_INTERVAL, bucket_seconds=FETCH_INTERVAL)
 print(f"[START] Capturing from {URL} for 24 hours...")
 
 start_time = time.time()
@@ -108,8 +111,7 @@ while time.time() - start_time < RUN_DURATION:
                         country = "Localhost"
 
                 row_id = f"{now}-{direction}-{node_id}-{roles[i]}"
-                if row_id not in seen:
-                    seen.add(row_id)
+                if not seen.seen(row_id):
                     with open(OUTPUT_FILE, "a", newline="") as f:
                         writer = csv.writer(f)
                         writer.writerow([
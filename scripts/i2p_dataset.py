@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Dataset Loaders
+One typed loader per Zenodo dataset file, so the notebooks stop re-sniffing
+and re-parsing the raw text on every run.
+
+The first load of a file parses it (with the same rules the notebooks use)
+and writes a columnar cache next to the data, keyed by the file's MD5; later
+loads read the cache directly. The MD5 is checked against the README's
+checksum table when it is first computed and then remembered by file size
+and modification time, so a warm load never re-reads the raw file. A changed
+file gets a new MD5 and therefore a new cache.
+
+  fastset_by_time          4-Fastset-Nodes-By-Time.txt   timestamp, router, node_id
+  fastset_frequency        5-Fastset-Frequency.txt       node_id, frequency
+  high_capacity_set        6-High-Capacity-Set.txt       timestamp, node_id
+  high_capacity_frequency  7-High-Capacity-Set-Freq.txt  node_id, frequency
+  ...                      the profile and tunnel CSVs   typed CSV columns
+
+Usage:
+  python3 i2p_dataset.py [--data-dir ../data] [--strict] [name ...]
+
+In a notebook:
+  from i2p_dataset import load
+  df_fast = load("fastset_by_time", "/content/drive/MyDrive/DataInBrief-2025")
+
+Requires: pandas; pyarrow for Parquet caches (a pickle cache is used otherwise)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet engine)
+except ImportError:
+    pyarrow = None
+
+from i2p_router_ids import RID_RE, RouterIdRegistry
+
+# === Configuration ===
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+CACHE_SUBDIR = ".cache"
+LOADER_VERSION = 1                  # bump when a parser changes to invalidate caches
+HIGH_CAPACITY_DATE = "2024-11-17"   # 6-High-Capacity-Set.txt logs times only
+CATEGORY_RATIO = 0.5                # string columns with fewer distinct values become categorical
+NUMERIC_RATIO = 0.95                # string columns this numeric are coerced ("--" -> NaN)
+DATE_COLUMNS = ("timestamp", "time", "date", "datetime")
+
+# Dataset file name -> (Zenodo file, README MD5 or None, parser)
+DATASET_FILES = {}
+
+
+def _dataset(name, filename, md5=None):
+    def register(parser):
+        DATASET_FILES[name] = (filename, md5, parser)
+        return parser
+    return register
+
+
+def file_md5(path, chunk_size=1 << 20):
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Parsers (raw file -> typed DataFrame) -------------------------------------
+
+def _id_category(ids):
+    return pd.Series(ids, dtype="category")
+
+
+@_dataset("fastset_by_time", "4-Fastset-Nodes-By-Time.txt", "7a11c3b5525603a7652a14bef294cf04")
+def read_fastset_by_time(path):
+    """Lines "M/D/YYYY<TAB>H:MM:SS<TAB>router<TAB>node ID" (Entropy&Gini.ipynb step 1)."""
+    stamps, routers, ids = [], [], []
+    with open(path, errors="ignore") as f:
+        for line in f:
+            parts = [p for p in line.rstrip("\n").split("\t") if p]
+            match = RID_RE.search(line)
+            if len(parts) < 3 or not match:
+                continue
+            stamps.append(f"{parts[0].strip()} {parts[1].strip()}")
+            routers.append(parts[2].strip() if len(parts) > 3 else "")
+            ids.append(match.group(0))
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(pd.Series(stamps, dtype=object), format="%m/%d/%Y %H:%M:%S", errors="coerce"),
+        "router": pd.to_numeric(pd.Series(routers, dtype=object), errors="coerce").astype("Int32"),
+        "node_id": _id_category(ids),
+    })
+    return df.dropna(subset=["timestamp"]).sort_values("timestamp", kind="mergesort").reset_index(drop=True)
+
+
+_COUNT_RE = re.compile(r"^\d+$")
+
+
+def read_frequency(path):
+    """(node_id, frequency) pairs in either order, whitespace/tab/punctuation
+    separated; header and malformed lines are skipped. Duplicates are kept."""
+    ids, counts = [], []
+    with open(path, errors="ignore") as f:
+        for line in f:
+            tokens = [t for t in re.split(r"[\s:|,;]+", line.strip()) if t]
+            numbers = [t for t in tokens if _COUNT_RE.match(t)]
+            names = [t for t in tokens if not _COUNT_RE.match(t)]
+            if not numbers or not names:
+                continue
+            match = RID_RE.search(line)
+            ids.append(match.group(0) if match else names[0])
+            counts.append(int(numbers[-1]))
+    return pd.DataFrame({"node_id": _id_category(ids), "frequency": pd.Series(counts, dtype="int64")})
+
+
+_dataset("fastset_frequency", "5-Fastset-Frequency.txt", "6c761dbbb9ee7352e424d196852bfb57")(read_frequency)
+_dataset("high_capacity_frequency", "7-High-Capacity-Set-Freq.txt", "6ba67c113104bd9faf85e5baa878ac36")(read_frequency)
+_dataset("high_capacity_frequency2", "8-High-Capaity-Freq2.txt")(read_frequency)
+
+_TIME_RE = re.compile(r"(?:^|\s)(\d{1,2}:\d{2}:\d{2})(?:\s|$)")
+_DATE_RE = re.compile(r"(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})")
+
+
+@_dataset("high_capacity_set", "6-High-Capacity-Set.txt", "3f866e5793a281a751d1a63a1c28413d")
+def read_high_capacity_set(path):
+    """Every router ID in the event log with its time; lines without a date
+    are placed on HIGH_CAPACITY_DATE (as Entropy&Gini_2.ipynb does) and lines
+    without a time get NaT, so counts match the notebooks' RID_RE scans."""
+    stamps, ids = [], []
+    with open(path, errors="ignore") as f:
+        for line in f:
+            match = RID_RE.search(line)
+            if not match:
+                continue
+            clock = _TIME_RE.search(line)
+            date = _DATE_RE.search(line)
+            stamps.append(f"{date.group(1) if date else HIGH_CAPACITY_DATE} {clock.group(1)}" if clock else None)
+            ids.append(match.group(0))
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(pd.Series(stamps, dtype=object), format="mixed", errors="coerce"),
+        "node_id": _id_category(ids),
+    })
+    return df.sort_values("timestamp", kind="mergesort", na_position="last").reset_index(drop=True)
+
+
+def _is_text(series):
+    return not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+                or isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(series))
+
+
+def read_table(path):
+    """CSV export with robust parsing (Profiles_Country.ipynb) and typed columns:
+    mostly-numeric text is coerced, time columns parsed, repetitive text and
+    router IDs become categoricals."""
+    df = pd.read_csv(path, engine="python", on_bad_lines="skip")
+    df.columns = [str(c).strip() for c in df.columns]
+    for column in df.columns:
+        series = df[column]
+        if not _is_text(series):
+            continue
+        values = series.dropna()
+        if values.empty:
+            continue
+        if column.lower() in DATE_COLUMNS:
+            parsed = pd.to_datetime(series, format="mixed", errors="coerce")
+            if parsed.notna().sum() >= NUMERIC_RATIO * len(values):
+                df[column] = parsed
+                continue
+        numeric = pd.to_numeric(series, errors="coerce")
+        if numeric.notna().sum() >= NUMERIC_RATIO * len(values):
+            df[column] = numeric
+        elif values.nunique() <= CATEGORY_RATIO * len(values) or _is_id_column(values):
+            df[column] = series.astype("category")
+    return df
+
+
+def _is_id_column(values, sample=100):
+    head = values.astype(str).head(sample)
+    return bool(head.map(lambda v: RID_RE.fullmatch(v.strip()) is not None).all())
+
+
+for _name, _filename, _md5 in (
+        ("client_tunnels", "1-Client-Tunnel.csv", "9e838ce7919e8308e7ba083ab75c19e9"),
+        ("profiles_by_country", "9-Profile-By-Country.csv", "2eaed6ded040c970eabd7131bd311e3a"),
+        ("profiles", "10-Profiles-By-Country-anonymized.csv", "21b45a84411fd458a760078f73cb5d3d"),
+        ("nodes_multiple_tunnels", "16-Nodes-Multiple-Tunnels.csv", "99b1bfaa6514e217be553a61a3595a5d"),
+        ("nodes_in_multitunnels", "17-Nodes-In-MultiTunnels.csv", "9714c95c5749531f56d8b97875272fc8"),
+        ("nodes_in_multitunnels2", "18-Nodes-In-MultiTunnels2.csv", "139ebf40041e97819d6bf6f4b0f78a59"),
+        ("exploratory_tunnels", "23-Exploratory-Tunnel.csv", "edad84685d18dc270da45ce7b5811187")):
+    _dataset(_name, _filename, _md5)(read_table)
+
+
+# --- Checksums and cache -------------------------------------------------------
+
+class DatasetCache:
+    """Columnar caches of parsed dataset files under <data dir>/.cache.
+
+    checksums.json remembers each raw file's MD5 by (size, mtime), so the
+    raw file is hashed once per version rather than on every load.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, cache_dir=None, strict=False):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir or os.path.join(data_dir, CACHE_SUBDIR)
+        self.strict = strict
+        self.index_path = os.path.join(self.cache_dir, "checksums.json")
+        self.stats = {"hits": 0, "misses": 0}
+        try:
+            with open(self.index_path) as f:
+                self.checksums = json.load(f)
+        except (OSError, ValueError):
+            self.checksums = {}
+
+    def checksum(self, filename, expected=None):
+        """MD5 of a dataset file, verified against `expected` when first computed."""
+        path = os.path.join(self.data_dir, filename)
+        st = os.stat(path)
+        known = self.checksums.get(filename)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            return known["md5"]
+        md5 = file_md5(path)
+        if expected and md5 != expected:
+            message = f"{path}: MD5 {md5} does not match the README checksum {expected}; re-download from Zenodo"
+            if self.strict:
+                raise ValueError(message)
+            print(f"[WARN] {message}", file=sys.stderr)
+        self.checksums[filename] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "md5": md5}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.checksums, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+        return md5
+
+    def _cache_path(self, name, md5):
+        extension = "parquet" if pyarrow is not None else "pkl"
+        return os.path.join(self.cache_dir, f"{name}-{md5}-v{LOADER_VERSION}.{extension}")
+
+    def load(self, name, refresh=False):
+        filename, expected, parser = DATASET_FILES[name]
+        md5 = self.checksum(filename, expected)
+        cache_path = self._cache_path(name, md5)
+        if not refresh and os.path.exists(cache_path):
+            self.stats["hits"] += 1
+            return pd.read_parquet(cache_path) if pyarrow is not None else pd.read_pickle(cache_path)
+
+        self.stats["misses"] += 1
+        df = parser(os.path.join(self.data_dir, filename))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = cache_path + ".tmp"
+        if pyarrow is not None:
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, cache_path)
+        for stale in os.listdir(self.cache_dir):   # caches of older file versions / loaders
+            if stale.startswith(f"{name}-") and os.path.join(self.cache_dir, stale) != cache_path:
+                os.remove(os.path.join(self.cache_dir, stale))
+        return df
+
+
+def add_node_codes(registry, df):
+    """int32 registry code column next to every router ID column (node_id -> node_id_code)."""
+    for column in list(df.columns):
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype) and len(series.cat.categories) \
+                and _is_id_column(pd.Series(series.cat.categories)):
+            codes = registry.encode(series.cat.categories.astype(str))
+            mapped = codes[series.cat.codes.to_numpy()]
+            mapped[series.cat.codes.to_numpy() < 0] = 0
+            df[f"{column}_code" if " " not in column else f"{column} Code"] = mapped
+    return df
+
+
+_caches = {}
+
+
+def load(name, data_dir=DATA_DIR, cache_dir=None, refresh=False, strict=False, registry=None):
+    """Typed DataFrame for a dataset file (see DATASET_FILES), cached after the first parse."""
+    key = (os.path.abspath(data_dir), cache_dir, strict)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = DatasetCache(data_dir, cache_dir, strict)
+    df = cache.load(name, refresh)
+    return add_node_codes(registry, df) if registry is not None else df
+
+
+def load_fastset_by_time(data_dir=DATA_DIR, **kwargs):
+    return load("fastset_by_time", data_dir, **kwargs)
+
+
+def load_fastset_frequency(data_dir=DATA_DIR, **kwargs):
+    return load("fastset_frequency", data_dir, **kwargs)
+
+
+def load_high_capacity_set(data_dir=DATA_DIR, **kwargs):
+    return load("high_capacity_set", data_dir, **kwargs)
+
+
+def load_high_capacity_frequency(data_dir=DATA_DIR, **kwargs):
+    return load("high_capacity_frequency", data_dir, **kwargs)
+
+
+def load_profiles(data_dir=DATA_DIR, **kwargs):
+    return load("profiles", data_dir, **kwargs)
+
+
+def load_profiles_by_country(data_dir=DATA_DIR, **kwargs):
+    return load("profiles_by_country", data_dir, **kwargs)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parse, verify and cache the Zenodo dataset files.")
+    parser.add_argument("names", nargs="*", help=f"dataset files to load (default: all present): {', '.join(DATASET_FILES)}")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache-dir", default=None, help="default: <data dir>/.cache")
+    parser.add_argument("--refresh", action="store_true", help="re-parse even when a cache exists")
+    parser.add_argument("--strict", action="store_true", help="fail on README checksum mismatches")
+    parser.add_argument("--id-registry", help="router ID registry (SQLite) for int32 node code columns")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cache = DatasetCache(args.data_dir, args.cache_dir, args.strict)
+    registry = RouterIdRegistry(args.id_registry) if args.id_registry else None
+    names = args.names or [name for name, (filename, _, _) in DATASET_FILES.items()
+                           if os.path.exists(os.path.join(args.data_dir, filename))]
+    for name in names:
+        start = time.perf_counter()
+        hits = cache.stats["hits"]
+        df = cache.load(name, args.refresh)
+        if registry is not None:
+            add_node_codes(registry, df)
+        source = "cache" if cache.stats["hits"] > hits else "parsed"
+        print(f"{name}: {len(df)} rows x {len(df.columns)} columns ({source}, "
+              f"{time.perf_counter() - start:.3f}s)")
+    if not names:
+        print(f"No dataset files found in {args.data_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Collector Deduplication
+Bounded-memory "have I already logged this?" state for long-running
+collectors, replacing the ever-growing `seen` sets and per-peer history
+dicts of the original loggers.
+
+  - keys (and the values whose changes matter) are stored as 64-bit
+    BLAKE2b hashes instead of the formatted strings
+  - entries live in time buckets (generations); a key is moved to the
+    current bucket when seen again, and whole buckets are dropped once they
+    are older than `ttl`, so memory follows the active peer set rather
+    than the run length
+  - `max_bytes` caps the estimated footprint; above it the oldest entries
+    are evicted first
+
+Usage (simulated week-long run, prints footprint and RSS per day):
+  python3 i2p_dedup.py [routers] [peers]
+
+Requires: nothing beyond the standard library
+"""
+
+import hashlib
+import random
+import sys
+import time
+from collections import OrderedDict
+
+# === Configuration ===
+DEDUP_TTL = 24 * 60 * 60         # forget keys not seen for this long
+BUCKET_SECONDS = 60 * 60         # expiry granularity
+MAX_BYTES = 64 * 1024 * 1024     # footprint ceiling per detector
+
+# Estimated bytes per entry: dict slot plus the key and value int objects
+_ENTRY_BYTES = 3 * 8 + 2 * sys.getsizeof(1 << 62)
+
+
+def hash_key(key):
+    """64-bit hash of a string or tuple key; None hashes to 0."""
+    if key is None:
+        return 0
+    if isinstance(key, (tuple, list)):
+        key = "\x1f".join(str(part) for part in key)
+    return int.from_bytes(hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class ChangeDetector:
+    """Time-bucketed key -> value-hash map.
+
+    changed(key, value) is True (and records the value) when the key is new,
+    expired, or last seen with a different value; plain dedup passes no value.
+    """
+
+    def __init__(self, ttl=DEDUP_TTL, bucket_seconds=BUCKET_SECONDS, max_bytes=MAX_BYTES, clock=time.time):
+        self.ttl = ttl
+        self.bucket_seconds = max(1, min(bucket_seconds, ttl))
+        self.max_bytes = max_bytes
+        self.max_entries = max(1, max_bytes // _ENTRY_BYTES)
+        self.clock = clock
+        self.buckets = OrderedDict()   # bucket number -> {key hash: value hash}, oldest first
+        self.size = 0
+        self.stats = {"checks": 0, "changed": 0, "expired": 0, "evicted": 0}
+
+    def _current(self, now):
+        number = int(now // self.bucket_seconds)
+        if self.buckets:
+            # a clock running behind (e.g. another worker's poll time) joins the
+            # newest bucket, so buckets stay oldest-first for expiry and eviction
+            number = max(number, next(reversed(self.buckets)))
+        oldest_kept = int((now - self.ttl) // self.bucket_seconds)
+        while self.buckets and next(iter(self.buckets)) < oldest_kept:
+            _, bucket = self.buckets.popitem(last=False)
+            self.size -= len(bucket)
+            self.stats["expired"] += len(bucket)
+        bucket = self.buckets.get(number)
+        if bucket is None:
+            bucket = self.buckets[number] = {}
+        return bucket
+
+    def _evict(self):
+        while self.size > self.max_entries:
+            number, oldest = next(iter(self.buckets.items()))
+            if len(self.buckets) > 1:
+                del self.buckets[number]
+                evicted = len(oldest)
+            else:
+                del oldest[next(iter(oldest))]
+                evicted = 1
+            self.size -= evicted
+            self.stats["evicted"] += evicted
+
+    def changed(self, key, value=None, now=None):
+        now = self.clock() if now is None else now
+        self.stats["checks"] += 1
+        key_hash, value_hash = hash_key(key), hash_key(value)
+        current = self._current(now)
+
+        previous = current.get(key_hash)
+        if previous is None:
+            for number in reversed(self.buckets):
+                bucket = self.buckets[number]
+                if bucket is not current and key_hash in bucket:
+                    previous = bucket.pop(key_hash)
+                    self.size -= 1
+                    break
+            self.size += 1
+        current[key_hash] = value_hash
+        if self.size > self.max_entries:
+            self._evict()
+
+        if previous == value_hash:
+            return False
+        self.stats["changed"] += 1
+        return True
+
+    def seen(self, key, now=None):
+        """Plain dedup: True if the key was already recorded within the TTL."""
+        return not self.changed(key, now=now)
+
+    def __len__(self):
+        return self.size
+
+    def state_dict(self):
+        """Picklable detector state, for i2p_checkpoint."""
+        return {"buckets": self.buckets, "size": self.size, "stats": self.stats}
+
+    def load_state_dict(self, state):
+        self.buckets = OrderedDict(state["buckets"])
+        self.size = state["size"]
+        self.stats = dict(state["stats"])
+
+    def footprint(self):
+        """Estimated bytes held: bucket dicts plus the hashed key/value ints."""
+        return sum(sys.getsizeof(b) for b in self.buckets.values()) + self.size * 2 * sys.getsizeof(1 << 62)
+
+    def report(self):
+        return dict(self.stats, entries=self.size, buckets=len(self.buckets), bytes=self.footprint())
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * 4096
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def simulate_week(routers=5, peers=2000, interval=60, churn=0.02, seed=1):
+    """Feed a detector one week of profile rows (5-minute polls per router)
+    from a churning peer population; prints footprint and RSS per day."""
+    rng = random.Random(seed)
+    detector = ChangeDetector()
+    population = [f"peer{i}" for i in range(peers)]
+    next_id = peers
+    now = 0.0
+    for day in range(7):
+        day_end = now + 86400
+        while now < day_end:
+            for i in rng.sample(range(peers), int(peers * churn)):  # peers leave, new ones arrive
+                population[i] = f"peer{next_id}"
+                next_id += 1
+            for router in range(routers):
+                for peer in rng.sample(population, peers // 10):
+                    detector.changed((router, peer), rng.choice(("OK", "Unreachable")), now=now)
+            now += interval * 5
+        report = detector.report()
+        print(f"day {day + 1}: {report['entries']} entries, {report['bytes'] / 1e6:.1f} MB estimated, "
+              f"RSS {_rss_bytes() / 1e6:.1f} MB, {report['expired']} expired, {next_id} peers seen")
+    return detector
+
+
+if __name__ == "__main__":
+    simulate_week(*(int(arg) for arg in sys.argv[1:3]))
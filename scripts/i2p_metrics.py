@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Collector Metrics
+In-process instrumentation for the swarm collectors, so a slow console, a
+growing cache or a page that stopped parsing shows up while a long run is
+still going instead of in the output afterwards.
+
+  - counters, gauges and fixed-bucket histograms with labels, updated by
+    SwarmPoller (fetch), SnapshotPipeline (parse, resolve, write) and
+    anything else handed the same Metrics object
+  - watch() registers callbacks read at scrape time, for state that is
+    already kept elsewhere (NetDbResolver.stats, sink buffers, queue depth)
+  - serve() exposes everything on a local HTTP endpoint: /metrics in the
+    Prometheus text format, /metrics.json as JSON
+  - log_summaries() prints a one-line summary every few minutes
+
+Usage (scrape a running collector):
+  python3 i2p_metrics.py http://127.0.0.1:9464 [--json]
+
+Requires: aiohttp for serve() (recording needs only the standard library)
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+
+# === Configuration ===
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+SUMMARY_INTERVAL = 5 * 60     # seconds between summary log lines
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "i2p_fetch_seconds": "Console page fetch time by result status",
+    "i2p_stage_seconds": "Time spent per pipeline stage and cycle (parse, resolve, journal, write, checkpoint, cycle)",
+    "i2p_rows_total": "Rows extracted per section",
+    "i2p_sections_empty_total": "Pages on which a section yielded no rows, by router",
+    "i2p_errors_total": "Failures by router, stage and kind",
+    "i2p_cycles_total": "Completed collection cycles",
+    "i2p_fetch_in_flight": "Console requests currently in flight",
+    "i2p_fetch_waiting": "Console requests queued behind the concurrency cap",
+    "i2p_netdb_lookups_total": "NetDb lookups by outcome (hits, misses, local, coalesced, fetches, errors)",
+    "i2p_netdb_cache_entries": "Entries in the netdb IP cache",
+    "i2p_netdb_in_flight": "NetDb fetches in flight",
+    "i2p_sink_buffered_rows": "Rows buffered in an output sink, not yet written",
+    "i2p_sink_bytes_written_total": "Bytes written per output stream",
+}
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) with sum and count."""
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot: above the largest bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if above all buckets)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self):
+        total, out = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+
+class Metrics:
+    """Registry of labelled counters, gauges, histograms and watched callbacks."""
+
+    def __init__(self):
+        self.counters = {}     # name -> {label key: value}
+        self.gauges = {}
+        self.histograms = {}   # name -> {label key: Histogram}
+        self.watches = []      # (name, kind, fn)
+        self.watch_errors = {}  # name -> last error reported for a failing callback
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        self.gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def watch(self, name, fn, kind="gauge"):
+        """fn() -> number, or {label dict as tuple of pairs: number}, read at scrape time."""
+        self.watches.append((name, kind, fn))
+
+    def _watched(self):
+        """{name: (kind, {label key: value})} from the callbacks. A failing
+        callback is left out; its error is logged once until it changes."""
+        out = {}
+        for name, kind, fn in self.watches:
+            try:
+                value = fn()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if self.watch_errors.get(name) != error:
+                    self.watch_errors[name] = error
+                    print(f"[WARN] Metric {name} unavailable ({error})", file=sys.stderr)
+                continue
+            self.watch_errors.pop(name, None)
+            series = out.setdefault(name, (kind, {}))[1]
+            if isinstance(value, dict):
+                for labels, v in value.items():
+                    series[tuple(labels)] = v
+            else:
+                series[()] = value
+        return out
+
+    def _families(self):
+        """(name, kind, {label key: value or Histogram}) for every metric."""
+        families = [(name, "counter", series) for name, series in self.counters.items()]
+        families += [(name, "gauge", series) for name, series in self.gauges.items()]
+        families += [(name, "histogram", series) for name, series in self.histograms.items()]
+        families += [(name, kind, series) for name, (kind, series) in self._watched().items()]
+        return sorted(families, key=lambda family: family[0])
+
+    def total(self, name, **match):
+        """Sum of a counter (or watched value) over the series whose labels include `match`."""
+        series = self.counters.get(name) or self._watched().get(name, (None, {}))[1]
+        wanted = set(match.items())
+        return sum(v for key, v in series.items() if wanted <= set(key))
+
+    def histogram(self, name, **labels):
+        return self.histograms.get(name, {}).get(_key(labels))
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        for name, kind, series in self._families():
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(series.items()):
+                if kind == "histogram":
+                    for bound, count in value.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', le)])} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {value.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def as_dict(self):
+        """JSON-friendly view: name -> list of {labels, value | count/sum/p50/p95}."""
+        out = {"uptime_seconds": round(time.time() - self.started, 1)}
+        for name, kind, series in self._families():
+            rows = []
+            for key, value in sorted(series.items()):
+                row = {"labels": dict(key)}
+                if kind == "histogram":
+                    row.update(count=value.count, sum=round(value.sum, 6),
+                               p50=value.quantile(0.5), p95=value.quantile(0.95))
+                else:
+                    row["value"] = value
+                rows.append(row)
+            out[name] = rows
+        return out
+
+
+def summary(metrics, previous=None):
+    """One log line of collector health; pass the last call's second return
+    value as `previous` to report per-interval rather than cumulative counts."""
+    previous = previous or {}
+    current = {
+        "cycles": metrics.total("i2p_cycles_total"),
+        "polls": sum(h.count for h in metrics.histograms.get("i2p_fetch_seconds", {}).values()),
+        "errors": metrics.total("i2p_errors_total"),
+        "rows": metrics.total("i2p_rows_total"),
+        "hits": metrics.total("i2p_netdb_lookups_total", outcome="hits")
+        + metrics.total("i2p_netdb_lookups_total", outcome="local"),
+        "misses": metrics.total("i2p_netdb_lookups_total", outcome="misses"),
+    }
+    delta = {k: v - previous.get(k, 0) for k, v in current.items()}
+    fetch = metrics.histogram("i2p_fetch_seconds", status="ok")
+    cycle = metrics.histogram("i2p_stage_seconds", stage="cycle")
+    lookups = delta["hits"] + delta["misses"]
+    errors = metrics.counters.get("i2p_errors_total", {})
+    worst = sorted(((v, dict(k).get("router", "?")) for k, v in errors.items()), reverse=True)[:3]
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    line = (f"[{now}] {delta['cycles']} cycles, {delta['polls']} polls, {delta['rows']} rows, "
+            f"{delta['errors']} errors"
+            + (f" (most: {', '.join(f'{router}={count}' for count, router in worst)})" if worst else "")
+            + (f"; fetch p50 <= {fetch.quantile(0.5)}s p95 <= {fetch.quantile(0.95)}s" if fetch else "")
+            + (f"; cycle mean {cycle.sum / cycle.count:.2f}s" if cycle else "")
+            + (f"; netdb hit rate {delta['hits'] / lookups:.0%} of {lookups}" if lookups else "")
+            + f"; in flight {metrics.total('i2p_fetch_in_flight')}, queued {metrics.total('i2p_fetch_waiting')}"
+            + f", buffered rows {metrics.total('i2p_sink_buffered_rows')}")
+    return line, current
+
+
+async def serve(metrics, host=METRICS_HOST, port=METRICS_PORT):
+    """Start the /metrics and /metrics.json endpoint; returns the aiohttp runner."""
+    from aiohttp import web
+
+    async def prometheus(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def as_json(request):
+        return web.json_response(metrics.as_dict())
+
+    app = web.Application()
+    app.router.add_get("/metrics", prometheus)
+    app.router.add_get("/metrics.json", as_json)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def log_summaries(metrics, interval=SUMMARY_INTERVAL):
+    """Print summary() every `interval` seconds until cancelled."""
+    previous = None
+    while True:
+        await asyncio.sleep(interval)
+        line, previous = summary(metrics, previous)
+        print(line, flush=True)
+
+
+def watch_resolver(metrics, resolver):
+    metrics.watch("i2p_netdb_lookups_total",
+                  lambda: {(("outcome", k),): v for k, v in resolver.stats.items()}, kind="counter")
+    metrics.watch("i2p_netdb_cache_entries", lambda: len(resolver.entries))
+    metrics.watch("i2p_netdb_in_flight", lambda: len(resolver.inflight))
+
+
+def watch_sinks(metrics, sinks):
+    metrics.watch("i2p_sink_buffered_rows", lambda: {(("stream", n),): len(s.buffer) for n, s in sinks.items()})
+    metrics.watch("i2p_sink_bytes_written_total",
+                  lambda: {(("stream", n),): getattr(s, "bytes_written", 0) for n, s in sinks.items()},
+                  kind="counter")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a running collector's metrics.")
+    parser.add_argument("url", nargs="?", default=f"http://{METRICS_HOST}:{METRICS_PORT}")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    path = "/metrics.json" if args.json else "/metrics"
+    with urllib.request.urlopen(args.url.rstrip("/") + path, timeout=10) as resp:
+        body = resp.read().decode()
+    print(json.dumps(json.loads(body), indent=2) if args.json else body, end="" if not args.json else "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Local NetDb Indexer
+Reads the router's own netDb directory (~/.i2p/netDb/r*/routerInfo-*.dat)
+instead of spawning `ls` per short ID and fetching netdb?r= per peer.
+
+Each RouterInfo file is parsed once (identity hash, published date,
+addresses/hosts, caps, router.version) into an in-memory index keyed by
+full router ID, with a prefix index for the abbreviated IDs shown on the
+console. refresh() only re-parses files whose mtime changed and drops
+entries whose file disappeared. A file that does not parse (e.g. one still
+being written) is left out until its mtime changes, so ip() returns None
+for that router and the caller asks the console instead.
+
+Usage:
+  python3 i2p_netdb_index.py ~/.i2p/netDb [short_id ...]
+
+Requires: nothing beyond the standard library
+"""
+
+import base64
+import glob
+import hashlib
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+# === Configuration ===
+NETDB_DIR = os.path.join(os.path.expanduser("~"), ".i2p", "netDb")
+PREFIX_LEN = 4  # console abbreviations are the first 4 characters
+
+RouterEntry = namedtuple("RouterEntry", [
+    "router_id", "published", "addresses", "hosts", "caps", "version", "path", "mtime",
+])
+
+
+def i2p_b64encode(data):
+    """I2P base64 uses '-' and '~' in place of '+' and '/'."""
+    return base64.b64encode(data).decode("ascii").replace("+", "-").replace("/", "~")
+
+
+# === RouterInfo binary format ===
+
+def _read_string(buf, pos):
+    length = buf[pos]
+    return buf[pos + 1:pos + 1 + length].decode("utf-8", "replace"), pos + 1 + length
+
+
+def _read_mapping(buf, pos):
+    size = struct.unpack_from(">H", buf, pos)[0]
+    pos += 2
+    end = pos + size
+    if end > len(buf):
+        raise ValueError("truncated mapping")
+    mapping = {}
+    while pos < end:
+        key, pos = _read_string(buf, pos)
+        pos += 1  # '='
+        value, pos = _read_string(buf, pos)
+        pos += 1  # ';'
+        mapping[key] = value
+    return mapping, end
+
+
+def parse_router_info(data):
+    """Parse a serialized RouterInfo.
+
+    Returns (router_id, published_ms, [(transport, host, port)], options).
+    The router ID is the I2P-base64 SHA-256 of the RouterIdentity
+    (256-byte public key, 128-byte signing key, certificate).
+    """
+    cert_len = struct.unpack_from(">H", data, 385)[0]
+    identity_end = 387 + cert_len
+    router_id = i2p_b64encode(hashlib.sha256(data[:identity_end]).digest())
+
+    pos = identity_end
+    published = struct.unpack_from(">Q", data, pos)[0]
+    pos += 8
+    address_count = data[pos]
+    pos += 1
+    addresses = []
+    for _ in range(address_count):
+        pos += 1 + 8  # cost, expiration
+        transport, pos = _read_string(data, pos)
+        options, pos = _read_mapping(data, pos)
+        addresses.append((transport, options.get("host", ""), options.get("port", "")))
+    peer_count = data[pos]
+    pos += 1 + 32 * peer_count
+    options, pos = _read_mapping(data, pos)
+    return router_id, published, addresses, options
+
+
+def _write_string(value):
+    raw = value.encode("utf-8")
+    return bytes([len(raw)]) + raw
+
+
+def _write_mapping(mapping):
+    body = b"".join(_write_string(k) + b"=" + _write_string(v) + b";" for k, v in sorted(mapping.items()))
+    return struct.pack(">H", len(body)) + body
+
+
+def encode_router_info(addresses, caps="XfR", version="0.9.63", published=None, seed=None):
+    """Build a synthetic (unsigned) RouterInfo for tests and stub routers.
+
+    addresses is a list of (transport, host, port). Returns (router_id, bytes).
+    """
+    seed = seed if seed is not None else os.urandom(16)
+    keys = hashlib.sha256(seed).digest() * 12  # 384 bytes of key material
+    identity = keys + b"\x00\x00\x00"          # NULL certificate
+    published = published if published is not None else int(time.time() * 1000)
+    body = identity + struct.pack(">Q", published) + bytes([len(addresses)])
+    for transport, host, port in addresses:
+        body += b"\x0a" + struct.pack(">Q", 0) + _write_string(transport)
+        body += _write_mapping({"host": host, "port": str(port)})
+    body += b"\x00" + _write_mapping({"caps": caps, "router.version": version})
+    body += b"\x00" * 40  # signature placeholder
+    return i2p_b64encode(hashlib.sha256(identity).digest()), body
+
+
+# === Index ===
+
+class NetDbIndex:
+    """Full-ID and abbreviated-ID index over one or more netDb directories."""
+
+    def __init__(self, netdb_dirs=NETDB_DIR):
+        self.netdb_dirs = [netdb_dirs] if isinstance(netdb_dirs, str) else list(netdb_dirs)
+        self.by_id = {}
+        self.by_prefix = {}
+        self.by_path = {}
+        self.failed = {}     # unparsable file -> mtime, retried once it changes
+        self.stats = {"files": 0, "parsed": 0, "removed": 0, "errors": 0}
+
+    def _add(self, entry):
+        self.by_id[entry.router_id] = entry
+        self.by_path[entry.path] = entry
+        self.by_prefix.setdefault(entry.router_id[:PREFIX_LEN], set()).add(entry.router_id)
+
+    def _remove(self, path):
+        entry = self.by_path.pop(path)
+        if self.by_id.get(entry.router_id) is not entry:
+            return
+        # the same router may also be stored in another router's netDb
+        for other in self.by_path.values():
+            if other.router_id == entry.router_id:
+                self.by_id[entry.router_id] = other
+                return
+        del self.by_id[entry.router_id]
+        ids = self.by_prefix.get(entry.router_id[:PREFIX_LEN], set())
+        ids.discard(entry.router_id)
+        if not ids:
+            self.by_prefix.pop(entry.router_id[:PREFIX_LEN], None)
+
+    def load_file(self, path, mtime):
+        """RouterEntry of one file, or None if it does not parse (truncated or mid-write)."""
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            router_id, published, addresses, options = parse_router_info(data)
+        except (IndexError, ValueError, struct.error):
+            self.stats["errors"] += 1
+            return None
+        hosts = tuple(dict.fromkeys(host for _, host, _ in addresses if host))
+        return RouterEntry(router_id, published, addresses, hosts,
+                           options.get("caps", ""), options.get("router.version", ""), path, mtime)
+
+    def refresh(self):
+        """Re-parse new or modified files and forget deleted ones; returns files parsed."""
+        current = {}
+        for netdb_dir in self.netdb_dirs:
+            for path in glob.glob(os.path.join(netdb_dir, "r*", "routerInfo-*.dat")):
+                try:
+                    current[path] = os.stat(path).st_mtime
+                except FileNotFoundError:
+                    continue
+
+        for path in [p for p in self.by_path if p not in current]:
+            self._remove(path)
+            self.stats["removed"] += 1
+        self.failed = {p: m for p, m in self.failed.items() if current.get(p) == m}
+
+        parsed = 0
+        for path, mtime in current.items():
+            known = self.by_path.get(path)
+            if (known is not None and known.mtime == mtime) or self.failed.get(path) == mtime:
+                continue
+            if known is not None:
+                self._remove(path)
+            try:
+                entry = self.load_file(path, mtime)
+            except OSError:
+                continue
+            if entry is None:
+                self.failed[path] = mtime
+                continue
+            self._add(entry)
+            parsed += 1
+        self.stats["files"] = len(self.by_path)
+        self.stats["parsed"] += parsed
+        return parsed
+
+    def full_id(self, short_id):
+        """Full router ID for a full or abbreviated ID; None if unknown or ambiguous."""
+        if short_id in self.by_id:
+            return short_id
+        if len(short_id) >= PREFIX_LEN:
+            candidates = [r for r in self.by_prefix.get(short_id[:PREFIX_LEN], ()) if r.startswith(short_id)]
+        else:
+            candidates = [r for r in self.by_id if r.startswith(short_id)]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def lookup(self, router_id):
+        full = self.full_id(router_id)
+        return self.by_id.get(full) if full else None
+
+    def ip(self, router_id):
+        """';'-joined published hosts like the netdb page lookup, or None if not indexed."""
+        entry = self.lookup(router_id)
+        if entry is None:
+            return None
+        return ";".join(entry.hosts) if entry.hosts else "Unknown"
+
+
+if __name__ == "__main__":
+    index = NetDbIndex(sys.argv[1] if len(sys.argv) > 1 else NETDB_DIR)
+    start = time.perf_counter()
+    index.refresh()
+    print(f"Indexed {len(index.by_id)} routers in {time.perf_counter() - start:.2f}s "
+          f"({index.stats['errors']} unparsable files).")
+    for short_id in sys.argv[2:]:
+        entry = index.lookup(short_id)
+        if entry is None:
+            print(f"{short_id}: not found")
+        else:
+            print(f"{short_id}: {entry.router_id} hosts={';'.join(entry.hosts) or 'Unknown'} "
+                  f"caps={entry.caps} version={entry.version}")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P NetDb IP Resolver
+Shared, persistent cache for the router ID -> IP lookups that every
+collector used to do inline through its own unbounded dict and a blocking
+netdb?r= request per row.
+
+  - entries live in an in-memory LRU backed by SQLite, so a restarted
+    collector starts warm instead of re-fetching thousands of netdb pages
+  - resolved IPs, "Unknown" (no published host) and "Error" (fetch failed)
+    each get their own TTL, so failures are retried instead of cached forever
+  - lookups are batched and run concurrently under their own cap, and
+    concurrent requests for the same router ID share one fetch
+  - with a NetDbIndex over the local netDb directory, IDs found there are
+    answered from memory and never reach the console
+
+The snapshot, shard and adaptive collectors resolve through it. The
+original single-router scripts (requests-based, synchronous) still keep
+their own per-run dicts.
+
+Usage (cache inspection):
+  python3 i2p_netdb_resolver.py ~/i2p_tunnel_snapshots/netdb_cache.sqlite
+
+Requires: nothing beyond the standard library (lookups go through SwarmPoller)
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+
+# === Configuration ===
+NETDB_PATH = "/netdb?r="
+CACHE_DB = os.path.join(os.path.expanduser("~"), "i2p_netdb_cache.sqlite")
+MAX_ENTRIES = 200000          # LRU capacity, in memory and on disk
+POSITIVE_TTL = 6 * 60 * 60    # an IP was found
+NEGATIVE_TTL = 60 * 60        # netdb page lists no host ("Unknown")
+ERROR_TTL = 2 * 60            # fetch failed ("Error")
+LOOKUP_CONCURRENCY = 16       # netdb fetches in flight per resolver
+INDEX_REFRESH_INTERVAL = 60   # seconds between local netDb rescans
+TRIM_INTERVAL = 5 * 60        # seconds between on-disk cache trims
+
+# Peer IDs that are never looked up in the netDb
+UNRESOLVABLE_IDS = ("Unknown", "Error", "Local")
+
+
+def parse_netdb_ips(html):
+    """IPv4/IPv6 host addresses listed on a netdb?r= page, ';'-joined."""
+    text = re.sub(r'<[^>]+>', ' ', html)
+    ipv4 = re.findall(r'(?i)host:\s*((?:\d{1,3}\.){3}\d{1,3})', text)
+    ipv6 = re.findall(r'(?i)host:\s*((?:[0-9A-Fa-f]{1,4}:){2,7}[0-9A-Fa-f]{1,4})', text)
+    ip_list = list(dict.fromkeys(ipv4 + ipv6))
+    return ";".join(ip_list) if ip_list else "Unknown"
+
+
+def ttl_for(result):
+    if result == "Error":
+        return ERROR_TTL
+    if result == "Unknown":
+        return NEGATIVE_TTL
+    return POSITIVE_TTL
+
+
+class NetDbResolver:
+    """Router ID -> IP cache shared by every router the collector polls.
+
+    `fetch_text(target, path)` is normally SwarmPoller.fetch_text; lookups go
+    through the console of the router that observed the peer. An optional
+    `netdb_index` (i2p_netdb_index.NetDbIndex) is consulted first.
+    """
+
+    def __init__(self, fetch_text, db_path=CACHE_DB, max_entries=MAX_ENTRIES,
+                 max_concurrency=LOOKUP_CONCURRENCY, netdb_index=None):
+        self.fetch_text = fetch_text
+        self.netdb_index = netdb_index
+        self.index_refreshed = 0.0
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()   # node_id -> (result, expires_at), oldest first
+        self.dirty = {}
+        self.last_trim = time.monotonic()
+        self.inflight = {}
+        self.stats = {"local": 0, "hits": 0, "misses": 0, "coalesced": 0, "fetches": 0, "errors": 0}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.db = None
+        if db_path:
+            self._open_db()
+
+    def _open_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS netdb_ips ("
+            " node_id TEXT PRIMARY KEY, result TEXT NOT NULL,"
+            " resolved_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS netdb_ips_resolved ON netdb_ips (resolved_at)")
+        now = time.time()
+        rows = self.db.execute(
+            "SELECT node_id, result, expires_at FROM netdb_ips WHERE expires_at > ?"
+            " ORDER BY resolved_at DESC LIMIT ?", (now, self.max_entries)
+        ).fetchall()
+        for node_id, result, expires_at in reversed(rows):
+            self.entries[node_id] = (result, expires_at)
+
+    def get(self, node_id, now=None):
+        """Cached result if still fresh, else None. Never touches the network."""
+        entry = self.entries.get(node_id)
+        if entry is None:
+            return None
+        if entry[1] <= (now or time.time()):
+            del self.entries[node_id]
+            return None
+        self.entries.move_to_end(node_id)
+        return entry[0]
+
+    def put(self, node_id, result, now=None):
+        now = now or time.time()
+        expires_at = now + ttl_for(result)
+        self.entries[node_id] = (result, expires_at)
+        self.entries.move_to_end(node_id)
+        self.dirty[node_id] = (result, now, expires_at)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def _fetch(self, target, node_id):
+        async with self._semaphore:
+            self.stats["fetches"] += 1
+            try:
+                result = parse_netdb_ips(await self.fetch_text(target, NETDB_PATH + node_id))
+            except Exception:
+                self.stats["errors"] += 1
+                result = "Error"
+        self.put(node_id, result)
+        return result
+
+    async def lookup(self, target, node_id):
+        if self.netdb_index is not None:
+            result = self.netdb_index.ip(node_id)
+            if result is not None:
+                self.stats["local"] += 1
+                return result
+        result = self.get(node_id)
+        if result is not None:
+            self.stats["hits"] += 1
+            return result
+        task = self.inflight.get(node_id)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await task
+        self.stats["misses"] += 1
+        task = asyncio.ensure_future(self._fetch(target, node_id))
+        self.inflight[node_id] = task
+        try:
+            return await task
+        finally:
+            self.inflight.pop(node_id, None)
+
+    async def resolve(self, target, node_ids):
+        """Resolve a batch concurrently; returns {node_id: ip} for the resolvable IDs."""
+        node_ids = [n for n in dict.fromkeys(node_ids) if n not in UNRESOLVABLE_IDS]
+        if self.netdb_index is not None and time.time() - self.index_refreshed >= INDEX_REFRESH_INTERVAL:
+            self.netdb_index.refresh()
+            self.index_refreshed = time.time()
+        results = await asyncio.gather(*(self.lookup(target, n) for n in node_ids))
+        self.flush()
+        return dict(zip(node_ids, results))
+
+    def flush(self, trim=False):
+        """Persist new results; every TRIM_INTERVAL (or with `trim`) also drop expired
+        entries and trim the on-disk cache to the LRU capacity."""
+        if self.db is None:
+            return
+        if self.dirty:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO netdb_ips (node_id, result, resolved_at, expires_at) VALUES (?, ?, ?, ?)",
+                [(node_id,) + entry for node_id, entry in self.dirty.items()],
+            )
+            self.dirty.clear()
+        if trim or time.monotonic() - self.last_trim >= TRIM_INTERVAL:
+            self.trim()
+        self.db.commit()
+
+    def trim(self):
+        self.db.execute("DELETE FROM netdb_ips WHERE expires_at <= ?", (time.time(),))
+        # everything older than the max_entries-th newest row (a walk of the resolved_at index)
+        self.db.execute(
+            "DELETE FROM netdb_ips WHERE resolved_at <"
+            " (SELECT resolved_at FROM netdb_ips ORDER BY resolved_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries - 1,)
+        )
+        self.last_trim = time.monotonic()
+
+    def close(self):
+        if self.db is not None:
+            self.flush(trim=True)
+            self.db.close()
+            self.db = None
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else CACHE_DB
+    db = sqlite3.connect(path)
+    now = time.time()
+    for result_kind, where in (("resolved", "result NOT IN ('Unknown', 'Error')"),
+                               ("unknown", "result = 'Unknown'"), ("error", "result = 'Error'")):
+        fresh, total = db.execute(
+            f"SELECT SUM(expires_at > ?), COUNT(*) FROM netdb_ips WHERE {where}", (now,)
+        ).fetchone()
+        print(f"{result_kind:>8}: {fresh or 0} fresh / {total} cached")
+    db.close()
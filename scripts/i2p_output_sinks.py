@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Collector Output Sinks
+Buffered record writers for the collectors, replacing the reopen-and-append
+per row pattern of the original loggers.
+
+Records are buffered and written when `flush_rows` rows are pending or
+`flush_interval` seconds have passed. Output files rotate every hour
+(rotate="hourly"), when they grow past `max_bytes` (rotate="size"), or
+never (rotate=None).
+
+  - CsvSink      one CSV per stream (per hour/size segment when rotating)
+  - ParquetSink  partitioned Parquet, <stream>/router=<port>/date=<YYYY-MM-DD>/,
+                 with typed columns and dictionary-encoded IDs/countries
+
+Usage (convert an existing collector CSV):
+  python3 i2p_output_sinks.py client_tunnels_snapshot.csv out_dir client
+
+Requires: pyarrow for ParquetSink (CsvSink needs only the standard library)
+"""
+
+import csv
+import os
+import re
+import sys
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+# === Configuration ===
+FLUSH_ROWS = 5000
+FLUSH_INTERVAL = 60           # seconds
+MAX_BYTES = 256 * 1024 * 1024  # size-based rotation threshold
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Column types understood by ParquetSink; anything undeclared is "dictionary"
+COLUMN_TYPES = ("timestamp", "int", "int32", "float", "string", "dictionary")
+
+
+def _segment(timestamp, rotate, sequence):
+    """Output segment suffix for a record timestamp ("YYYY-MM-DD HH:MM:SS")."""
+    if rotate == "hourly":
+        return f"{timestamp[:10].replace('-', '')}_{timestamp[11:13]}"
+    if rotate == "size":
+        return f"{sequence:05d}"
+    return None
+
+
+class BufferedSink:
+    """Shared buffering and flush policy; subclasses implement _write_batch()."""
+
+    def __init__(self, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL, rotate="hourly",
+                 max_bytes=MAX_BYTES):
+        if rotate not in ("hourly", "size", None):
+            raise ValueError(f"unknown rotation {rotate!r}")
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate = rotate
+        self.max_bytes = max_bytes
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.rows_written = 0
+        self.bytes_written = 0
+
+    def write(self, records):
+        self.buffer.extend(records)
+        if len(self.buffer) >= self.flush_rows or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            batch, self.buffer = self.buffer, []
+            self._write_batch(batch)
+            self.rows_written += len(batch)
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+    def state_dict(self):
+        """Counters to restore after a checkpoint (rows are flushed first)."""
+        return {"rows_written": self.rows_written, "bytes_written": self.bytes_written}
+
+    def load_state_dict(self, state):
+        self.rows_written = state["rows_written"]
+        self.bytes_written = state["bytes_written"]
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+
+class CsvSink(BufferedSink):
+    """CSV stream written in batches; rotated files are <name>_<segment>.csv."""
+
+    def __init__(self, output_dir, name, headers, **kwargs):
+        super().__init__(**kwargs)
+        self.output_dir = output_dir
+        self.name = name
+        self.headers = headers
+        self.sequence = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def path_for(self, timestamp):
+        segment = _segment(timestamp, self.rotate, self.sequence)
+        filename = f"{self.name}.csv" if segment is None else f"{self.name}_{segment}.csv"
+        return os.path.join(self.output_dir, filename)
+
+    def files(self):
+        """Every file of this stream in the output directory (all rotation segments)."""
+        pattern = re.compile(rf"^{re.escape(self.name)}(_\d{{8}}_\d{{2}}|_\d{{5}})?\.csv$")
+        return sorted(os.path.join(self.output_dir, f) for f in os.listdir(self.output_dir) if pattern.match(f))
+
+    def state_dict(self):
+        return dict(super().state_dict(), sequence=self.sequence)
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.sequence = state["sequence"]
+
+    def _write_batch(self, records):
+        by_path = {}
+        for record in records:
+            by_path.setdefault(self.path_for(record["Timestamp"]), []).append(record)
+        for path, rows in by_path.items():
+            new_file = not os.path.isfile(path)
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.headers, extrasaction="ignore")
+                if new_file:
+                    writer.writeheader()
+                start = f.tell()
+                writer.writerows(rows)
+                self.bytes_written += f.tell() - start
+                size = f.tell()
+            if self.rotate == "size" and size >= self.max_bytes:
+                self.sequence += 1
+
+
+def _to_int(value):
+    if isinstance(value, int):
+        return value
+    value = (value or "").strip()
+    return int(value) if value.lstrip("-").isdigit() else None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ParquetSink(BufferedSink):
+    """Partitioned Parquet dataset: <output_dir>/<name>/router=<r>/date=<d>/part-<segment>.parquet.
+
+    Every flush writes its rows of a partition as a small, closed file
+    (part-<segment>.<n>.parquet), so a crash never leaves a file without a
+    footer. When the segment rotates or the sink closes, its pieces are
+    compacted into part-<segment>.parquet, one row group per flush. After a
+    crash the uncompacted pieces stay readable as part of the dataset.
+    `column_types` maps column -> one of COLUMN_TYPES.
+    """
+
+    def __init__(self, output_dir, name, headers, column_types=None, partition_by="Router", **kwargs):
+        if pa is None:
+            raise RuntimeError("ParquetSink requires pyarrow (pip install pyarrow)")
+        super().__init__(**kwargs)
+        self.root = os.path.join(output_dir, name)
+        self.headers = headers
+        self.partition_by = partition_by
+        self.column_types = {"Timestamp": "timestamp"}
+        self.column_types.update(column_types or {})
+        self.schema = pa.schema([
+            (column, self._arrow_type(self.column_types.get(column, "dictionary")))
+            for column in headers if column != partition_by
+        ])
+        self.segments = {}   # partition dir -> [segment, compacted path, piece paths, bytes]
+        self.sequence = {}
+
+    @staticmethod
+    def _arrow_type(kind):
+        return {
+            "timestamp": pa.timestamp("s"),
+            "int": pa.int64(),
+            "int32": pa.int32(),
+            "float": pa.float64(),
+            "string": pa.string(),
+            "dictionary": pa.dictionary(pa.int32(), pa.string()),
+        }[kind]
+
+    def _column(self, column, values):
+        kind = self.column_types.get(column, "dictionary")
+        if kind == "timestamp":
+            return pc.strptime(pa.array(values, pa.string()), format=TIMESTAMP_FORMAT, unit="s")
+        if kind in ("int", "int32"):
+            return pa.array([_to_int(v) for v in values], self._arrow_type(kind))
+        if kind == "float":
+            return pa.array([_to_float(v) for v in values], pa.float64())
+        strings = pa.array([None if v is None else str(v) for v in values], pa.string())
+        return strings.dictionary_encode() if kind == "dictionary" else strings
+
+    def _table(self, records):
+        columns = [self._column(f.name, [r.get(f.name) for r in records]) for f in self.schema]
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    @staticmethod
+    def _piece(path, n):
+        return f"{path[:-len('.parquet')]}.{n:05d}.parquet"
+
+    def _segment_for(self, partition, timestamp):
+        seq = self.sequence.get(partition, 0)
+        segment = _segment(timestamp, self.rotate, seq) or "00000"
+        current = self.segments.get(partition)
+        if current is not None and current[0] != segment:
+            self._compact(partition)
+            current = None
+        if current is None:
+            directory = os.path.join(self.root, partition)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{segment}.parquet")
+            # never clobber a compacted segment or the pieces of a crashed run after a restart
+            while os.path.exists(path) or os.path.exists(self._piece(path, 0)):
+                seq += 1
+                path = os.path.join(directory, f"part-{segment}-{seq}.parquet")
+            current = [segment, path, [], 0]
+            self.segments[partition] = current
+        return current
+
+    def _compact(self, partition):
+        """Merge a segment's flush pieces into its final file and remove them."""
+        _, path, pieces, _ = self.segments.pop(partition)
+        if not pieces:
+            return
+        # the underscore prefix keeps dataset readers away from the unfinished file
+        tmp = os.path.join(os.path.dirname(path), f"_{os.path.basename(path)}.tmp")
+        with pq.ParquetWriter(tmp, self.schema, compression="zstd") as writer:
+            for piece in pieces:
+                writer.write_table(pq.read_table(piece).cast(self.schema))
+        os.replace(tmp, path)
+        for piece in pieces:
+            os.remove(piece)
+
+    def _write_batch(self, records):
+        groups = {}
+        for record in records:
+            partition = f"{self.partition_by.lower()}={record.get(self.partition_by, 'unknown')}" \
+                        f"/date={record['Timestamp'][:10]}"
+            hour = record["Timestamp"][:13]
+            groups.setdefault((partition, hour), []).append(record)
+        for (partition, _), rows in sorted(groups.items()):
+            current = self._segment_for(partition, rows[0]["Timestamp"])
+            piece = self._piece(current[1], len(current[2]))
+            pq.write_table(self._table(rows), piece, compression="zstd")
+            size = os.path.getsize(piece)
+            current[2].append(piece)
+            current[3] += size
+            self.bytes_written += size
+            if self.rotate == "size" and current[3] >= self.max_bytes:
+                self._compact(partition)
+                self.sequence[partition] = self.sequence.get(partition, 0) + 1
+
+    def close(self):
+        self.flush()
+        for partition in list(self.segments):
+            self._compact(partition)
+
+
+def make_sink(kind, output_dir, name, headers, column_types=None, **kwargs):
+    """Sink factory used by the collectors' --format option."""
+    if kind == "csv":
+        return CsvSink(output_dir, name, headers, **kwargs)
+    if kind == "parquet":
+        return ParquetSink(output_dir, name, headers, column_types=column_types, **kwargs)
+    raise ValueError(f"unknown sink format {kind!r}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("usage: i2p_output_sinks.py <collector.csv> <output_dir> <stream name>")
+        sys.exit(1)
+    src, out_dir, stream = sys.argv[1:4]
+    with open(src, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        sink = ParquetSink(out_dir, stream, reader.fieldnames, rotate=None)
+        for row in reader:
+            sink.write([row])
+        sink.close()
+    print(f"Wrote {sink.rows_written} rows ({sink.bytes_written} bytes) to {sink.root}")
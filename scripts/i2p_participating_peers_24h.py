@@ -30,6 +30,8 @@ import time
 import csv
 from datetime import datetime
 
+from i2p_dedup import ChangeDetector
+
 # Configuration
 URL = "http://127.0.0.1:7657/tunnels"
 OUTPUT_DIR = "i2p_peer_data2"
@@ -46,8 +48,8 @@ if not os.path.isfile(OUTPUT_FILE):
         writer = csv.writer(f)
         writer.writerow(["Timestamp", "Full Peer ID", "Country", "Tunnels", "Usage"])
 
-# Track last known data for each peer
-peer_data_history = {}
+# Track last known tunnel count for each peer (bounded, expires idle peers)
+peer_data_history = ChangeDetector()
 
 # Function to extract peer data
 def extract_peer_data(html):
@@ -116,8 +118,7 @@ while time.time() - start_time < RUN_DURATION:
             new_count = 0
             for peer_id, (country, tunnels, usage) in extracted.items():
                 # Only capture if the peer is new or tunnels count has changed
-                if peer_id not in peer_data_history or peer_data_history[peer_id][1] != tunnels:
-                    peer_data_history[peer_id] = (country, tunnels, usage)
+                if peer_data_history.changed(peer_id, tunnels):
                     writer.writerow([current_time, peer_id, country, tunnels, usage])
                     new_count += 1
 
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Capture Flow Extractor
+One-pass pcap/pcapng -> traffic metadata, replacing the manual Wireshark
+export (and the tshark | awk pipeline of i2pmetadata-4-17-25-final.sh) for
+the VPN captures taken with `tcpdump -i <vpn_nic> -w captures/swarmi2p.pcap`.
+
+The capture is memory-mapped and records are decoded in place with
+struct.unpack_from, so multi-GB files are never read into memory. Outputs
+use the column names the traffic notebooks already consume:
+
+  packets   Time,Src IP,Src Port,Dst IP,Dst Port,Proto,TTL,PacketSize(Bytes)
+            one row per IP packet, as the tshark pipeline wrote
+  flows     Src IP,Src Port,Dst IP,Dst Port,Proto,Packets,PacketSize(Bytes),
+            First Seen,Last Seen     (unidirectional 5-tuple; flows idle for
+            `flow_timeout` seconds are written out and forgotten, so memory
+            follows the active flow set)
+  buckets   Time + the flow columns, per flow per `bucket` seconds
+
+Supported: pcap (us/ns, either byte order) and pcapng (SHB/IDB/EPB/SPB);
+Ethernet (incl. 802.1Q), raw IP, Linux cooked (SLL/SLL2) and BSD loopback
+link types; IPv4 and IPv6 with TCP, UDP, ICMP and other protocols.
+PacketSize(Bytes) is the original frame length (tshark's frame.len).
+
+Two differences from the tshark export: Proto is the transport name from
+the IP header (TCP, UDP, ICMP, ...), not Wireshark's Protocol column (the
+top dissector, e.g. TLSv1.2); and IPv6 packets are included, where
+`-Y ip` matched IPv4 only (drop rows whose Src IP contains ':' to compare).
+pcapng packet blocks that name an undeclared interface are skipped and
+counted.
+
+Usage:
+  python3 i2p_pcap_flows.py captures/swarmi2p.pcap out/ [--packets] [--bucket 60] [--flow-timeout 120]
+  python3 i2p_pcap_flows.py --synthetic test.pcap [--count 1000000]     # write a synthetic capture
+
+Requires: nothing beyond the standard library
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import random
+import socket
+import struct
+import sys
+import time
+from datetime import datetime
+
+# === Configuration ===
+FLOW_TIMEOUT = 120          # seconds idle before a flow is written out
+BUCKET_SECONDS = 60
+SWEEP_INTERVAL = 30         # capture seconds between idle-flow sweeps
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+PACKET_HEADERS = ["Time", "Src IP", "Src Port", "Dst IP", "Dst Port", "Proto", "TTL", "PacketSize(Bytes)"]
+FLOW_HEADERS = ["Src IP", "Src Port", "Dst IP", "Dst Port", "Proto", "Packets", "PacketSize(Bytes)",
+                "First Seen", "Last Seen"]
+BUCKET_HEADERS = ["Time"] + FLOW_HEADERS
+
+PROTOCOLS = {1: "ICMP", 2: "IGMP", 6: "TCP", 17: "UDP", 47: "GRE", 50: "ESP", 58: "ICMPv6", 132: "SCTP"}
+PORT_PROTOCOLS = (6, 17, 132)
+IPV6_EXTENSIONS = (0, 43, 44, 60)   # hop-by-hop, routing, fragment, destination options
+
+# Link types
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+_U16 = struct.Struct("!H")
+_PORTS = struct.Struct("!HH")
+
+
+class CaptureError(ValueError):
+    pass
+
+
+# --- Capture readers -----------------------------------------------------------
+
+class CaptureReader:
+    """Memory-mapped pcap/pcapng reader.
+
+    Iterating yields (timestamp, linktype, offset, captured length, wire
+    length); packet bytes are at self.buf[offset:offset + captured length].
+    self.skipped counts pcapng packet blocks with no matching interface.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.skipped = 0
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < 24:
+            raise CaptureError(f"{path}: too short for a capture file")
+        self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self.buf[:4]
+        if magic == b"\x0a\x0d\x0d\x0a":
+            self.format = "pcapng"
+        elif magic in (b"\xd4\xc3\xb2\xa1", b"\xa1\xb2\xc3\xd4", b"\x4d\x3c\xb2\xa1", b"\xa1\xb2\x3c\x4d"):
+            self.format = "pcap"
+        else:
+            raise CaptureError(f"{path}: not a pcap or pcapng file")
+
+    def __iter__(self):
+        return self._pcap() if self.format == "pcap" else self._pcapng()
+
+    def _pcap(self):
+        buf = self.buf
+        magic = buf[:4]
+        endian = "<" if magic in (b"\xd4\xc3\xb2\xa1", b"\x4d\x3c\xb2\xa1") else ">"
+        scale = 1e-9 if magic in (b"\x4d\x3c\xb2\xa1", b"\xa1\xb2\x3c\x4d") else 1e-6
+        linktype = struct.unpack_from(endian + "I", buf, 20)[0] & 0x0FFFFFFF
+        record = struct.Struct(endian + "IIII")
+        unpack = record.unpack_from
+        offset, end = 24, len(buf)
+        while offset + 16 <= end:
+            sec, frac, caplen, wirelen = unpack(buf, offset)
+            offset += 16
+            if offset + caplen > end:
+                break   # truncated last record (capture still being written)
+            yield sec + frac * scale, linktype, offset, caplen, wirelen
+            offset += caplen
+
+    def _pcapng(self):
+        buf = self.buf
+        end = len(buf)
+        offset = 0
+        endian = "<"
+        interfaces = []   # (linktype, seconds per tick)
+        while offset + 12 <= end:
+            block_type = struct.unpack_from(endian + "I", buf, offset)[0]
+            if block_type == 0x0A0D0D0A:   # section header: byte order may change
+                endian = "<" if buf[offset + 8:offset + 12] == b"\x4d\x3c\x2b\x1a" else ">"
+                interfaces = []
+            block_len = struct.unpack_from(endian + "I", buf, offset + 4)[0]
+            if block_len < 12 or offset + block_len > end:
+                break
+            body = offset + 8
+            if block_type == 6:            # enhanced packet block
+                iface, ts_high, ts_low, caplen, wirelen = struct.unpack_from(endian + "IIIII", buf, body)
+                if iface >= len(interfaces):
+                    self.skipped += 1
+                    offset += block_len
+                    continue
+                linktype, tick = interfaces[iface]
+                yield ((ts_high << 32) | ts_low) * tick, linktype, body + 20, caplen, wirelen
+            elif block_type == 3:          # simple packet block (no timestamp)
+                wirelen = struct.unpack_from(endian + "I", buf, body)[0]
+                if not interfaces:
+                    self.skipped += 1
+                    offset += block_len
+                    continue
+                linktype, _ = interfaces[0]
+                yield 0.0, linktype, body + 4, min(wirelen, block_len - 16), wirelen
+            elif block_type == 2:          # obsolete packet block
+                iface, _, ts_high, ts_low, caplen, wirelen = struct.unpack_from(endian + "HHIIII", buf, body)
+                if iface >= len(interfaces):
+                    self.skipped += 1
+                    offset += block_len
+                    continue
+                linktype, tick = interfaces[iface]
+                yield ((ts_high << 32) | ts_low) * tick, linktype, body + 20, caplen, wirelen
+            elif block_type == 1:          # interface description
+                linktype = struct.unpack_from(endian + "H", buf, body)[0]
+                interfaces.append((linktype, self._tick(body + 8, offset + block_len - 4, endian)))
+            offset += block_len
+
+    def _tick(self, offset, end, endian):
+        """Seconds per timestamp unit from an IDB's if_tsresol option (default 1e-6)."""
+        buf = self.buf
+        while offset + 4 <= end:
+            code, length = struct.unpack_from(endian + "HH", buf, offset)
+            if code == 0:
+                break
+            if code == 9 and length >= 1:
+                value = buf[offset + 4]
+                return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+            offset += 4 + (length + 3) // 4 * 4
+        return 1e-6
+
+    def close(self):
+        self.buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Packet decoding -----------------------------------------------------------
+
+def _network_offset(buf, linktype, offset, end):
+    """(offset of the IP header, ethertype-like version hint) or (None, None)."""
+    if linktype == LINKTYPE_ETHERNET:
+        if offset + 14 > end:
+            return None, None
+        ethertype = _U16.unpack_from(buf, offset + 12)[0]
+        offset += 14
+        while ethertype in (0x8100, 0x88A8) and offset + 4 <= end:   # VLAN tags
+            ethertype = _U16.unpack_from(buf, offset + 2)[0]
+            offset += 4
+        return offset, ethertype
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        return offset, None
+    if linktype == LINKTYPE_LINUX_SLL:
+        return (offset + 16, _U16.unpack_from(buf, offset + 14)[0]) if offset + 16 <= end else (None, None)
+    if linktype == LINKTYPE_LINUX_SLL2:
+        return (offset + 20, _U16.unpack_from(buf, offset)[0]) if offset + 20 <= end else (None, None)
+    if linktype in (LINKTYPE_NULL, LINKTYPE_LOOP):
+        return offset + 4, None
+    return None, None
+
+
+def decode(buf, linktype, offset, caplen):
+    """(src, sport, dst, dport, proto, ttl) of an IP packet; addresses are raw
+    bytes (formatted on output), ports 0 when absent. None for non-IP frames."""
+    end = offset + caplen
+    offset, ethertype = _network_offset(buf, linktype, offset, end)
+    if offset is None or offset >= end:
+        return None
+    version = buf[offset] >> 4
+    if ethertype is not None and ethertype not in (0x0800, 0x86DD):
+        return None
+    if version == 4:
+        if offset + 20 > end:
+            return None
+        header_len = (buf[offset] & 0x0F) * 4
+        ttl, proto = buf[offset + 8], buf[offset + 9]
+        src, dst = buf[offset + 12:offset + 16], buf[offset + 16:offset + 20]
+        fragment = _U16.unpack_from(buf, offset + 6)[0] & 0x1FFF
+        offset += header_len
+        if fragment:   # non-first fragment: no transport header
+            return src, 0, dst, 0, proto, ttl
+    elif version == 6:
+        if offset + 40 > end:
+            return None
+        proto, ttl = buf[offset + 6], buf[offset + 7]
+        src, dst = buf[offset + 8:offset + 24], buf[offset + 24:offset + 40]
+        offset += 40
+        while proto in IPV6_EXTENSIONS and offset + 8 <= end:
+            next_proto = buf[offset]
+            offset += 8 if proto == 44 else (buf[offset + 1] + 1) * 8
+            proto = next_proto
+    else:
+        return None
+    if proto in PORT_PROTOCOLS and offset + 4 <= end:
+        sport, dport = _PORTS.unpack_from(buf, offset)
+        return src, sport, dst, dport, proto, ttl
+    return src, 0, dst, 0, proto, ttl
+
+
+def format_ip(raw):
+    return socket.inet_ntop(socket.AF_INET if len(raw) == 4 else socket.AF_INET6, raw)
+
+
+def _port(proto, port):
+    return port if proto in PORT_PROTOCOLS else ""
+
+
+class _Clock:
+    """Local "YYYY-MM-DD HH:MM:SS" strings, cached per second (like `date -d @epoch`)."""
+
+    def __init__(self, size=4096):
+        self.size = size
+        self.texts = {}
+
+    def __call__(self, ts):
+        second = int(ts)
+        text = self.texts.get(second)
+        if text is None:
+            if len(self.texts) >= self.size:
+                self.texts.clear()
+            text = self.texts[second] = datetime.fromtimestamp(second).strftime(TIMESTAMP_FORMAT)
+        return text
+
+
+# --- Aggregation ---------------------------------------------------------------
+
+class FlowTable:
+    """5-tuple -> [packets, bytes, first seen, last seen], optionally per time
+    bucket; finished entries are handed to `emit(key, bucket, stats)`."""
+
+    def __init__(self, emit, bucket_seconds=None, flow_timeout=FLOW_TIMEOUT):
+        self.emit = emit
+        self.bucket_seconds = bucket_seconds
+        self.flow_timeout = flow_timeout
+        self.flows = {}
+        self.next_sweep = None
+
+    def add(self, ts, key, length):
+        if self.bucket_seconds:
+            key = (int(ts // self.bucket_seconds) * self.bucket_seconds,) + key
+        stats = self.flows.get(key)
+        if stats is None:
+            self.flows[key] = [1, length, ts, ts]
+        else:
+            stats[0] += 1
+            stats[1] += length
+            stats[3] = ts
+        if self.next_sweep is None:
+            self.next_sweep = ts + SWEEP_INTERVAL
+        elif ts >= self.next_sweep:
+            self.sweep(ts)
+
+    def sweep(self, now):
+        """Emit and drop entries that can no longer grow: idle flows, or past buckets."""
+        if self.bucket_seconds:
+            current = int(now // self.bucket_seconds) * self.bucket_seconds
+            done = [k for k, s in self.flows.items() if k[0] < current - self.bucket_seconds]
+        else:
+            done = [k for k, s in self.flows.items() if s[3] < now - self.flow_timeout]
+        for key in sorted(done, key=lambda k: self.flows[k][2]):
+            self.emit(key, self.flows.pop(key))
+        self.next_sweep = now + SWEEP_INTERVAL
+
+    def close(self):
+        for key in sorted(self.flows, key=lambda k: self.flows[k][2]):
+            self.emit(key, self.flows[key])
+        self.flows.clear()
+
+
+def extract(path, output_dir, packets=False, flows=True, bucket_seconds=BUCKET_SECONDS,
+            flow_timeout=FLOW_TIMEOUT):
+    """Stream a capture into packets.csv / flows.csv / buckets.csv; returns counters."""
+    os.makedirs(output_dir, exist_ok=True)
+    files, writers, tables = [], {}, []
+    clock = _Clock()
+    ips = {}   # raw address -> text, the same few thousand addresses repeat
+
+    def ip_text(raw):
+        text = ips.get(raw)
+        if text is None:
+            text = ips[raw] = format_ip(raw)
+        return text
+
+    def open_writer(name, headers):
+        f = open(os.path.join(output_dir, f"{name}.csv"), "w", newline="", encoding="utf-8")
+        files.append(f)
+        writers[name] = csv.writer(f)
+        writers[name].writerow(headers)
+        return writers[name]
+
+    def flow_row(key, stats):
+        src, sport, dst, dport, proto = key[-5:]
+        return [ip_text(src), _port(proto, sport), ip_text(dst), _port(proto, dport), PROTOCOLS.get(proto, proto),
+                stats[0], stats[1], clock(stats[2]), clock(stats[3])]
+
+    if packets:
+        packet_writer = open_writer("packets", PACKET_HEADERS)
+    if flows:
+        flow_writer = open_writer("flows", FLOW_HEADERS)
+        tables.append(FlowTable(lambda key, stats: flow_writer.writerow(flow_row(key, stats)),
+                                flow_timeout=flow_timeout))
+    if bucket_seconds:
+        bucket_writer = open_writer("buckets", BUCKET_HEADERS)
+        tables.append(FlowTable(
+            lambda key, stats: bucket_writer.writerow([clock(key[0])] + flow_row(key, stats)), bucket_seconds))
+
+    counts = {"frames": 0, "ip_packets": 0, "bytes": 0}
+    with CaptureReader(path) as reader:
+        buf = reader.buf
+        for ts, linktype, offset, caplen, wirelen in reader:
+            counts["frames"] += 1
+            decoded = decode(buf, linktype, offset, caplen)
+            if decoded is None:
+                continue
+            src, sport, dst, dport, proto, ttl = decoded
+            counts["ip_packets"] += 1
+            counts["bytes"] += wirelen
+            key = (src, sport, dst, dport, proto)
+            for table in tables:
+                table.add(ts, key, wirelen)
+            if packets:
+                packet_writer.writerow([clock(ts), ip_text(src), _port(proto, sport), ip_text(dst),
+                                        _port(proto, dport), PROTOCOLS.get(proto, proto), ttl, wirelen])
+        counts["capture_bytes"] = len(buf)
+        counts["skipped_blocks"] = reader.skipped
+    for table in tables:
+        table.close()
+    for f in files:
+        f.close()
+    return counts
+
+
+# --- Synthetic captures --------------------------------------------------------
+
+def write_synthetic(path, count=100000, hosts=50, flows=2000, start=1744848000.0, rate=2000.0, fmt="pcap", seed=1):
+    """Ethernet capture of `count` packets drawn from `flows` random TCP/UDP
+    5-tuples between `hosts` IPv4 addresses (plus some IPv6, VLAN-tagged and
+    ARP frames); returns the expected {5-tuple: [packets, bytes]} so the
+    extractor's output can be checked."""
+    rng = random.Random(seed)
+    addresses = [bytes([10, 8, rng.randrange(256), rng.randrange(1, 255)]) for _ in range(hosts)]
+    addresses6 = [bytes([0x20, 0x01, 0x0d, 0xb8] + [rng.randrange(256) for _ in range(12)]) for _ in range(4)]
+    tuples = []
+    for i in range(flows):
+        src, dst = rng.sample(addresses6 if i % 20 == 0 else addresses, 2)
+        tuples.append((src, rng.randrange(1024, 65536), dst, rng.choice((443, 7654, 12345, 23456)), rng.choice((6, 17))))
+    mac = b"\x02\x00\x00\x00\x00\x01\x02\x00\x00\x00\x00\x02"
+    expected = {}
+    with open(path, "wb") as f:
+        if fmt == "pcap":
+            f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET))
+        else:
+            shb = struct.pack("<IIIHHq", 0x0A0D0D0A, 28, 0x1A2B3C4D, 1, 0, -1) + struct.pack("<I", 28)
+            options = struct.pack("<HHB3x", 9, 1, 9) + struct.pack("<HH", 0, 0)   # if_tsresol = 1e-9
+            idb_len = 20 + len(options)
+            idb = struct.pack("<IIHHI", 1, idb_len, LINKTYPE_ETHERNET, 0, 65535) + options + struct.pack("<I", idb_len)
+            f.write(shb + idb)
+        ts = start
+        for i in range(count):
+            ts += rng.expovariate(rate)
+            kind = rng.random()
+            if kind < 0.01:
+                frame = mac + b"\x08\x06" + bytes(28)   # ARP, not IP
+            else:
+                src, sport, dst, dport, proto = tuples[int(rng.paretovariate(1.2)) % flows]
+                payload = bytes(rng.randrange(0, 1400))
+                transport = struct.pack("!HH", sport, dport) + bytes(16 if proto == 6 else 4) + payload
+                if len(src) == 16:
+                    ip = struct.pack("!IHBB", 6 << 28, len(transport), proto, 64) + src + dst
+                else:
+                    ip = struct.pack("!BBHHHBBH", 0x45, 0, 20 + len(transport), i & 0xFFFF, 0x4000, 64, proto, 0)
+                    ip += src + dst
+                vlan = b"\x81\x00\x00\x07" if kind > 0.97 else b""
+                frame = mac + vlan + (b"\x86\xdd" if len(src) == 16 else b"\x08\x00") + ip + transport
+                stats = expected.setdefault((format_ip(src), sport, format_ip(dst), dport, PROTOCOLS[proto]), [0, 0])
+                stats[0] += 1
+                stats[1] += len(frame)
+            if fmt == "pcap":
+                f.write(struct.pack("<IIII", int(ts), int(ts % 1 * 1e6), len(frame), len(frame)) + frame)
+            else:
+                padded = frame + bytes(-len(frame) % 4)
+                ns = int(round(ts * 1e9))
+                block_len = 32 + len(padded)
+                f.write(struct.pack("<IIIIIII", 6, block_len, 0, ns >> 32, ns & 0xFFFFFFFF, len(frame), len(frame))
+                        + padded + struct.pack("<I", block_len))
+    return expected
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract packet, flow and time-bucket metadata from a capture.")
+    parser.add_argument("capture", help="pcap or pcapng file")
+    parser.add_argument("output_dir", nargs="?", help="directory for packets.csv / flows.csv / buckets.csv")
+    parser.add_argument("--packets", action="store_true", help="also write one row per packet (tshark export schema)")
+    parser.add_argument("--no-flows", action="store_true", help="skip flows.csv")
+    parser.add_argument("--bucket", type=int, default=BUCKET_SECONDS, help="bucket seconds for buckets.csv (0 = off)")
+    parser.add_argument("--flow-timeout", type=float, default=FLOW_TIMEOUT, help="idle seconds that end a flow")
+    parser.add_argument("--synthetic", action="store_true", help="write a synthetic capture to CAPTURE instead")
+    parser.add_argument("--count", type=int, default=100000, help="packets in the synthetic capture")
+    parser.add_argument("--pcapng", action="store_true", help="synthetic capture in pcapng format")
+    args = parser.parse_args()
+    if not args.synthetic and not args.output_dir:
+        parser.error("output_dir is required")
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.synthetic:
+        write_synthetic(args.capture, args.count, fmt="pcapng" if args.pcapng else "pcap")
+        print(f"[DONE] Wrote {args.count} synthetic frames to {args.capture}")
+        return
+    start = time.time()
+    counts = extract(args.capture, args.output_dir, args.packets, not args.no_flows, args.bucket, args.flow_timeout)
+    elapsed = max(time.time() - start, 1e-9)
+    print(f"[DONE] {counts['ip_packets']}/{counts['frames']} IP packets, {counts['bytes']} bytes in {elapsed:.1f}s "
+          f"({counts['capture_bytes'] / elapsed / 1e6:.0f} MB/s) -> {args.output_dir}")
+    if counts["skipped_blocks"]:
+        print(f"[WARN] Skipped {counts['skipped_blocks']} packet blocks with an undeclared interface", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Peer Tunnel Graph
+Sparse peer graph built from tunnel observations across all routers and
+polls, replacing the notebooks' per-peer frequency counts and hand-built
+networkx graphs, so centrality can be computed over every observed peer.
+
+Two CSR matrices are maintained:
+
+  hop   directed: weight of i -> j = tunnels in which j was the hop right
+        after i (gateway towards endpoint, as the console lists them)
+  co    symmetric co-membership: tunnels in which i and j were both hops
+
+Each client/exploratory tunnel row of a /tunnels page is one path.
+Participating tunnels add the pair of peers on either side of this router.
+"Local" and "Unknown" hops are not nodes. They break hop adjacency but not
+co-membership.
+
+A tunnel seen again on the next poll is not counted twice: the router,
+direction and hops are remembered for TUNNEL_LIFETIME. New edges are
+buffered as COO triples and merged into the CSR matrices on demand, so
+snapshots can be added incrementally. Centrality uses vectorized sparse
+operations:
+
+  degree        distinct neighbours and total edge weight
+  pagerank      power iteration on the weighted hop (or co) matrix
+  betweenness   Brandes' dependency accumulation from a random sample of
+                sources, processed as a batch of simultaneous BFS levels
+                (sparse x dense products); exact when samples >= nodes
+
+Usage:
+  python3 i2p_peer_graph.py ../data [captures.tar.gz ...] [--top 20] [--samples 256] [--save graph.npz]
+
+Requires: numpy, scipy
+"""
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from i2p_dedup import ChangeDetector
+from i2p_tunnel_parser import parse_participating_tunnels, parse_pool_paths
+
+# === Configuration ===
+TUNNEL_LIFETIME = 10 * 60     # seconds a tunnel exists; repeat sightings within it count once
+DAMPING = 0.85
+PAGERANK_TOL = 1e-10
+PAGERANK_MAX_ITER = 200
+BETWEENNESS_SAMPLES = 256
+BETWEENNESS_BATCH = 32        # BFS sources run simultaneously (memory ~ 5 * nodes * batch * 8 bytes)
+TOP_N = 20
+NON_PEERS = ("Local", "Unknown", "Error", "")
+KINDS = ("hop", "co")
+
+
+class PeerGraph:
+    """Incrementally built hop / co-membership matrices over peer IDs.
+
+    With a RouterIdRegistry, node indices are the registry's stable codes,
+    so graphs built by different processes line up; otherwise nodes are
+    numbered in order of appearance.
+    """
+
+    def __init__(self, registry=None, dedup_ttl=TUNNEL_LIFETIME):
+        self.registry = registry
+        self.index = {}       # peer ID -> node index (without a registry)
+        self.ids = []
+        self.size = 0
+        self.pending = {kind: ([], [], []) for kind in KINDS}   # rows, cols, weights
+        self.matrices = {kind: sp.csr_matrix((0, 0), dtype=np.float64) for kind in KINDS}
+        self.seen = ChangeDetector(ttl=dedup_ttl, bucket_seconds=60) if dedup_ttl else None
+        self.tunnels = 0
+
+    def node(self, peer_id):
+        if self.registry is not None:
+            index = self.registry.intern(peer_id)
+        else:
+            index = self.index.get(peer_id)
+            if index is None:
+                index = self.index[peer_id] = len(self.ids)
+                self.ids.append(peer_id)
+        self.size = max(self.size, index + 1)
+        return index
+
+    def peer_id(self, index):
+        return self.registry.router_id(index) if self.registry is not None else self.ids[index]
+
+    def add_path(self, hops, weight=1.0, key=None, now=None):
+        """One tunnel: hop IDs in order. `key` (e.g. router, direction, hops)
+        identifies the tunnel for repeat-sighting suppression."""
+        if self.seen is not None and key is not None and self.seen.seen(key, now=now):
+            return False
+        nodes = [None if hop in NON_PEERS else self.node(hop) for hop in hops]
+        rows, cols, weights = self.pending["hop"]
+        for a, b in zip(nodes, nodes[1:]):
+            if a is not None and b is not None and a != b:
+                rows.append(a)
+                cols.append(b)
+                weights.append(weight)
+        members = sorted({n for n in nodes if n is not None})
+        rows, cols, weights = self.pending["co"]
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                rows.extend((a, b))
+                cols.extend((b, a))
+                weights.extend((weight, weight))
+        self.tunnels += 1
+        return True
+
+    def add_page(self, html, router="", now=None):
+        """Every client, exploratory and participating tunnel on a /tunnels page."""
+        added = 0
+        for pool in ("client", "exploratory"):
+            for direction, hops in parse_pool_paths(html, pool):
+                added += self.add_path(hops, key=(router, pool, direction) + tuple(hops), now=now)
+        for record in parse_participating_tunnels(html):
+            hops = (record["From Full ID"], "Local", record["To Full ID"])
+            key = (router, "participating", record["Receive on"], record["Send on"])
+            added += self.add_path(hops, key=key, now=now)
+        return added
+
+    def matrix(self, kind="co"):
+        """Consolidated n x n CSR matrix (pending edges merged in)."""
+        current = self.matrices[kind]
+        rows, cols, weights = self.pending[kind]
+        n = self.size
+        if current.shape != (n, n):
+            current = current.tocoo()
+            current = sp.csr_matrix((current.data, (current.row, current.col)), shape=(n, n))
+        if rows:
+            update = sp.csr_matrix((np.asarray(weights, dtype=np.float64),
+                                    (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+                                   shape=(n, n))
+            current = current + update
+            self.pending[kind] = ([], [], [])
+        current.sum_duplicates()
+        self.matrices[kind] = current
+        return current
+
+    def active_nodes(self, kind="co"):
+        """Indices with at least one edge (registry codes can leave gaps)."""
+        matrix = self.matrix(kind)
+        return np.flatnonzero(matrix.getnnz(axis=1) + matrix.getnnz(axis=0))
+
+    # --- Centrality ---
+
+    def degree(self, kind="co", weighted=False):
+        matrix = self.matrix(kind)
+        if weighted:
+            return np.asarray(matrix.sum(axis=1)).ravel() + (np.asarray(matrix.sum(axis=0)).ravel()
+                                                             if kind == "hop" else 0)
+        if kind == "hop":
+            return (matrix + matrix.T).getnnz(axis=1)
+        return matrix.getnnz(axis=1)
+
+    def pagerank(self, kind="hop", damping=DAMPING, tol=PAGERANK_TOL, max_iter=PAGERANK_MAX_ITER):
+        """Weighted PageRank over active nodes; dangling mass is spread uniformly."""
+        matrix = self.matrix(kind)
+        active = self.active_nodes(kind)
+        scores = np.zeros(self.size)
+        if not len(active):
+            return scores
+        sub = matrix[active][:, active]
+        n = len(active)
+        out = np.asarray(sub.sum(axis=1)).ravel()
+        dangling = out == 0
+        inv_out = np.divide(1.0, out, out=np.zeros_like(out), where=~dangling)
+        transition = sub.T.tocsr()
+        x = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            new = damping * (transition @ (x * inv_out)) + (damping * x[dangling].sum() + 1 - damping) / n
+            converged = np.abs(new - x).sum() < tol
+            x = new
+            if converged:
+                break
+        scores[active] = x / x.sum()
+        return scores
+
+    def betweenness(self, kind="co", samples=BETWEENNESS_SAMPLES, batch=BETWEENNESS_BATCH, normalized=True,
+                    seed=0):
+        """Approximate shortest-path betweenness (unweighted hops) from `samples`
+        random sources, scaled to the full source set."""
+        matrix = self.matrix(kind)
+        active = self.active_nodes(kind)
+        scores = np.zeros(self.size)
+        n = len(active)
+        if n < 3:
+            return scores
+        adjacency = matrix[active][:, active]
+        adjacency = (adjacency != 0).astype(np.float64).tocsr()
+        forward = adjacency.T.tocsr()   # forward @ f: for each v, sum of f over predecessors u -> v
+        rng = np.random.default_rng(seed)
+        sources = np.arange(n) if samples >= n else rng.choice(n, size=samples, replace=False)
+        total = np.zeros(n)
+        for start in range(0, len(sources), batch):
+            total += _dependencies(adjacency, forward, sources[start:start + batch])
+        total *= n / len(sources)
+        if kind == "co":
+            total /= 2.0   # each unordered pair was counted from both ends
+        if normalized:
+            total /= ((n - 1) * (n - 2)) / (2.0 if kind == "co" else 1.0)
+        scores[active] = total
+        return scores
+
+    def top(self, scores, k=TOP_N):
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(self.peer_id(i), float(scores[i])) for i in order if scores[i] > 0]
+
+    def summary(self):
+        hop, co = self.matrix("hop"), self.matrix("co")
+        return {"tunnels": self.tunnels, "nodes": len(self.active_nodes("co")),
+                "hop_edges": hop.nnz, "co_edges": co.nnz // 2}
+
+    def save(self, path):
+        """Both matrices plus the node IDs in one .npz."""
+        hop, co = self.matrix("hop"), self.matrix("co")
+        np.savez_compressed(path, ids=np.array([self.peer_id(i) or "" for i in range(self.size)], dtype=object),
+                            **{f"{kind}_{part}": getattr(m, part) for kind, m in (("hop", hop), ("co", co))
+                               for part in ("data", "indices", "indptr")})
+
+
+def _dependencies(adjacency, forward, sources):
+    """Brandes dependencies of every node for a batch of BFS sources at once.
+
+    Columns of the (n, batch) arrays are independent searches; each BFS level
+    is one sparse x dense product.
+    """
+    n, b = adjacency.shape[0], len(sources)
+    columns = np.arange(b)
+    dist = np.full((n, b), -1, dtype=np.int32)
+    sigma = np.zeros((n, b))
+    dist[sources, columns] = 0
+    sigma[sources, columns] = 1.0
+    frontier = sigma.copy()
+    depth = 0
+    while True:
+        reached = forward @ frontier
+        new = (reached > 0) & (dist < 0)
+        if not new.any():
+            break
+        depth += 1
+        reached[~new] = 0.0
+        dist[new] = depth
+        sigma += reached
+        frontier = reached
+    delta = np.zeros((n, b))
+    safe_sigma = np.where(sigma > 0, sigma, 1.0)
+    for level in range(depth - 1, -1, -1):
+        coefficient = np.where(dist == level + 1, (1.0 + delta) / safe_sigma, 0.0)
+        contribution = adjacency @ coefficient    # sum over successors w of v
+        on_level = dist == level
+        delta[on_level] += sigma[on_level] * contribution[on_level]
+    delta[sources, columns] = 0.0
+    return delta.sum(axis=1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Peer hop / co-membership graph and centrality from /tunnels pages.")
+    parser.add_argument("inputs", nargs="+", help="directories and/or tarballs of saved tunnels_data pages")
+    parser.add_argument("--top", type=int, default=TOP_N)
+    parser.add_argument("--samples", type=int, default=BETWEENNESS_SAMPLES, help="betweenness source samples")
+    parser.add_argument("--save", help="write the matrices and node IDs to this .npz")
+    return parser.parse_args()
+
+
+def main():
+    from i2p_reingest import _read, discover   # page discovery shared with the re-ingest tool
+
+    args = parse_args()
+    start = time.time()
+    graph = PeerGraph()
+    for timestamp, router, _, kind, location in discover(args.inputs):
+        if kind == "tunnels":
+            now = time.mktime(time.strptime(timestamp, "%Y-%m-%d %H:%M:%S"))
+            graph.add_page(_read(location), router, now=now)
+    print(f"[DONE] Graph built in {time.time() - start:.1f}s: {graph.summary()}")
+    for title, scores in (("Degree (co-membership)", graph.degree("co")),
+                          ("PageRank (hop)", graph.pagerank("hop")),
+                          ("Betweenness (co-membership, approx.)", graph.betweenness("co", args.samples))):
+        print(f"\n{title}:")
+        for peer_id, score in graph.top(scores, args.top):
+            print(f"  {peer_id[:8]}...  {score:.6g}")
+    if args.save:
+        graph.save(args.save)
+        print(f"\nSaved graph to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
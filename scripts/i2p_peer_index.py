@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Cross-Router Peer Index
+Answers "which peers were seen by at least K of our routers, or in at least
+K tunnel types, within the last W" across the whole swarm. This replaces
+assembling Figure 8 by hand from the per-port multi-tunnel files with
+repeated pandas merges.
+
+Sightings (peer ID, observing router, tunnel type, time) go into a hash
+index keyed by time bucket and peer ID:
+
+  bucket -> peer -> {router: tunnel-type bitmask}
+
+Only the buckets inside the window are kept. Per peer, the index also
+keeps how many window entries each router and each tunnel type
+contributes, plus level sets of peers by their number of distinct routers
+and distinct types. Adding a sighting or expiring a bucket therefore
+updates the answers in place; a query only reads the level sets at or
+above K.
+
+Tunnel types: client, exploratory, participating (including the "Peers in
+multiple participating tunnels" table) and high_capacity (profile pages).
+
+Usage:
+  python3 i2p_peer_index.py ../data [captures.tar.gz ...] [--window 1h] [--bucket 5min] [--min-routers 3] [--min-types 2]
+
+Requires: nothing beyond the standard library
+"""
+
+import argparse
+import csv
+import sys
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from i2p_window_metrics import _duration
+
+# === Configuration ===
+WINDOW = 60 * 60            # seconds of sightings a query covers
+BUCKET_SECONDS = 5 * 60     # expiry granularity
+MIN_ROUTERS = 2
+MIN_TYPES = 1
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TUNNEL_TYPES = ("client", "exploratory", "participating", "high_capacity")
+NON_PEERS = ("Local", "Unknown", "Error", "")
+HIGH_CAPACITY_GROUP = "High Capacity"
+
+# extractor / table name -> (tunnel type, peer ID columns)
+SOURCES = {
+    "client": ("client", ("Full ID",)),
+    "exploratory": ("exploratory", ("Full ID",)),
+    "participating": ("participating", ("From Full ID", "To Full ID")),
+    "multi_peers": ("participating", ("Full Peer ID",)),
+    "high_capacity": ("high_capacity", ("Full Node ID",)),
+    "profiles": ("high_capacity", ("Full Node ID",)),
+}
+INDEX_HEADERS = ["Full Peer ID", "Routers", "Tunnel Types", "Router List", "Type List"]
+
+_TYPE_BITS = {name: 1 << i for i, name in enumerate(TUNNEL_TYPES)}
+
+
+def type_names(mask):
+    return [name for name, bit in _TYPE_BITS.items() if mask & bit]
+
+
+class _Levels:
+    """peer -> distinct count, with the set of peers at each count."""
+
+    def __init__(self):
+        self.sets = {}
+
+    def move(self, peer, old, new):
+        if old:
+            level = self.sets[old]
+            level.discard(peer)
+            if not level:
+                del self.sets[old]
+        if new:
+            self.sets.setdefault(new, set()).add(peer)
+
+    def at_least(self, k):
+        return set().union(*(peers for level, peers in self.sets.items() if level >= k))
+
+
+class PeerIndex:
+    """Sliding-window index of peer sightings by router and tunnel type.
+
+    observe() returns the peers that newly reached `min_routers` distinct
+    routers and `min_types` distinct tunnel types within the window.
+    """
+
+    def __init__(self, window=WINDOW, bucket_seconds=BUCKET_SECONDS, min_routers=MIN_ROUTERS, min_types=MIN_TYPES):
+        self.bucket_seconds = max(1, min(bucket_seconds, window))
+        self.span = max(1, int(-(-window // self.bucket_seconds)))   # buckets in the window
+        self.min_routers = min_routers
+        self.min_types = min_types
+        self.buckets = OrderedDict()      # bucket number -> {peer: {router: type mask}}
+        self.router_counts = {}           # peer -> Counter(router -> window entries)
+        self.type_counts = {}             # peer -> Counter(type bit -> window entries)
+        self.by_routers = _Levels()
+        self.by_types = _Levels()
+        self.newest = None
+        self.stats = {"sightings": 0, "late": 0, "expired_buckets": 0}
+
+    def _qualifies(self, peer):
+        return (len(self.router_counts.get(peer, ())) >= self.min_routers
+                and len(self.type_counts.get(peer, ())) >= self.min_types)
+
+    def advance(self, now):
+        """Slide the window so it ends at `now`; expired buckets are subtracted."""
+        number = int(now // self.bucket_seconds)
+        if self.newest is None or number > self.newest:
+            self.newest = number
+        oldest_kept = self.newest - self.span + 1
+        while self.buckets and next(iter(self.buckets)) < oldest_kept:
+            _, bucket = self.buckets.popitem(last=False)
+            self.stats["expired_buckets"] += 1
+            for peer, routers in bucket.items():
+                for router, mask in routers.items():
+                    self._count(peer, router, mask, -1)
+
+    def _count(self, peer, router, bits, delta):
+        routers = self.router_counts.setdefault(peer, Counter())
+        types = self.type_counts.setdefault(peer, Counter())
+        old_routers, old_types = len(routers), len(types)
+        routers[router] += delta
+        if routers[router] <= 0:
+            del routers[router]
+        for bit in _TYPE_BITS.values():
+            if bits & bit:
+                types[bit] += delta
+                if types[bit] <= 0:
+                    del types[bit]
+        if len(routers) != old_routers:
+            self.by_routers.move(peer, old_routers, len(routers))
+        if len(types) != old_types:
+            self.by_types.move(peer, old_types, len(types))
+        if not routers and not types:
+            del self.router_counts[peer]
+            del self.type_counts[peer]
+
+    def observe(self, router, timestamp, peers, tunnel_type):
+        """Record that `router` saw `peers` in `tunnel_type` at `timestamp` (epoch seconds)."""
+        bit = _TYPE_BITS[tunnel_type]
+        self.advance(timestamp)
+        number = int(timestamp // self.bucket_seconds)
+        if number < self.newest - self.span + 1:
+            self.stats["late"] += 1
+            return []
+        bucket = self.buckets.get(number)
+        if bucket is None:
+            late = self.buckets and next(reversed(self.buckets)) > number
+            bucket = self.buckets[number] = {}
+            if late:   # keep buckets in time order, oldest first, for advance()
+                self.buckets = OrderedDict(sorted(self.buckets.items()))
+        crossed = []
+        for peer in peers:
+            if peer in NON_PEERS:
+                continue
+            self.stats["sightings"] += 1
+            routers = bucket.setdefault(peer, {})
+            mask = routers.get(router, 0)
+            if mask & bit:
+                continue
+            before = self._qualifies(peer)
+            routers[router] = mask | bit
+            if mask:
+                # router already counted for this bucket: only the new type
+                self._count_type(peer, bit)
+            else:
+                self._count(peer, router, bit, 1)
+            if not before and self._qualifies(peer):
+                crossed.append(peer)
+        return crossed
+
+    def _count_type(self, peer, bit):
+        types = self.type_counts[peer]
+        old = len(types)
+        types[bit] += 1
+        if len(types) != old:
+            self.by_types.move(peer, old, len(types))
+
+    def peers(self, min_routers=None, min_types=None):
+        """Peers with at least `min_routers` distinct routers and `min_types`
+        distinct tunnel types in the window (defaults: the index thresholds)."""
+        min_routers = self.min_routers if min_routers is None else min_routers
+        min_types = self.min_types if min_types is None else min_types
+        candidates = self.by_routers.at_least(min_routers) if min_routers > 1 else set(self.router_counts)
+        if min_types > 1:
+            candidates &= self.by_types.at_least(min_types)
+        return sorted(candidates, key=lambda p: (-len(self.router_counts[p]), -len(self.type_counts[p]), p))
+
+    def describe(self, peer):
+        routers = sorted(self.router_counts.get(peer, ()))
+        types = type_names(sum(self.type_counts.get(peer, ())))   # keys are distinct bits
+        return {"Full Peer ID": peer, "Routers": len(routers), "Tunnel Types": len(types),
+                "Router List": ";".join(str(r) for r in routers), "Type List": ";".join(types)}
+
+    def table(self, min_routers=None, min_types=None):
+        return [self.describe(peer) for peer in self.peers(min_routers, min_types)]
+
+    def ingest(self, router, timestamp, source, records):
+        """Feed extractor records (see SOURCES); returns newly qualifying peers."""
+        tunnel_type, columns = SOURCES[source]
+        if source == "profiles":
+            records = [r for r in records if HIGH_CAPACITY_GROUP in r.get("Groups", "")]
+        peers = list(dict.fromkeys(r[c] for r in records for c in columns))
+        return self.observe(router, timestamp, peers, tunnel_type)
+
+
+class PeerIndexTracker:
+    """SnapshotPipeline tracker feeding one extractor's records into a shared
+    PeerIndex. Every tracker of an index writes to the same
+    multi_router_peers stream: one row when a peer newly qualifies, stamped
+    with the router whose sighting completed it."""
+
+    name = "multi_router_peers"
+    headers = INDEX_HEADERS
+    column_types = {"Routers": "int", "Tunnel Types": "int"}
+
+    def __init__(self, index, source):
+        self.index = index
+        self.source = source
+
+    def update(self, router, timestamp, records):
+        ts = datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+        return [dict(self.index.describe(peer), Timestamp=timestamp, Router=router)
+                for peer in self.index.ingest(router, ts, self.source, records)]
+
+    def state_dict(self):
+        """State of the shared index (saved once per tracker; restoring is idempotent)."""
+        return dict(vars(self.index))
+
+    def load_state_dict(self, state):
+        vars(self.index).update(state)
+
+
+def index_trackers(index, sources):
+    """{extractor name: PeerIndexTracker} for the extractors the index understands."""
+    return {source: PeerIndexTracker(index, source) for source in sources if source in SOURCES}
+
+
+def _page_records(inputs):
+    """(router, epoch seconds, source, records) from saved pages, in time order."""
+    from i2p_reingest import discover, ingest_page   # page discovery shared with the re-ingest tool
+
+    for job in discover(inputs):
+        _, sections, _ = ingest_page(job)
+        timestamp, router = job[0], job[1]
+        ts = datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+        for source, records in sections.items():
+            if source in SOURCES:
+                yield router, ts, source, records
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Peers seen across several routers / tunnel types within a window.")
+    parser.add_argument("inputs", nargs="+", help="directories and/or tarballs of saved console pages")
+    parser.add_argument("--window", type=_duration, default=WINDOW)
+    parser.add_argument("--bucket", type=_duration, default=BUCKET_SECONDS)
+    parser.add_argument("--min-routers", type=int, default=MIN_ROUTERS)
+    parser.add_argument("--min-types", type=int, default=MIN_TYPES)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    index = PeerIndex(args.window, args.bucket, args.min_routers, args.min_types)
+    for router, ts, source, records in _page_records(args.inputs):
+        index.ingest(router, ts, source, records)
+    rows = index.table()
+    writer = csv.DictWriter(sys.stdout, fieldnames=INDEX_HEADERS)
+    writer.writeheader()
+    writer.writerows(rows)
+    print(f"[DONE] {len(rows)} of {len(index.router_counts)} peers seen by >= {args.min_routers} routers in "
+          f">= {args.min_types} tunnel types ({time.time() - start:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Peer Profile Time Series
+Numeric speed / capacity / integration history per peer. The profiles
+logger only writes a CSV row when a peer's version or status changes, and
+then as the console's text ("2,681.16", "--"), so the speed and capacity
+evolution behind Fig. 7 was mostly lost.
+
+Every observation of a peer by a router is parsed to numbers and kept in
+typed columns:
+
+  series   int32 ts (epoch seconds), peer, observer; float32 speed,
+           capacity, integration. A point is stored only when a value
+           moved by more than THRESHOLD (relative) since the last stored
+           point of that peer on that router, or MAX_GAP seconds passed;
+           in between the last point holds
+  rollups  per peer and minute / hour / day bucket: observation count,
+           float32 mean / min / max and count of values (not "--") of
+           each metric, over every observation
+           (not only the stored points). Buckets are accumulated in memory
+           until GRACE seconds after they end, so observers polling a bit
+           out of step land in the same row; later observations get a row of
+           their own that is merged into the bucket's row on save. Minute
+           and hour rows are kept for RETENTION, day rows forever
+
+Ingest merges its CSV files and pages by time, so per-router files
+covering the same period feed the rollups in order. Missing values ("--") are NaN. Everything is saved to one compressed .npz file, with
+rows sorted by peer and an offsets array per table, so loading is a few
+array reads and a peer's history is a slice.
+
+Usage:
+  python3 i2p_profile_series.py ingest profiles.npz ~/i2p_profiles_4_20_25/*.csv ../data
+  python3 i2p_profile_series.py show profiles.npz <ID or abbreviation> [--resolution hour]
+  python3 i2p_profile_series.py stats profiles.npz
+  python3 i2p_profile_series.py simulate --peers 3000 --routers 20 --days 1
+
+Requires: numpy
+"""
+
+import argparse
+import csv
+import glob
+import heapq
+import io
+import json
+import math
+import os
+import random
+import re
+import time
+from array import array
+
+import numpy as np
+
+from i2p_checkpoint import atomic_write
+from i2p_units import parse_number
+
+# === Configuration ===
+METRICS = ("speed", "capacity", "integration")
+THRESHOLD = 0.05                      # relative change that stores a new point
+MAX_GAP = 60 * 60                     # seconds after which a point is stored anyway
+ROLLUPS = {"minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+RETENTION = {"minute": 2 * 60 * 60, "hour": 7 * 24 * 60 * 60, "day": None}   # seconds, None = forever
+GRACE = 10 * 60                       # seconds a bucket stays open after it ends
+FETCH_INTERVAL = 300                  # profiles poll interval (simulation)
+
+SERIES_LAYOUT = (("ts", "i"), ("peer", "i"), ("observer", "i")) + tuple((m, "f") for m in METRICS)
+ROLLUP_LAYOUT = (("bucket", "i"), ("peer", "i"), ("count", "I")) + tuple(
+    (f"{m}_{agg}", "f") for m in METRICS for agg in ("mean", "min", "max")) + tuple(
+    (f"{m}_count", "I") for m in METRICS)   # observations with a value (not "--")
+_DTYPES = {"i": np.int32, "I": np.uint32, "f": np.float32}
+_PAGE_RE = re.compile(r"high_capacity_routers_(\d+)\.html$")
+
+
+class _Columns:
+    """Growable typed columns (stdlib arrays: 4 bytes a value) with numpy import/export."""
+
+    def __init__(self, layout, arrays=None):
+        self.layout = layout
+        self.data = {name: array(code) for name, code in layout}
+        if arrays is not None:
+            for name, code in layout:
+                self.data[name].frombytes(np.ascontiguousarray(arrays[name], dtype=_DTYPES[code]).tobytes())
+
+    def append(self, values):
+        for (name, _), value in zip(self.layout, values):
+            self.data[name].append(value)
+
+    def numpy(self):
+        return {name: np.frombuffer(self.data[name], dtype=_DTYPES[code]).copy() for name, code in self.layout}
+
+    def nbytes(self):
+        return sum(len(a) * a.itemsize for a in self.data.values())
+
+    def __len__(self):
+        return len(self.data[self.layout[0][0]])
+
+
+def _sort(arrays, *keys):
+    """Rows of `arrays` sorted by the given columns (first key most significant)."""
+    order = np.lexsort(tuple(arrays[k] for k in reversed(keys)))
+    return {name: column[order] for name, column in arrays.items()}
+
+
+def _offsets(peers, count):
+    return np.searchsorted(peers, np.arange(count + 1)).astype(np.int64)
+
+
+def _new_accumulator(bucket):
+    # bucket, count, then n / sum / min / max of each metric
+    return [bucket, 0] + [0, 0.0, math.inf, -math.inf] * len(METRICS)
+
+
+def _merge_rows(rows):
+    """Rollup rows sorted by peer and bucket, with rows of the same (peer, bucket) combined
+    (means weighted by each metric's count of values)."""
+    rows = _sort(rows, "peer", "bucket")
+    if len(rows["bucket"]) < 2:
+        return rows
+    starts = np.flatnonzero(np.r_[True, (rows["peer"][1:] != rows["peer"][:-1])
+                                  | (rows["bucket"][1:] != rows["bucket"][:-1])])
+    if len(starts) == len(rows["bucket"]):
+        return rows
+    merged = {"bucket": rows["bucket"][starts], "peer": rows["peer"][starts],
+              "count": np.add.reduceat(rows["count"], starts).astype(np.uint32)}
+    for m in METRICS:
+        mean = rows[f"{m}_mean"].astype(np.float64)
+        counts = rows[f"{m}_count"].astype(np.float64)
+        total = np.add.reduceat(np.where(counts > 0, mean * counts, 0.0), starts)
+        weight = np.add.reduceat(counts, starts)
+        with np.errstate(invalid="ignore"):
+            merged[f"{m}_mean"] = (total / weight).astype(np.float32)
+        merged[f"{m}_count"] = weight.astype(np.uint32)
+        merged[f"{m}_min"] = np.fmin.reduceat(rows[f"{m}_min"], starts)
+        merged[f"{m}_max"] = np.fmax.reduceat(rows[f"{m}_max"], starts)
+    return merged
+
+
+def _epoch(timestamp):
+    return time.mktime(time.strptime(timestamp, "%Y-%m-%d %H:%M:%S")) if isinstance(timestamp, str) else timestamp
+
+
+def _rollup_row(peer, acc):
+    row = [acc[0], peer, acc[1]]
+    for i in range(len(METRICS)):
+        n, total, low, high = acc[2 + 4 * i:6 + 4 * i]
+        row += [total / n, low, high] if n else [math.nan] * 3
+    return row + [int(acc[2 + 4 * i]) for i in range(len(METRICS))]
+
+
+class ProfileSeries:
+    """Change-compressed per-peer profile series with minute / hour / day rollups."""
+
+    def __init__(self, threshold=THRESHOLD, max_gap=MAX_GAP, rollups=None, retention=None, grace=GRACE):
+        self.threshold = threshold
+        self.max_gap = max_gap
+        self.grace = grace
+        self.resolutions = dict(ROLLUPS if rollups is None else rollups)
+        self.retention = dict(RETENTION if retention is None else retention)
+        self.peer_ids = []
+        self.peer_codes = {}
+        self.points = _Columns(SERIES_LAYOUT)
+        self.last = {}                                            # (peer, observer) -> (ts, values)
+        self.rollups = {name: _Columns(ROLLUP_LAYOUT) for name in self.resolutions}
+        self.open = {name: {} for name in self.resolutions}      # (peer, bucket) -> accumulator
+        self.newest = 0
+        self.next_close = 0                                       # ts of the next open-bucket sweep
+        self.sources = {}                                         # ingested file -> rows read / mtime
+        self._view = None
+        self.stats = {"observations": 0, "stored": 0, "late": 0}
+
+    # --- recording ---
+
+    def peer(self, peer_id):
+        code = self.peer_codes.get(peer_id)
+        if code is None:
+            code = self.peer_codes[peer_id] = len(self.peer_ids)
+            self.peer_ids.append(peer_id)
+        return code
+
+    def _changed(self, old, new):
+        for a, b in zip(old, new):
+            if math.isnan(a) or math.isnan(b):
+                if math.isnan(a) != math.isnan(b):
+                    return True
+            elif abs(b - a) > self.threshold * max(abs(a), 1e-6):
+                return True
+        return False
+
+    def observe(self, ts, peer_id, observer, speed, capacity, integration):
+        """One peer's values as seen by `observer` (router port or code) at epoch second `ts`.
+        Values may be None or NaN when the console shows "--"."""
+        ts = int(ts)
+        values = tuple(math.nan if v is None else float(v) for v in (speed, capacity, integration))
+        peer = self.peer(peer_id)
+        self.stats["observations"] += 1
+        self.newest = max(self.newest, ts)
+
+        key = (peer, observer)
+        last = self.last.get(key)
+        if last is None or ts - last[0] >= self.max_gap or self._changed(last[1], values):
+            # stored at float32 precision so the next comparison sees what a reader sees
+            stored = tuple(array("f", values))
+            self.points.append((ts, peer, observer) + stored)
+            self.last[key] = (ts, stored)
+            self.stats["stored"] += 1
+            self._view = None
+
+        for name, seconds in self.resolutions.items():
+            bucket = ts - ts % seconds
+            acc = self.open[name].get((peer, bucket))
+            if acc is None:
+                acc = _new_accumulator(bucket)
+                if bucket + seconds + self.grace <= self.newest:
+                    # past the grace window, the bucket is closed: a row of its own, merged on save
+                    self.stats["late"] += 1
+                    self._accumulate(acc, values)
+                    self.rollups[name].append(_rollup_row(peer, acc))
+                    continue
+                self.open[name][(peer, bucket)] = acc
+            self._accumulate(acc, values)
+        if self.newest >= self.next_close:
+            self._close_buckets()
+
+    def _close_buckets(self):
+        """Append the rows of buckets whose grace window has passed; runs once per smallest bucket."""
+        for name, seconds in self.resolutions.items():
+            opened = self.open[name]
+            for key in sorted(k for k, acc in opened.items() if acc[0] + seconds + self.grace <= self.newest):
+                self.rollups[name].append(_rollup_row(key[0], opened.pop(key)))
+        step = min(self.resolutions.values(), default=60)
+        self.next_close = self.newest - self.newest % step + step
+
+    @staticmethod
+    def _accumulate(acc, values):
+        acc[1] += 1
+        for i, value in enumerate(values):
+            if not math.isnan(value):
+                j = 2 + 4 * i
+                acc[j] += 1
+                acc[j + 1] += value
+                acc[j + 2] = min(acc[j + 2], value)
+                acc[j + 3] = max(acc[j + 3], value)
+
+    def observe_records(self, timestamp, observer, records):
+        """Profile records (ProfileExtractor / parse_profiles rows) of one poll."""
+        ts = _epoch(timestamp)
+        for record in records:
+            peer_id = record.get("Full Node ID")
+            if not peer_id or peer_id == "Unknown":
+                continue
+            self.observe(ts, peer_id, observer, parse_number(record.get("Speed")),
+                         parse_number(record.get("Capacity")), parse_number(record.get("Integration")))
+
+    # --- persistence ---
+
+    def _tables(self):
+        """Sorted series and retention-pruned, merged rollup tables (closed rows only)."""
+        series = _sort(self.points.numpy(), "peer", "ts")
+        rollups = {}
+        for name, seconds in self.resolutions.items():
+            rows = self.rollups[name].numpy()
+            keep = self.retention.get(name)
+            if keep is not None and len(rows["bucket"]):
+                cutoff = self.newest - keep
+                rows = {k: v[rows["bucket"] + seconds > cutoff] for k, v in rows.items()}
+            rollups[name] = _merge_rows(rows)
+        return series, rollups
+
+    def save(self, path):
+        """Atomically write everything (including open buckets) to one .npz file."""
+        series, rollups = self._tables()
+        count = len(self.peer_ids)
+        arrays = {"peer_ids": np.array([p.encode() for p in self.peer_ids], dtype=bytes),
+                  "series_offsets": _offsets(series["peer"], count)}
+        arrays.update({f"series_{k}": v for k, v in series.items()})
+        for name, rows in rollups.items():
+            arrays.update({f"{name}_{k}": v for k, v in rows.items()})
+            arrays[f"{name}_offsets"] = _offsets(rows["peer"], count)
+            arrays[f"{name}_open"] = np.array([[peer] + acc for (peer, _), acc in self.open[name].items()],
+                                              dtype=np.float64).reshape(-1, 3 + 4 * len(METRICS))
+        arrays["meta"] = np.array(json.dumps({
+            "resolutions": self.resolutions, "newest": self.newest, "sources": self.sources,
+            "stats": self.stats}))
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        atomic_write(path, buffer.getvalue())
+
+        # continue from the pruned, sorted tables so memory stays bounded by the retention
+        self.points = _Columns(SERIES_LAYOUT, series)
+        self.rollups = {name: _Columns(ROLLUP_LAYOUT, rows) for name, rows in rollups.items()}
+        self._view = None
+        return os.path.getsize(path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """A series saved by save(); collection can continue on it."""
+        self = cls(**kwargs)
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            self.peer_ids = [p.decode() for p in data["peer_ids"]]
+            self.peer_codes = {p: i for i, p in enumerate(self.peer_ids)}
+            self.points = _Columns(SERIES_LAYOUT, {k: data[f"series_{k}"] for k, _ in SERIES_LAYOUT})
+            for name in self.resolutions:
+                if f"{name}_bucket" not in data:
+                    continue
+                rows = {k: data[f"{name}_{k}"] for k, _ in ROLLUP_LAYOUT if f"{name}_{k}" in data}
+                for m in METRICS:
+                    # files from before the per-metric counts: every observation counted
+                    rows.setdefault(f"{m}_count", np.where(np.isnan(rows[f"{m}_mean"]), 0, rows["count"]))
+                self.rollups[name] = _Columns(ROLLUP_LAYOUT, rows)
+                self.open[name] = {(int(row[0]), int(row[1])): [int(row[1]), int(row[2])] + row[3:].tolist()
+                                   for row in data[f"{name}_open"]}
+            self.newest = meta["newest"]
+            self.sources = meta.get("sources", {})
+            self.stats.update(meta["stats"])
+
+        # last stored point of each (peer, observer), for change compression
+        s = _sort(self.points.numpy(), "peer", "observer", "ts")
+        if len(s["ts"]):
+            ends = np.flatnonzero(np.r_[(s["peer"][1:] != s["peer"][:-1]) | (s["observer"][1:] != s["observer"][:-1]),
+                                        True])
+            values = np.column_stack([s[m] for m in METRICS]).astype(np.float64)
+            for i in ends.tolist():
+                self.last[(int(s["peer"][i]), int(s["observer"][i]))] = (int(s["ts"][i]), tuple(values[i].tolist()))
+        return self
+
+    @classmethod
+    def open_or_create(cls, path, **kwargs):
+        return cls.load(path, **kwargs) if os.path.exists(path) else cls(**kwargs)
+
+    # --- queries ---
+
+    def _sorted(self):
+        if self._view is None:
+            series = _sort(self.points.numpy(), "peer", "ts")
+            self._view = series, _offsets(series["peer"], len(self.peer_ids))
+        return self._view
+
+    def resolve(self, peer):
+        """Peer code of a full ID or an unambiguous abbreviation (prefix)."""
+        if peer in self.peer_codes:
+            return self.peer_codes[peer]
+        prefix = peer.strip("[]").rstrip("~.")
+        matches = [code for code, peer_id in enumerate(self.peer_ids) if peer_id.startswith(prefix)]
+        if len(matches) != 1:
+            raise KeyError(f"{peer!r} matches {len(matches)} peers")
+        return matches[0]
+
+    def history(self, peer, observer=None):
+        """Stored points of one peer sorted by time: {column: array}."""
+        code = self.resolve(peer)
+        series, offsets = self._sorted()
+        rows = {k: v[offsets[code]:offsets[code + 1]] for k, v in series.items() if k != "peer"}
+        if observer is not None:
+            rows = {k: v[rows["observer"] == observer] for k, v in rows.items()}
+        return rows
+
+    def rollup(self, peer, resolution="hour"):
+        """Closed and open buckets of one peer: {column: array} sorted by bucket start."""
+        code = self.resolve(peer)
+        rows = self.rollups[resolution].numpy()
+        mask = rows["peer"] == code
+        rows = {k: v[mask] for k, v in rows.items()}
+        current = [_rollup_row(code, acc) for (peer, _), acc in self.open[resolution].items() if peer == code]
+        if current:
+            rows = {k: np.concatenate([rows[k], np.array([row[i] for row in current], dtype=_DTYPES[c])])
+                    for i, (k, c) in enumerate(ROLLUP_LAYOUT)}
+        return _merge_rows(rows)
+
+    def values_at(self, ts):
+        """Each (peer, observer)'s values in effect at `ts` (last point within MAX_GAP)."""
+        s = self.points.numpy()
+        mask = (s["ts"] <= ts) & (s["ts"] > ts - self.max_gap)
+        s = _sort({k: v[mask] for k, v in s.items()}, "peer", "observer", "ts")
+        if not len(s["ts"]):
+            return s
+        ends = np.r_[(s["peer"][1:] != s["peer"][:-1]) | (s["observer"][1:] != s["observer"][:-1]), True]
+        return {k: v[ends] for k, v in s.items()}
+
+    def footprint(self):
+        """Bytes held by the columns (the python dict state is not counted)."""
+        return {"series": self.points.nbytes(),
+                **{name: cols.nbytes() for name, cols in self.rollups.items()}}
+
+
+# === Ingest ===
+
+def csv_observations(series, path, observer=None):
+    """(ts, observer, record) of the rows of a profile CSV from the profiles logger (no Router
+    column: `observer`) or the snapshot / reingest tools. Rows read by an earlier ingest of the same
+    file are skipped."""
+    key = os.path.abspath(path)
+    done = series.sources.get(key, 0)
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if not {"Full Node ID", "Speed", "Capacity", "Timestamp"} <= set(reader.fieldnames or ()):
+            return
+        for i, record in enumerate(reader):
+            if i < done:
+                continue
+            series.sources[key] = i + 1
+            router = record.get("Router")
+            yield _epoch(record["Timestamp"]), int(router) if router and router.isdigit() else observer, record
+
+
+def page_observations(series, path):
+    """(ts, observer, record) of a saved high_capacity_routers_<port>.html page, timestamped by its
+    modification time (nothing if that version of the page was ingested already)."""
+    from i2p_tunnel_parser import parse_profiles
+
+    key, mtime = os.path.abspath(path), int(os.path.getmtime(path))
+    if series.sources.get(key) == mtime:
+        return
+    with open(path, encoding="utf-8", errors="replace") as f:
+        records = parse_profiles(f.read())
+    series.sources[key] = mtime
+    observer = int(_PAGE_RE.search(path).group(1))
+    for record in records:
+        yield mtime, observer, record
+
+
+def ingest(series, paths, observer=None):
+    """CSV files and saved profile pages, merged by time; directories are searched for both."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "**", "*.csv"), recursive=True))
+            files += sorted(glob.glob(os.path.join(path, "**", "high_capacity_routers_*.html"), recursive=True))
+        else:
+            files.append(path)
+    streams = [page_observations(series, path) if _PAGE_RE.search(path) else csv_observations(series, path, observer)
+               for path in files]
+    rows = 0
+    # each file is in time order; merging them keeps per-router files from arriving one after the other
+    for ts, where, record in heapq.merge(*streams, key=lambda observation: observation[0]):
+        series.observe_records(ts, where, [record])
+        rows += 1
+    return rows
+
+
+# === Simulation ===
+
+def simulate(peers=3000, routers=20, days=1, per_router=150, seed=1, **kwargs):
+    """Random-walk profiles of `peers` peers; each router lists `per_router` of them every FETCH_INTERVAL."""
+    rng = random.Random(seed)
+    series = ProfileSeries(**kwargs)
+    ids = ["%044x" % rng.getrandbits(176) for _ in range(peers)]
+    state = {p: [rng.lognormvariate(5, 1.5), rng.lognormvariate(3, 1), rng.choice([math.nan, rng.random() * 50])]
+             for p in ids}
+    views = {7600 + r: rng.sample(ids, min(per_router, peers)) for r in range(routers)}
+    start = int(time.mktime((2025, 4, 20, 0, 0, 0, 0, 0, -1)))
+    for ts in range(start, start + days * 86400, FETCH_INTERVAL):
+        for values in state.values():
+            if rng.random() < 0.05:   # profiles are recomputed now and then, not every poll
+                values[0] *= rng.lognormvariate(0, 0.2)
+                values[1] *= rng.lognormvariate(0, 0.2)
+        for observer, seen in views.items():
+            for peer_id in seen:
+                series.observe(ts, peer_id, observer, *state[peer_id])
+    return series
+
+
+# === CLI ===
+
+def _fmt_ts(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(ts)))
+
+
+def print_stats(series, path=None):
+    stats = series.stats
+    print(f"{len(series.peer_ids)} peers, {stats['observations']} observations, "
+          f"{stats['stored']} stored points ({stats['stored'] / max(stats['observations'], 1):.1%})")
+    for name, size in series.footprint().items():
+        rows = len(series.points) if name == "series" else len(series.rollups[name])
+        print(f"  {name:<8} {rows:>10} rows {size / 1e6:>8.2f} MB")
+    if path and os.path.exists(path):
+        started = time.perf_counter()
+        ProfileSeries.load(path)
+        print(f"  file     {os.path.getsize(path) / 1e6:.2f} MB, loads in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+def show(series, peer, resolution=None, observer=None):
+    if resolution:
+        rows = series.rollup(peer, resolution)
+        print(f"{'Bucket':<19} {'Count':>5} " + " ".join(f"{m.title() + ' mean/min/max':>28}" for m in METRICS))
+        for i in range(len(rows["bucket"])):
+            print(f"{_fmt_ts(rows['bucket'][i]):<19} {rows['count'][i]:>5} " + " ".join(
+                f"{rows[m + '_mean'][i]:>10.2f}{rows[m + '_min'][i]:>9.2f}{rows[m + '_max'][i]:>9.2f}"
+                for m in METRICS))
+        return
+    rows = series.history(peer, observer)
+    print(f"{'Timestamp':<19} {'Router':>6} " + " ".join(f"{m.title():>12}" for m in METRICS))
+    for i in range(len(rows["ts"])):
+        print(f"{_fmt_ts(rows['ts'][i]):<19} {rows['observer'][i]:>6} "
+              + " ".join(f"{rows[m][i]:>12.2f}" for m in METRICS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact per-peer profile speed/capacity/integration series.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative change that stores a new point")
+    parser.add_argument("--max-gap", type=int, default=MAX_GAP,
+                        help="seconds after which a point is stored even without change")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="add profile CSVs and saved /profiles pages to a series file")
+    p.add_argument("series")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--observer", type=int, default=7657,
+                   help="router port for CSVs without a Router column (the profiles logger's)")
+
+    p = sub.add_parser("show", help="one peer's stored points or rollups")
+    p.add_argument("series")
+    p.add_argument("peer", help="full ID or abbreviation")
+    p.add_argument("--resolution", choices=list(ROLLUPS))
+    p.add_argument("--observer", type=int)
+
+    p = sub.add_parser("stats", help="sizes of a series file")
+    p.add_argument("series")
+
+    p = sub.add_parser("simulate", help="footprint and load time for a synthetic swarm")
+    p.add_argument("--peers", type=int, default=3000)
+    p.add_argument("--routers", type=int, default=20)
+    p.add_argument("--days", type=int, default=1)
+    p.add_argument("--per-router", type=int, default=150, help="peers on each router's /profiles?f=1 page")
+    p.add_argument("--save", default="profile_series_sim.npz")
+
+    args = parser.parse_args()
+    options = {"threshold": args.threshold, "max_gap": args.max_gap}
+
+    if args.command == "ingest":
+        series = ProfileSeries.open_or_create(args.series, **options)
+        print(f"[START] Ingesting {len(args.paths)} paths into {args.series}")
+        started = time.perf_counter()
+        rows = ingest(series, args.paths, args.observer)
+        series.save(args.series)
+        print(f"[DONE] {rows} profile rows in {time.perf_counter() - started:.1f}s")
+        print_stats(series, args.series)
+    elif args.command == "show":
+        show(ProfileSeries.load(args.series, **options), args.peer, args.resolution, args.observer)
+    elif args.command == "stats":
+        print_stats(ProfileSeries.load(args.series, **options), args.series)
+    else:
+        print(f"[START] Simulating {args.peers} peers on {args.routers} routers for {args.days} days")
+        started = time.perf_counter()
+        series = simulate(args.peers, args.routers, args.days, args.per_router, **options)
+        elapsed = time.perf_counter() - started
+        series.save(args.save)
+        print(f"[DONE] {series.stats['observations'] / elapsed:,.0f} observations/s")
+        print_stats(series, args.save)
+
+
+if __name__ == "__main__":
+    main()
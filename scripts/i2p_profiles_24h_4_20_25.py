@@ -3,6 +3,8 @@
 """
 I2P 24-Hour Peer Profiles Logger
 Captures node metadata from: http://127.0.0.1:7657/profiles?f=1
+Speed / Capacity / Integration of every peer on every poll also go, as
+numbers, to a compact time series (i2p_profile_series.py), saved each cycle.
 """
 
 import requests
@@ -13,14 +15,20 @@ import time
 import re
 from datetime import datetime
 
+from i2p_dedup import ChangeDetector
+from i2p_profile_series import ProfileSeries
+from i2p_units import parse_number
+
 URL = "http://127.0.0.1:7657/profiles?f=1"
 NETDB = "http://127.0.0.1:7657/netdb?r="
 FETCH_INTERVAL = 300  # 5 minutes
 RUN_DURATION = 24 * 60 * 60  # 24 hours
+OBSERVER = 7657  # console port, names this router in the series
 
 OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "i2p_profiles_4_20_25")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "i2p_peer_profiles_24h_4_20_25.csv")
+SERIES_FILE = os.path.join(OUTPUT_DIR, "i2p_peer_profiles_series.npz")
 
 HEADERS = [
     "Timestamp", "Country", "Node Abbrev", "Full Node ID",
@@ -32,7 +40,8 @@ if not os.path.isfile(OUTPUT_FILE):
         csv.writer(f).writerow(HEADERS)
 
 cache = {}
-seen = set()
+seen = ChangeDetector()
+series = ProfileSeries.open_or_create(SERIES_FILE)
 
 def get_node_ip(node_id):
     if node_id in cache:
@@ -94,9 +103,11 @@ while time.time() - start < RUN_DURATION:
         integration = cells[6].text.strip()
         status = cells[7].text.strip()
 
+        series.observe(time.time(), full_id, OBSERVER,
+                       parse_number(speed), parse_number(capacity), parse_number(integration))
+
         row_key = f"{full_id}-{version}-{status}"
-        if row_key not in seen:
-            seen.add(row_key)
+        if not seen.seen(row_key):
             with open(OUTPUT_FILE, "a", newline="") as f:
                 writer = csv.writer(f)
                 writer.writerow([
@@ -104,6 +115,7 @@ while time.time() - start < RUN_DURATION:
                     version, speed, capacity, integration, status, ip
                 ])
 
+    series.save(SERIES_FILE)
     print(f"[{now}] Logged snapshot of peer profiles.")
     time.sleep(FETCH_INTERVAL)
 
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Archived Page Re-Ingest
+Regenerates the derived tunnel and high-capacity tables from saved console
+pages (tunnels_data_<port>.html, high_capacity_routers_<port>.html), so
+archived captures can be reprocessed whenever the extraction logic changes.
+
+Pages are read from directories (searched recursively) or tarballs and
+parsed in a process pool with the live collectors' extractors. Output is
+written in a stable order (page timestamp, router, source path), so the
+same archive always yields the same tables:
+
+  client_tunnels.csv, exploratory_tunnels.csv, participating_tunnels.csv,
+  multi_peers.csv, high_capacity.csv      one row per extracted record
+  client_tunnels_<router>.txt,
+  exploratory_tunnels_<router>.txt        peer IDs of the router's latest page
+  high_capacity_peers.txt,
+  high_capacity_frequency.txt             latest high-capacity set per router
+                                          and its `uniq -c` counts
+  (tunnels_data.html, without a port, gives client_tunnels.txt and
+  exploratory_tunnels.txt)
+
+The .txt peer lists are derived as the shell collectors' greps derived them
+(i2p_tunnel_parser.parse_pool_peer_ids): line windows, not tables, so a
+client list also takes in the participating tables below it. On the shipped
+data/ this reproduces 36 of the 42 tunnel lists byte for byte. The other six,
+and high_capacity_peers.txt, were written from other polls than the saved
+pages (tunnels_data_32984.html has no client section, its list has 9 IDs;
+72 of the 280 high-capacity IDs are on no saved page) and cannot be
+regenerated from them.
+
+Page timestamps come from the file (or tar member) modification time.
+The tables are built in a temporary directory next to the output and
+swapped in when complete, so a re-run replaces the previous tables instead
+of appending to them; an existing non-empty output directory is only
+replaced with --overwrite.
+
+Usage:
+  python3 i2p_reingest.py ../data out/ [--workers 8] [--netdb-dir ~/.i2p/netDb]
+  python3 i2p_reingest.py captures-2025-04.tar.gz out/ --format parquet --overwrite
+
+Requires: beautifulsoup4 and html5lib (only with --bs4); pyarrow for --format parquet
+"""
+
+import argparse
+import fnmatch
+import os
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from i2p_netdb_index import NetDbIndex
+from i2p_output_sinks import make_sink
+from i2p_router_ids import RouterIdRegistry
+from i2p_tunnel_parser import parse_pool_peer_ids
+from i2p_tunnel_snapshot import (
+    ClientTunnelExtractor, ExploratoryTunnelExtractor, MultiTunnelPeerExtractor,
+    ParticipatingTunnelExtractor, ProfileExtractor, add_id_codes, extract_sections, output_columns,
+)
+
+# === Configuration ===
+PAGE_KINDS = {
+    "tunnels": ("tunnels_data*.html",),
+    "profiles": ("high_capacity_routers*.html", "profiles*.html"),
+}
+HIGH_CAPACITY_GROUP = "High Capacity"
+JOBS_PER_WORKER = 16   # pages in flight per worker, bounds memory on large tarballs
+
+
+EXTRACTORS = {
+    "tunnels": [ClientTunnelExtractor(), ExploratoryTunnelExtractor(),
+                ParticipatingTunnelExtractor(), MultiTunnelPeerExtractor()],
+    "profiles": [ProfileExtractor()],
+}
+# output table -> (file name, extractor whose columns it has)
+TABLES = {
+    "client": ("client_tunnels", EXTRACTORS["tunnels"][0]),
+    "exploratory": ("exploratory_tunnels", EXTRACTORS["tunnels"][1]),
+    "participating": ("participating_tunnels", EXTRACTORS["tunnels"][2]),
+    "multi_peers": ("multi_peers", EXTRACTORS["tunnels"][3]),
+    "high_capacity": ("high_capacity", EXTRACTORS["profiles"][0]),
+}
+_open_tarballs = {}   # per worker process
+
+
+def page_kind(filename):
+    for kind, patterns in PAGE_KINDS.items():
+        if any(fnmatch.fnmatch(filename, pattern) for pattern in patterns):
+            return kind
+    return None
+
+
+def router_name(filename):
+    """Host console port from tunnels_data_<port>.html; "" for a page without one
+    (tunnels_data.html, whose lists are the unsuffixed client_tunnels.txt, ...)."""
+    match = re.search(r"_(\d+)\.html?$", filename)
+    return match.group(1) if match else ""
+
+
+def _timestamp(mtime):
+    return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def discover(inputs):
+    """Page jobs (timestamp, router, source, kind, location) sorted for stable output.
+
+    location is a file path, or (tarball path, member name) for archived pages.
+    """
+    jobs = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for filename in files:
+                    kind = page_kind(filename)
+                    if kind:
+                        full = os.path.join(root, filename)
+                        jobs.append((_timestamp(os.path.getmtime(full)), router_name(filename),
+                                     os.path.relpath(full, path), kind, full))
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path) as tar:
+                for member in tar:
+                    filename = os.path.basename(member.name)
+                    kind = page_kind(filename) if member.isfile() else None
+                    if kind:
+                        jobs.append((_timestamp(member.mtime), router_name(filename),
+                                     member.name, kind, (path, member.name)))
+        else:
+            raise ValueError(f"{path} is neither a directory nor a tarball")
+    return sorted(jobs, key=lambda job: job[:3])
+
+
+def _read(location):
+    if isinstance(location, str):
+        with open(location, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    tar_path, member = location
+    tar = _open_tarballs.get(tar_path)
+    if tar is None:
+        tar = _open_tarballs[tar_path] = tarfile.open(tar_path)
+    return tar.extractfile(member).read().decode("utf-8", errors="replace")
+
+
+def ingest_page(job, use_bs4=False):
+    """Worker: parse one page. Returns (job, {table: records}, {pool: peer IDs})."""
+    timestamp, router, source, kind, location = job
+    html = _read(location)
+    sections = extract_sections(html, EXTRACTORS[kind], use_bs4)
+    peer_ids = {}
+    if kind == "tunnels":
+        peer_ids = {pool: parse_pool_peer_ids(html, pool) for pool in ("client", "exploratory")}
+    else:
+        sections = {"high_capacity": [r for r in sections["profiles"] if HIGH_CAPACITY_GROUP in r["Groups"]]}
+        peer_ids = {"high_capacity": parse_pool_peer_ids(html, "high_capacity")}
+    return job, sections, peer_ids
+
+
+def _ordered_map(executor, fn, jobs, window, **kwargs):
+    """executor.map that keeps at most `window` jobs in flight, results in job order."""
+    pending = deque()
+    for job in jobs:
+        pending.append(executor.submit(fn, job, **kwargs))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def reingest(inputs, output_dir, workers=None, use_bs4=False, sink_format="csv", netdb_index=None,
+             registry=None, overwrite=False):
+    """Re-extract every page under `inputs` into `output_dir`; returns per-table row counts.
+
+    The tables are written to a temporary sibling directory that replaces
+    `output_dir` once complete. A non-empty `output_dir` is refused unless
+    `overwrite` is set.
+    """
+    output_dir = os.path.abspath(output_dir)
+    for path in inputs:
+        path = os.path.abspath(path)
+        if path == output_dir or path.startswith(output_dir + os.sep):
+            raise ValueError(f"input {path} is inside the output directory {output_dir}")
+    if os.path.isdir(output_dir) and os.listdir(output_dir) and not overwrite:
+        raise ValueError(f"output directory {output_dir} is not empty (pass --overwrite to replace it)")
+    jobs = discover(inputs)
+    parent, name = os.path.split(output_dir)
+    os.makedirs(parent, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{name}.", dir=parent)
+    try:
+        counts = _reingest(jobs, build_dir, workers, use_bs4, sink_format, netdb_index, registry)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    if os.path.exists(output_dir):
+        old_dir = tempfile.mkdtemp(prefix=f".{name}.old.", dir=parent)
+        os.replace(output_dir, os.path.join(old_dir, name))
+        os.replace(build_dir, output_dir)
+        shutil.rmtree(old_dir)
+    else:
+        os.replace(build_dir, output_dir)
+    return counts
+
+
+def _reingest(jobs, output_dir, workers, use_bs4, sink_format, netdb_index, registry):
+    sinks = {}
+    for name, (filename, extractor) in TABLES.items():
+        headers, column_types = output_columns(extractor, registry)
+        sinks[name] = make_sink(sink_format, output_dir, filename, ["Timestamp", "Router", "Source"] + headers,
+                                column_types, rotate=None)
+    latest_ids = {}   # (pool, router) -> IDs of the router's most recent page
+    counts = Counter()
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for job, sections, peer_ids in _ordered_map(executor, ingest_page, jobs, workers * JOBS_PER_WORKER,
+                                                     use_bs4=use_bs4):
+            timestamp, router, source, kind, _ = job
+            for name, records in sections.items():
+                for record in records:
+                    record.update({"Timestamp": timestamp, "Router": router, "Source": source})
+                    if netdb_index is not None:
+                        for id_col, ip_col in TABLES[name][1].ip_columns.items():
+                            record[ip_col] = netdb_index.ip(record[id_col]) or record[ip_col]
+                if registry is not None:
+                    add_id_codes(registry, TABLES[name][1], records)
+                sinks[name].write(records)
+                counts[name] += len(records)
+            for pool, ids in peer_ids.items():
+                latest_ids[(pool, router)] = ids
+            counts["pages"] += 1
+    for sink in sinks.values():
+        sink.close()
+
+    high_capacity = []
+    for (pool, router), ids in sorted(latest_ids.items()):
+        if pool == "high_capacity":
+            high_capacity.extend(ids)
+            continue
+        name = f"{pool}_tunnels_{router}.txt" if router else f"{pool}_tunnels.txt"
+        with open(os.path.join(output_dir, name), "w", encoding="utf-8") as f:
+            f.writelines(peer_id + "\n" for peer_id in ids)
+    if high_capacity:
+        with open(os.path.join(output_dir, "high_capacity_peers.txt"), "w", encoding="utf-8") as f:
+            f.writelines(peer_id + "\n" for peer_id in high_capacity)
+        with open(os.path.join(output_dir, "high_capacity_frequency.txt"), "w", encoding="utf-8") as f:
+            for peer_id, count in sorted(Counter(high_capacity).items(), key=lambda kv: (-kv[1], kv[0])):
+                f.write(f"{count:7d} {peer_id}\n")
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the derived tables from archived console pages.")
+    parser.add_argument("inputs", nargs="+", help="directories and/or tarballs of saved pages, then the output dir")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--netdb-dir", action="append", default=[],
+                        help="local netDb directory to fill IP columns from (repeatable)")
+    parser.add_argument("--id-registry", help="router ID registry (SQLite) for int32 peer ID code columns")
+    parser.add_argument("--bs4", action="store_true", help="parse with BeautifulSoup/html5lib instead of the fast parser")
+    parser.add_argument("--overwrite", action="store_true", help="replace a non-empty output directory")
+    args = parser.parse_args()
+    if len(args.inputs) < 2:
+        parser.error("need at least one input and an output directory")
+    return args
+
+
+def main():
+    args = parse_args()
+    *inputs, output_dir = args.inputs
+    netdb_index = None
+    if args.netdb_dir:
+        netdb_index = NetDbIndex(args.netdb_dir)
+        netdb_index.refresh()
+    start = time.time()
+    registry = RouterIdRegistry(args.id_registry) if args.id_registry else None
+    try:
+        counts = reingest(inputs, output_dir, args.workers, args.bs4, args.format, netdb_index, registry,
+                          overwrite=args.overwrite)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    tables = ", ".join(f"{name}={counts[name]}" for name in TABLES)
+    print(f"[DONE] Re-ingested {counts['pages']} pages in {time.time() - start:.1f}s: {tables}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Router ID Registry
+Maps 44-character router IDs (and the 4-character abbreviations shown on
+the console) to stable compact integers shared by the collectors and the
+analysis loaders, so joins, counts and set operations run on int32 arrays
+instead of repeated Python strings.
+
+  - codes are assigned once and persisted in SQLite (WAL mode); every
+    process that opens the same registry file sees the same codes
+  - codes 0-2 are reserved for the placeholder IDs "Unknown", "Local" and
+    "Error" the collectors emit
+  - encode()/decode() convert whole columns to/from numpy int32 arrays;
+    extract_ids() pulls IDs out of free-form lines like the notebooks'
+    RID_RE loops
+
+Usage:
+  python3 i2p_router_ids.py                          # registry stats
+  python3 i2p_router_ids.py ../data/client_tunnels.txt ...   # intern IDs found in files
+
+Requires: nothing beyond the standard library (numpy for encode/decode)
+"""
+
+import os
+import re
+import sqlite3
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# === Configuration ===
+REGISTRY_DB = os.path.join(os.path.expanduser("~"), "i2p_router_ids.sqlite")
+PREFIX_LEN = 4
+RESERVED_IDS = ("Unknown", "Local", "Error")   # codes 0, 1, 2
+UNKNOWN_CODE = 0
+
+# Same pattern the notebooks use to find router IDs in text dumps
+RID_RE = re.compile(r"([A-Za-z0-9\-\~\+\/]{43}=|[A-Za-z0-9\-\~\+\/]{44})")
+
+
+def extract_ids(line):
+    return RID_RE.findall(line)
+
+
+class RouterIdRegistry:
+    """Persistent router ID <-> int32 code mapping."""
+
+    def __init__(self, db_path=REGISTRY_DB):
+        self.db_path = db_path
+        self.codes = {}        # router ID -> code
+        self.router_ids = []   # code -> router ID
+        self.by_prefix = {}    # abbreviation -> codes
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS router_ids (code INTEGER PRIMARY KEY, router_id TEXT UNIQUE NOT NULL)")
+        self.db.executemany("INSERT OR IGNORE INTO router_ids (code, router_id) VALUES (?, ?)",
+                            enumerate(RESERVED_IDS))
+        self.db.commit()
+        self._load()
+
+    def _load(self, after=-1):
+        """Pick up codes assigned since `after` (by this or another process)."""
+        for code, router_id in self.db.execute(
+                "SELECT code, router_id FROM router_ids WHERE code > ? ORDER BY code", (after,)):
+            self._add(code, router_id)
+
+    def _add(self, code, router_id):
+        if code >= len(self.router_ids):
+            self.router_ids.extend([None] * (code + 1 - len(self.router_ids)))
+        self.router_ids[code] = router_id
+        self.codes[router_id] = code
+        if router_id not in RESERVED_IDS:
+            self.by_prefix.setdefault(router_id[:PREFIX_LEN], set()).add(code)
+
+    def intern_many(self, router_ids):
+        """Codes for every ID, assigning new ones in a single transaction."""
+        missing = [r for r in dict.fromkeys(router_ids) if r not in self.codes]
+        if missing:
+            self.db.executemany("INSERT OR IGNORE INTO router_ids (router_id) VALUES (?)",
+                                [(r,) for r in missing])
+            self.db.commit()
+            self._load(len(self.router_ids) - 1)
+        return [self.codes[r] for r in router_ids]
+
+    def intern(self, router_id):
+        code = self.codes.get(router_id)
+        return code if code is not None else self.intern_many([router_id])[0]
+
+    def code(self, router_id):
+        """Code of a full or abbreviated ID without assigning one; None if unknown or ambiguous."""
+        code = self.codes.get(router_id)
+        if code is not None:
+            return code
+        candidates = [c for c in self.by_prefix.get(router_id[:PREFIX_LEN], ())
+                      if self.router_ids[c].startswith(router_id)]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def router_id(self, code):
+        return self.router_ids[code]
+
+    def encode(self, router_ids, assign=True):
+        """int32 codes for a sequence of IDs; unassigned IDs become UNKNOWN_CODE when assign=False."""
+        if np is None:
+            raise RuntimeError("RouterIdRegistry.encode requires numpy (pip install numpy)")
+        router_ids = list(router_ids)
+        if assign:
+            return np.fromiter(self.intern_many(router_ids), dtype=np.int32, count=len(router_ids))
+        codes = (self.code(r) for r in router_ids)
+        return np.fromiter((UNKNOWN_CODE if c is None else c for c in codes), dtype=np.int32,
+                           count=len(router_ids))
+
+    def decode(self, codes):
+        if np is None:
+            raise RuntimeError("RouterIdRegistry.decode requires numpy (pip install numpy)")
+        return np.asarray(self.router_ids, dtype=object)[np.asarray(codes)]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def close(self):
+        self.db.close()
+
+
+if __name__ == "__main__":
+    registry = RouterIdRegistry()
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            ids = [rid for line in f for rid in extract_ids(line)]
+        registry.intern_many(ids)
+        print(f"{path}: {len(ids)} IDs, {len(set(ids))} distinct")
+    print(f"{len(registry) - len(RESERVED_IDS)} router IDs registered in {registry.db_path}")
+    registry.close()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Adaptive Poll Scheduler
+Per-router fixed-rate polling for the swarm, replacing "do the work, then
+time.sleep(FETCH_INTERVAL)" whose real period drifts with fetch and parse
+time and which makes replicas started together poll in lockstep.
+
+  - ticks are anchored to the schedule, not to the end of the previous
+    poll; a tick that is already past is skipped and counted as missed
+  - each router gets a deterministic phase offset inside the interval
+    (hash of its name), so the swarm's requests are spread evenly
+  - a router whose console times out or errors (what the console's own
+    "Router is down" AJAX message reflects) backs off exponentially, slow
+    responses more gently, until it recovers
+  - the period shrinks towards `min_interval` while a router's tunnel set
+    churns and relaxes towards `max_interval` while it is stable
+  - rates() reports each router's target and achieved sampling interval
+
+Usage:
+  python3 i2p_scheduler.py --ports 32797 32808 --interval 60 --min-interval 10
+
+Requires: aiohttp (through SwarmPoller)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import time
+from collections import deque
+from datetime import datetime
+
+from i2p_swarm_poller import (
+    CONSOLE_HOST, CONSOLE_PORTS, FETCH_INTERVAL, MAX_CONCURRENCY, RUN_DURATION, TARGET_DEADLINE,
+    SwarmPoller,
+)
+from i2p_targets import add_target_arguments, initial_targets
+from i2p_tunnel_parser import parse_participating_tunnels
+
+# === Configuration ===
+MIN_INTERVAL = 10            # fastest per-router period while tunnels churn
+MAX_INTERVAL = 300           # slowest period while a router is stable
+MAX_BACKOFF = 16             # period multiplier cap for failing routers
+SLOW_FRACTION = 0.5          # a poll slower than this share of the deadline counts as slow
+CHURN_FAST = 0.3             # share of tunnels replaced since last poll that speeds polling up
+CHURN_SLOW = 0.05            # share below which polling slows down
+RATE_WINDOW = 600            # seconds of history behind the achieved rate
+REPORT_INTERVAL = 300        # seconds between rate summaries
+
+
+def phase_offset(name, interval):
+    """Deterministic offset in [0, interval) for a router name."""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") / 2 ** 32 * interval
+
+
+def tunnel_keys(html):
+    """(Receive on, Send on) of every participating tunnel on a /tunnels page."""
+    return frozenset((r["Receive on"], r["Send on"]) for r in parse_participating_tunnels(html))
+
+
+def tunnel_churn(before, after):
+    """Share of participating tunnels that appeared or disappeared between two key sets."""
+    if before is None:
+        return None
+    union = before | after
+    return len(before ^ after) / len(union) if union else 0.0
+
+
+class RouterSchedule:
+    """Tick state and sampling statistics of one router."""
+
+    def __init__(self, target, interval, offset):
+        self.target = target
+        self.period = interval
+        self.backoff = 1.0
+        self.offset = offset
+        self.next_due = None
+        self.last_keys = None    # tunnel key set of the previous successful poll
+        self.samples = deque()   # (monotonic time, scheduled period) of successful polls
+        self.stats = {"ok": 0, "failed": 0, "slow": 0, "missed": 0}
+
+    @property
+    def effective_period(self):
+        return self.period * self.backoff
+
+
+class AdaptiveScheduler:
+    """Runs one fixed-rate, jittered, adaptive polling loop per router.
+
+    handler(results) receives a one-element list per poll, so cycle handlers
+    such as SnapshotPipeline.process work unchanged. `keys(html)` reduces a
+    page to its tunnel key set, which is all that is kept between polls;
+    `churn(previous_keys, keys)` returns the share of the tunnel set that
+    changed (None = unknown).
+    """
+
+    def __init__(self, poller, interval=FETCH_INTERVAL, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 max_backoff=MAX_BACKOFF, adaptive=True, keys=tunnel_keys, churn=tunnel_churn,
+                 clock=time.monotonic):
+        self.poller = poller
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.max_interval = max(max_interval, interval)
+        self.max_backoff = max_backoff
+        self.adaptive = adaptive
+        self.keys = keys
+        self.churn = churn
+        self.clock = clock
+        self.routers = {
+            target.name: RouterSchedule(target, interval, phase_offset(target.name, interval))
+            for target in poller.targets
+        }
+        self.tasks = {}       # router name -> polling task, while run() is active
+        self._run_args = None
+
+    def _after_poll(self, router, result, now):
+        if result.status != "ok":
+            router.stats["failed"] += 1
+            router.backoff = min(self.max_backoff, router.backoff * 2)
+            return
+        router.stats["ok"] += 1
+        if result.elapsed > SLOW_FRACTION * self.poller.deadline:
+            router.stats["slow"] += 1
+            router.backoff = min(self.max_backoff, router.backoff * 1.5)
+        else:
+            router.backoff = 1.0
+
+        if self.adaptive:
+            keys = self.keys(result.html)
+            churn = self.churn(router.last_keys, keys)
+            if churn is not None and churn >= CHURN_FAST:
+                router.period = max(self.min_interval, router.period / 2)
+            elif churn is not None and churn <= CHURN_SLOW:
+                router.period = min(self.max_interval, router.period * 1.25)
+            elif churn is not None:
+                # moderate churn: drift back towards the configured interval
+                router.period += (self.interval - router.period) / 2
+            router.last_keys = keys
+        # the period just set is the one the next tick is scheduled with
+        router.samples.append((now, router.effective_period))
+        while router.samples and router.samples[0][0] < now - RATE_WINDOW:
+            router.samples.popleft()
+
+    def _advance(self, router, now):
+        """Next tick on the router's grid; ticks already in the past are skipped."""
+        router.next_due += router.effective_period
+        if router.next_due < now:
+            missed = int((now - router.next_due) // router.effective_period) + 1
+            router.stats["missed"] += missed
+            router.next_due += missed * router.effective_period
+
+    async def _run_router(self, router, handler, start, end):
+        router.next_due = start + router.offset
+        while router.next_due < end:
+            await asyncio.sleep(max(0.0, router.next_due - self.clock()))
+            result = await self.poller.fetch(router.target, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            outcome = handler([result])
+            if asyncio.iscoroutine(outcome):
+                await outcome
+            now = self.clock()
+            self._after_poll(router, result, now)
+            self._advance(router, now)
+
+    async def _report(self, end, report_interval):
+        while self.clock() + report_interval < end:
+            await asyncio.sleep(report_interval)
+            print(self.summary())
+
+    async def run(self, handler, duration=RUN_DURATION, report_interval=REPORT_INTERVAL):
+        start = self.clock()
+        end = start + duration
+        self._run_args = (handler, end)
+        reporter = asyncio.ensure_future(self._report(end, report_interval))
+        for router in self.routers.values():
+            self._start_router(router, start)
+        try:
+            # routers may be added or removed while this runs (update_targets)
+            while True:
+                running = [task for task in self.tasks.values() if not task.done()]
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is not None:
+                        raise task.exception()
+        finally:
+            reporter.cancel()
+            for task in self.tasks.values():
+                task.cancel()
+            self.tasks.clear()
+            self._run_args = None
+
+    def _start_router(self, router, start):
+        handler, end = self._run_args
+        self.tasks[router.target.name] = asyncio.ensure_future(self._run_router(router, handler, start, end))
+
+    def update_targets(self, targets):
+        """Start polling new routers and stop removed ones without disturbing the rest;
+        a router whose URL changed is restarted with fresh schedule state."""
+        targets = {target.name: target for target in targets}
+        for name in [n for n, router in self.routers.items() if targets.get(n) != router.target]:
+            del self.routers[name]
+            task = self.tasks.pop(name, None)
+            if task is not None:
+                task.cancel()
+        for name, target in targets.items():
+            if name not in self.routers:
+                router = self.routers[name] = RouterSchedule(target, self.interval, phase_offset(name, self.interval))
+                if self._run_args is not None:
+                    self._start_router(router, self.clock())
+        self.poller.set_targets(targets.values())
+
+    def rates(self):
+        """Per router: mean scheduled and achieved poll interval over RATE_WINDOW, counters."""
+        rates = {}
+        for name, router in self.routers.items():
+            samples = router.samples
+            achieved = target = None
+            if len(samples) > 1:
+                achieved = (samples[-1][0] - samples[0][0]) / (len(samples) - 1)
+                target = sum(period for _, period in list(samples)[:-1]) / (len(samples) - 1)
+            rates[name] = dict(router.stats, period=router.period, backoff=router.backoff,
+                               target_interval=target, achieved_interval=achieved)
+        return rates
+
+    def summary(self):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rates = self.rates()
+        achieved = [r["achieved_interval"] for r in rates.values() if r["achieved_interval"] is not None]
+        behind = [n for n, r in rates.items()
+                  if r["achieved_interval"] is not None and r["achieved_interval"] > 1.1 * r["target_interval"]]
+        backing_off = [n for n, r in rates.items() if r["backoff"] > 1]
+        mean = sum(achieved) / len(achieved) if achieved else float("nan")
+        return (f"[{now}] Achieved mean interval {mean:.1f}s over {len(achieved)}/{len(rates)} routers; "
+                f"behind schedule: {len(behind)}, backing off: {len(backing_off)}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Poll every router on its own adaptive, jittered schedule.")
+    parser.add_argument("--host", default=CONSOLE_HOST)
+    parser.add_argument("--ports", type=int, nargs="+", default=CONSOLE_PORTS)
+    add_target_arguments(parser)
+    parser.add_argument("--interval", type=float, default=FETCH_INTERVAL)
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL)
+    parser.add_argument("--max-interval", type=float, default=MAX_INTERVAL)
+    parser.add_argument("--fixed", action="store_true", help="keep every router at --interval (no adaptation)")
+    parser.add_argument("--duration", type=float, default=RUN_DURATION)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--deadline", type=float, default=TARGET_DEADLINE)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    targets, registry = initial_targets(args)
+    print(f"[START] Scheduling {len(targets)} routers every {args.interval}s "
+          f"({'fixed' if args.fixed else f'{args.min_interval}-{args.max_interval}s adaptive'})...")
+    async with SwarmPoller(targets, max_concurrency=args.concurrency, deadline=args.deadline) as poller:
+        scheduler = AdaptiveScheduler(poller, args.interval, args.min_interval, args.max_interval,
+                                      adaptive=not args.fixed)
+        rediscovery = asyncio.ensure_future(registry.watch(scheduler.update_targets, args.refresh)) if registry else None
+        try:
+            await scheduler.run(lambda results: None, args.duration)
+        finally:
+            if rediscovery is not None:
+                rediscovery.cancel()
+        for name, rate in scheduler.rates().items():
+            print(f"{name}: {rate}")
+    print("[DONE] Scheduled polling complete.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Sharded Collection
+Spreads page fetching and parsing over several worker processes - on this
+host or on the university VMs and cloud VPS of the hybrid topology - with
+one aggregator writing the unified dataset, since a single collector is
+held to one core by the GIL.
+
+  aggregator   owns the router targets (--ports / --targets, rediscovered
+               every --refresh seconds) and splits them over the live
+               workers with a consistent-hash ring, so a worker joining or
+               leaving only moves its own share of routers. Workers post
+               their collected cycles over HTTP; the aggregator drops
+               duplicates (same router and poll timestamp, e.g. a resent
+               batch) and stale cycles (polled after the router moved to
+               another worker), then runs the snapshot pipeline's transform,
+               sinks and --checkpoint journal on the merged stream.
+               During a handoff the old worker may deliver a router's
+               earlier polls after the new worker's later ones (e.g. from
+               its resend queue). Each router's rows are kept in poll order:
+               a poll older than the newest one already merged for that
+               router is dropped as late, so the trackers never see a
+               router's snapshots go back in time.
+  worker       heartbeats to the aggregator every cycle, polls the routers
+               it is assigned, parses and IP-resolves the pages
+               (SnapshotPipeline.collect) and posts the records. Cycles that
+               cannot be delivered are kept (up to PENDING_CYCLES) and resent.
+  local        an aggregator plus --workers N worker processes on this host,
+               for testing against i2p_stub_console.py.
+
+A worker missing WORKER_TIMEOUT_CYCLES heartbeats is dropped and its routers
+are reassigned; a worker shutting down leaves at once. Router URLs handed
+to remote workers must be reachable from them (e.g. the SoftEther VPN
+addresses), and worker clocks should be NTP-synced, since rows carry the
+worker's poll timestamp. The endpoint has no authentication: bind it to
+localhost or the VPN only.
+
+Usage:
+  python3 i2p_shards.py aggregator --targets docker:i2p --listen 0.0.0.0:9470
+  python3 i2p_shards.py worker --aggregator http://10.8.0.1:9470
+  python3 i2p_shards.py local --workers 4 --ports 20000 20001 20002 20003
+
+Requires: aiohttp, beautifulsoup4, html5lib
+"""
+
+import aiohttp
+import argparse
+import asyncio
+import bisect
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from i2p_checkpoint import CHECKPOINT_INTERVAL, Checkpointer
+from i2p_dedup import ChangeDetector, hash_key
+from i2p_metrics import METRICS_HOST, serve
+from i2p_netdb_index import NetDbIndex
+from i2p_netdb_resolver import NetDbResolver
+from i2p_output_sinks import FLUSH_INTERVAL, FLUSH_ROWS
+from i2p_swarm_poller import (
+    CONSOLE_HOST, CONSOLE_PORTS, FETCH_INTERVAL, MAX_CONCURRENCY, RUN_DURATION, TARGET_DEADLINE,
+    SwarmPoller, Target,
+)
+from i2p_targets import add_target_arguments, initial_targets
+from i2p_tunnel_snapshot import (
+    DEFAULT_EXTRACTORS, OUTPUT_DIR, ClientTunnelExtractor, ExploratoryTunnelExtractor,
+    MultiTunnelPeerExtractor, ParticipatingTunnelExtractor, SnapshotPipeline, make_trackers,
+)
+
+# === Configuration ===
+LISTEN = "127.0.0.1:9470"
+RING_REPLICAS = 100            # virtual nodes per worker on the hash ring
+WORKER_TIMEOUT_CYCLES = 3      # missed heartbeats before a worker is dropped
+PENDING_CYCLES = 60            # undelivered cycles a worker keeps for resending
+SEEN_TTL = 60 * 60             # how long (router, timestamp) pairs are remembered
+REQUEST_TIMEOUT = 30           # seconds per worker -> aggregator request
+
+EXTRACTORS = {cls.name: cls for cls in (ClientTunnelExtractor, ExploratoryTunnelExtractor,
+                                        ParticipatingTunnelExtractor, MultiTunnelPeerExtractor)}
+
+
+class HashRing:
+    """Consistent hashing of router names onto workers (RING_REPLICAS points each)."""
+
+    def __init__(self, nodes=(), replicas=RING_REPLICAS):
+        self.nodes = sorted(nodes)
+        points = sorted((hash_key((node, i)), node) for node in self.nodes for i in range(replicas))
+        self.hashes = [h for h, _ in points]
+        self.owners = [node for _, node in points]
+
+    def owner(self, key):
+        if not self.owners:
+            return None
+        return self.owners[bisect.bisect(self.hashes, hash_key(key)) % len(self.owners)]
+
+    def assign(self, keys):
+        """{node: [keys]} for every node (nodes without keys get an empty list)."""
+        shares = {node: [] for node in self.nodes}
+        for key in keys:
+            if self.owners:
+                shares[self.owner(key)].append(key)
+        return shares
+
+
+# === Aggregator ===
+
+class Aggregator:
+    """Assigns targets to workers and merges their cycles into one SnapshotPipeline."""
+
+    def __init__(self, pipeline, targets, interval=FETCH_INTERVAL, replicas=RING_REPLICAS,
+                 timeout_cycles=WORKER_TIMEOUT_CYCLES):
+        self.pipeline = pipeline
+        self.targets = {t.name: t for t in targets}
+        self.interval = interval
+        self.replicas = replicas
+        self.worker_timeout = timeout_cycles * interval
+        self.workers = {}          # name -> last heartbeat (monotonic)
+        self.ring = HashRing((), replicas)
+        self.handoffs = {}         # router -> time it last moved to another worker
+        self.epoch = 0             # bumped on every change of workers or targets
+        self.seen = ChangeDetector(ttl=SEEN_TTL)
+        self.latest = {}           # router -> newest merged poll time
+        self.stats = {"accepted": 0, "duplicate": 0, "stale": 0, "late": 0, "joined": 0, "left": 0,
+                      "rebalances": 0}
+        metrics = pipeline.metrics
+        metrics.watch("i2p_shard_workers", lambda: len(self.workers))
+        metrics.watch("i2p_shard_entries_total", lambda: {(("outcome", k),): self.stats[k]
+                                                          for k in ("accepted", "duplicate", "stale", "late")},
+                      kind="counter")
+        metrics.watch("i2p_shard_rebalances_total", lambda: self.stats["rebalances"], kind="counter")
+
+    def _log(self, message):
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+    def _rebalance(self, reason):
+        previous, self.ring = self.ring, HashRing(self.workers, self.replicas)
+        now = time.time()
+        for name in self.targets:
+            if previous.owner(name) != self.ring.owner(name):
+                self.handoffs[name] = now
+        self.epoch += 1
+        self.stats["rebalances"] += 1
+        shares = self.ring.assign(self.targets)
+        self._log(f"Rebalanced ({reason}): {len(self.targets)} routers over {len(self.workers)} workers "
+                  f"[{', '.join(f'{w}={len(s)}' for w, s in shares.items())}]")
+
+    def set_targets(self, targets):
+        """TargetRegistry.watch() callback."""
+        self.targets = {t.name: t for t in targets}
+        self._rebalance("targets changed")
+
+    def heartbeat(self, worker):
+        joined = worker not in self.workers
+        self.workers[worker] = time.monotonic()
+        if joined:
+            self.stats["joined"] += 1
+            self._rebalance(f"{worker} joined")
+        return self.assignment(worker)
+
+    def leave(self, worker):
+        if self.workers.pop(worker, None) is not None:
+            self.stats["left"] += 1
+            self._rebalance(f"{worker} left")
+
+    def expire(self):
+        cutoff = time.monotonic() - self.worker_timeout
+        for worker in [w for w, seen in self.workers.items() if seen < cutoff]:
+            del self.workers[worker]
+            self.stats["left"] += 1
+            self._rebalance(f"{worker} timed out")
+
+    def assignment(self, worker):
+        return {
+            "epoch": self.epoch,
+            "interval": self.interval,
+            "extractors": [extractor.name for extractor in self.pipeline.extractors],
+            "targets": [list(self.targets[name]) for name in sorted(self.targets)
+                        if self.ring.owner(name) == worker],
+        }
+
+    def receive(self, worker, cycles):
+        """Merge a worker's cycles; returns the count per outcome."""
+        counts = {"accepted": 0, "duplicate": 0, "stale": 0, "late": 0}
+        for cycle in cycles:
+            entries = []
+            for router, timestamp, sections in cycle:
+                ts = time.mktime(time.strptime(timestamp, "%Y-%m-%d %H:%M:%S"))
+                if self.ring.owner(router) != worker and ts >= self.handoffs.get(router, 0) - 1:
+                    outcome = "stale"     # polled after the router moved to another worker
+                elif self.seen.seen((router, timestamp), now=ts):
+                    outcome = "duplicate"
+                elif ts < self.latest.get(router, 0):
+                    outcome = "late"      # older than a poll already merged (handoff reordering)
+                else:
+                    outcome = "accepted"
+                    self.latest[router] = ts
+                counts[outcome] += 1
+                if outcome == "accepted":
+                    entries.append((router, timestamp, sections))
+            if entries:
+                batches = self.pipeline.apply(entries)
+                self.pipeline.metrics.inc("i2p_cycles_total")
+                rows = ", ".join(f"{name}={len(records)}" for name, records in batches.items())
+                self._log(f"{worker}: {len(entries)} routers at {entries[0][1]}: {rows}")
+        for outcome, count in counts.items():
+            self.stats[outcome] += count
+        return counts
+
+    def app(self):
+        from aiohttp import web
+
+        async def heartbeat(request):
+            body = await request.json()
+            return web.json_response(self.heartbeat(body["worker"]))
+
+        async def cycles(request):
+            body = await request.json()
+            if body["worker"] not in self.workers:
+                self.heartbeat(body["worker"])
+            return web.json_response(self.receive(body["worker"], body["cycles"]))
+
+        async def leave(request):
+            body = await request.json()
+            self.leave(body["worker"])
+            return web.json_response({"ok": True})
+
+        async def status(request):
+            shares = self.ring.assign(self.targets)
+            return web.json_response({"epoch": self.epoch, "stats": self.stats,
+                                      "workers": {w: len(s) for w, s in shares.items()}})
+
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        app.router.add_post("/heartbeat", heartbeat)
+        app.router.add_post("/cycles", cycles)
+        app.router.add_post("/leave", leave)
+        app.router.add_get("/status", status)
+        return app
+
+    async def serve(self, host, port):
+        from aiohttp import web
+
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    async def run(self, duration=RUN_DURATION):
+        """Drop silent workers every cycle until `duration` has passed."""
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            await asyncio.sleep(min(self.interval, max(0.0, end - time.monotonic())))
+            self.expire()
+
+
+# === Worker ===
+
+class ShardWorker:
+    """Polls the routers assigned by the aggregator and posts the collected cycles."""
+
+    def __init__(self, poller, aggregator_url, name=None, output_dir=OUTPUT_DIR, resolver=None, use_bs4=False):
+        self.poller = poller
+        self.url = aggregator_url.rstrip("/")
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.output_dir = output_dir
+        self.resolver = resolver
+        self.use_bs4 = use_bs4
+        self.pipeline = None
+        self.epoch = None
+        self.interval = FETCH_INTERVAL
+        self.pending = deque(maxlen=PENDING_CYCLES)
+        self.stats = {"cycles": 0, "sent": 0, "dropped": 0, "send_failures": 0}
+
+    async def _post(self, path, body):
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with self.poller.session.post(self.url + path, json=body, timeout=timeout) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    def _apply(self, assignment):
+        if self.pipeline is None:
+            extractors = [EXTRACTORS[name]() for name in assignment["extractors"]]
+            self.pipeline = SnapshotPipeline(self.poller, extractors=extractors, output_dir=self.output_dir,
+                                             resolver=self.resolver, use_bs4=self.use_bs4)
+            self.interval = assignment["interval"]
+        if assignment["epoch"] != self.epoch:
+            self.epoch = assignment["epoch"]
+            self.poller.set_targets(Target(*t) for t in assignment["targets"])
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[{now}] {self.name}: assignment {self.epoch}, {len(self.poller.targets)} routers")
+
+    async def join(self, retry=5):
+        """Register with the aggregator, retrying until it answers."""
+        while True:
+            try:
+                self._apply(await self._post("/heartbeat", {"worker": self.name}))
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"[WARN] {self.name}: aggregator {self.url} unreachable ({e}), retrying", file=sys.stderr)
+                await asyncio.sleep(retry)
+
+    async def leave(self):
+        try:
+            await self._post("/leave", {"worker": self.name})
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
+    async def process(self, results):
+        """Cycle handler for SwarmPoller.run(): collect, deliver, pick up the next assignment."""
+        if results:
+            cycle, _ = await self.pipeline.collect(results)
+            if len(self.pending) == self.pending.maxlen:
+                self.stats["dropped"] += 1
+            self.pending.append(cycle)
+            self.stats["cycles"] += 1
+        try:
+            if self.pending:
+                await self._post("/cycles", {"worker": self.name, "cycles": list(self.pending)})
+                self.stats["sent"] += len(self.pending)
+                self.pending.clear()
+            self._apply(await self._post("/heartbeat", {"worker": self.name}))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["send_failures"] += 1
+            print(f"[WARN] {self.name}: delivery failed, {len(self.pending)} cycles pending ({e})", file=sys.stderr)
+
+
+# === Entry points ===
+
+def _listen(value):
+    host, _, port = value.rpartition(":")
+    return host.strip("[]") or "0.0.0.0", int(port)
+
+
+def _make_pipeline(args):
+    trackers = make_trackers(args)
+    checkpointer = None
+    if args.checkpoint is not None:
+        checkpointer = Checkpointer(args.checkpoint or os.path.join(args.output_dir, ".checkpoint"),
+                                    args.checkpoint_interval)
+    sink_options = {"rotate": None if args.rotate == "none" else args.rotate,
+                    "flush_rows": args.flush_rows, "flush_interval": args.flush_interval}
+    return SnapshotPipeline(None, extractors=[cls() for cls in DEFAULT_EXTRACTORS], output_dir=args.output_dir,
+                            sink_format=args.format, sink_options=sink_options, trackers=trackers,
+                            events_only=["participating"] if args.participating == "events" else [],
+                            changes_only=args.changes_only, checkpointer=checkpointer)
+
+
+async def run_aggregator(args, spawn=0):
+    targets, registry = initial_targets(args)
+    pipeline = _make_pipeline(args)
+    duration = args.duration
+    if pipeline.checkpointer is not None:
+        replayed = pipeline.resume()
+        duration -= time.time() - pipeline.run_started
+        print(f"[START] Checkpoint at cycle {pipeline.seq} ({replayed} replayed from the journal)")
+    aggregator = Aggregator(pipeline, targets, args.interval)
+    host, port = _listen(args.listen)
+    runner = await aggregator.serve(host, port)
+    print(f"[START] Aggregating {len(targets)} routers on http://{host}:{port} to {args.output_dir}")
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = await serve(pipeline.metrics, args.metrics_host, args.metrics_port)
+    rediscovery = asyncio.ensure_future(registry.watch(aggregator.set_targets, args.refresh)) if registry else None
+    workers = []
+    for i in range(spawn):
+        command = [sys.executable, os.path.abspath(__file__), "worker", "--name", f"worker{i + 1}",
+                   "--aggregator", f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}",
+                   "--output-dir", os.path.join(args.output_dir, ".workers", f"worker{i + 1}"),
+                   "--concurrency", str(args.concurrency), "--deadline", str(args.deadline)]
+        workers.append(await asyncio.create_subprocess_exec(*command, *(["--bs4"] if args.bs4 else [])))
+    try:
+        await aggregator.run(duration)
+    finally:
+        for worker in workers:
+            if worker.returncode is None:
+                worker.terminate()
+        for worker in workers:
+            await worker.wait()   # they leave through this process's endpoint
+        if rediscovery is not None:
+            rediscovery.cancel()
+        if metrics_server is not None:
+            await metrics_server.cleanup()
+        await runner.cleanup()
+        pipeline.close()
+    print(f"[DONE] {aggregator.stats}")
+
+
+async def run_worker(args):
+    async with SwarmPoller([], max_concurrency=args.concurrency, deadline=args.deadline) as poller:
+        resolver = NetDbResolver(
+            poller.fetch_text, db_path=os.path.join(args.output_dir, "netdb_cache.sqlite"),
+            netdb_index=NetDbIndex(args.netdb_dir) if args.netdb_dir else None)
+        worker = ShardWorker(poller, args.aggregator, args.name, args.output_dir, resolver, args.bs4)
+        main_task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, main_task.cancel)
+        await worker.join()
+        print(f"[START] {worker.name} polling for {worker.url} every {worker.interval}s")
+        try:
+            await poller.run(worker.process, worker.interval, args.duration)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await worker.leave()
+            resolver.close()
+    print(f"[DONE] {worker.name}: {worker.stats}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sharded snapshot collection: workers plus an aggregator.")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    worker = modes.add_parser("worker", help="poll the routers the aggregator assigns")
+    worker.add_argument("--aggregator", default=f"http://{LISTEN}")
+    worker.add_argument("--name", help="unique worker name (default <hostname>-<pid>)")
+
+    aggregator = modes.add_parser("aggregator", help="assign routers to workers and write the merged output")
+    local = modes.add_parser("local", help="aggregator plus --workers local worker processes")
+    local.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    for mode in (aggregator, local):
+        mode.add_argument("--listen", default=LISTEN, help="HOST:PORT for the worker endpoint")
+        mode.add_argument("--host", default=CONSOLE_HOST)
+        mode.add_argument("--ports", type=int, nargs="+", default=CONSOLE_PORTS)
+        add_target_arguments(mode)
+        mode.add_argument("--interval", type=float, default=FETCH_INTERVAL)
+        mode.add_argument("--format", choices=["csv", "parquet"], default="csv")
+        mode.add_argument("--rotate", choices=["hourly", "size", "none"], default="hourly")
+        mode.add_argument("--flush-rows", type=int, default=FLUSH_ROWS)
+        mode.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL)
+        mode.add_argument("--participating", choices=["snapshot", "events", "both"], default="snapshot")
+        mode.add_argument("--changes-only", action="store_true")
+        mode.add_argument("--bandwidth", action="store_true")
+        mode.add_argument("--checkpoint", nargs="?", const="", metavar="DIR")
+        mode.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL)
+        mode.add_argument("--metrics-port", type=int)
+        mode.add_argument("--metrics-host", default=METRICS_HOST)
+    for mode in (worker, aggregator, local):
+        mode.add_argument("--output-dir", default=OUTPUT_DIR)
+        mode.add_argument("--duration", type=float, default=RUN_DURATION)
+        mode.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+        mode.add_argument("--deadline", type=float, default=TARGET_DEADLINE)
+        mode.add_argument("--bs4", action="store_true")
+    worker.add_argument("--netdb-dir", action="append", default=[])
+    args = parser.parse_args()
+    if args.mode != "worker" and args.checkpoint is not None and args.format != "csv":
+        parser.error("--checkpoint supports --format csv only")
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.mode == "worker":
+        asyncio.run(run_worker(args))
+    else:
+        asyncio.run(run_aggregator(args, spawn=args.workers if args.mode == "local" else 0))
+
+
+if __name__ == "__main__":
+    main()
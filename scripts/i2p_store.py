@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Observation Store
+Indexed, incrementally updated SQLite store of every peer sighting in the
+collector output, so "when was router X in the FastSet, in which tunnels
+and roles, and on which of our routers" is an index lookup instead of a
+scan over every CSV and *_tunnels_<port>.txt file.
+
+One row per sighting: time, peer (int code from i2p_router_ids, whose
+table lives in the same database file), observing router (console port),
+kind, role and a detail column:
+
+  kind           source                                role            detail
+  client         client_tunnels_snapshot*.csv, legacy  Node Role       Direction
+  exploratory    exploratory_tunnels_snapshot*.csv     Node Role       Direction
+  participating  participating_tunnels_snapshot*.csv   from / to hop   Role
+  multi_peers    multi_peers_tunnels_snapshot*.csv     -               Tunnels
+  profiles       profiles CSVs                         Groups          Caps
+  fastset        4-Fastset-Nodes-By-Time.txt           -               -
+  client, exploratory, high_capacity
+                 <kind>_tunnels_<port>.txt peer lists  -               -
+                 (timestamped with the file's mtime)
+
+CSV layouts are recognised by their header, so the snapshot pipeline's and
+the legacy 24h collectors' files both load. Indexes cover (peer, time),
+(observing router, time) and (kind, time). Ingestion is incremental: each
+CSV is read from the byte offset reached last time (a truncated or replaced
+file is reloaded), and peer lists are re-read when their mtime changes.
+
+Usage:
+  python3 i2p_store.py ingest ~/i2p_tunnel_snapshots ../data
+  python3 i2p_store.py node xyRH --kind profiles --role %Fast% --intervals 600
+  python3 i2p_store.py node xyRHwwC-~CzvtH0svhcgBUE4qx25V4eSYtt9kr6Mc18= --from 2025-04-18
+  python3 i2p_store.py observer 32797 --from "2025-04-18 12:00" --to "2025-04-18 13:00"
+  python3 i2p_store.py top --kind client --limit 20
+
+In Python:
+  from i2p_store import ObservationStore
+  store = ObservationStore()
+  store.sightings("xyRH", kind="client")
+
+Requires: nothing beyond the standard library
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+
+from i2p_router_ids import RID_RE, RouterIdRegistry
+
+# === Configuration ===
+STORE_DB = os.path.join(os.path.expanduser("~"), "i2p_observations.sqlite")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+KINDS = ("client", "exploratory", "participating", "multi_peers", "profiles", "fastset", "high_capacity")
+BATCH_ROWS = 100000
+NON_PEERS = ("Local", "Unknown", "Error", "")
+INTERVAL_GAP = 15 * 60     # sightings further apart start a new interval
+
+Observation = namedtuple("Observation", ["timestamp", "node_id", "observer", "kind", "role", "detail"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    ts INTEGER NOT NULL,
+    node INTEGER NOT NULL,
+    observer INTEGER,
+    kind INTEGER NOT NULL,
+    role TEXT,
+    detail TEXT,
+    source INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS observations_node_ts ON observations (node, ts);
+CREATE INDEX IF NOT EXISTS observations_observer_ts ON observations (observer, ts);
+CREATE INDEX IF NOT EXISTS observations_kind_ts ON observations (kind, ts);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    offset INTEGER NOT NULL DEFAULT 0,
+    mtime REAL,
+    header TEXT
+);
+"""
+
+
+# === Source layouts ===
+
+def _client_rows(row):
+    yield row["Full ID"], row.get("Node Role"), row.get("Direction")
+
+
+def _participating_rows(row):
+    yield row["From Full ID"], "from", row.get("Role")
+    yield row["To Full ID"], "to", row.get("Role")
+
+
+def _multi_peer_rows(row):
+    yield row["Full Peer ID"], None, row.get("Tunnels")
+
+
+def _profile_rows(row):
+    yield row["Full Node ID"], row.get("Groups"), row.get("Caps")
+
+
+# (kind, columns identifying the layout, columns ruling it out, row -> (peer ID, role, detail) sightings);
+# participating_events_*.csv repeats the participating columns but logs tunnel lifecycle events
+CSV_LAYOUTS = [
+    ("participating", {"From Full ID", "To Full ID"}, {"Event"}, _participating_rows),
+    ("client", {"Full ID", "Node Role"}, set(), _client_rows),
+    ("multi_peers", {"Full Peer ID", "Tunnels"}, set(), _multi_peer_rows),
+    ("profiles", {"Full Node ID", "Groups"}, set(), _profile_rows),
+]
+
+_PEER_LIST_RE = re.compile(r"^(client|exploratory)_tunnels_(\d+)\.txt$|^(high_capacity)_peers\.txt$")
+_FASTSET_RE = re.compile(r"fastset.*by.time.*\.txt$", re.IGNORECASE)
+
+
+def csv_layout(path, header):
+    """(kind, row function) for a collector CSV header, or None if it holds no sightings."""
+    columns = set(header)
+    for kind, required, excluded, rows in CSV_LAYOUTS:
+        if required <= columns and not excluded & columns:
+            if kind == "client" and "exploratory" in os.path.basename(path):
+                kind = "exploratory"
+            return kind, rows
+    return None
+
+
+def parse_time(text):
+    """Epoch seconds of a "YYYY-MM-DD[ HH:MM[:SS]]" argument."""
+    for fmt in (TIMESTAMP_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(time.mktime(time.strptime(text.strip(), fmt)))
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised time {text!r} (YYYY-MM-DD[ HH:MM[:SS]])")
+
+
+def format_time(ts):
+    return time.strftime(TIMESTAMP_FORMAT, time.localtime(ts))
+
+
+class ObservationStore:
+    """SQLite sightings table with a Python query API."""
+
+    def __init__(self, db_path=STORE_DB):
+        self.db_path = db_path
+        self.registry = RouterIdRegistry(db_path)   # router_ids table in the same file
+        self.db = sqlite3.connect(db_path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self._times = {}
+        self.stats = {"files": 0, "rows": 0, "reloaded": 0}
+
+    # --- ingestion ---
+
+    def _epoch(self, text):
+        ts = self._times.get(text)
+        if ts is None:
+            try:
+                ts = int(time.mktime(time.strptime(text, TIMESTAMP_FORMAT)))
+            except ValueError:
+                ts = None
+            if len(self._times) > 100000:
+                self._times.clear()
+            self._times[text] = ts
+        return ts
+
+    def _source(self, path):
+        row = self.db.execute("SELECT id, offset, mtime, header FROM sources WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            with self.db:
+                cursor = self.db.execute("INSERT INTO sources (path) VALUES (?)", (path,))
+            return cursor.lastrowid, 0, None, None
+        return row
+
+    def _insert(self, source, sightings, **progress):
+        """Store (ts, peer ID, observer, kind, role, detail) tuples and the source's new position."""
+        sightings = [s for s in sightings if s[0] is not None and s[1] not in NON_PEERS]
+        codes = self.registry.intern_many([s[1] for s in sightings])   # commits on its own connection
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO observations (ts, node, observer, kind, role, detail, source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(ts, code, observer, kind, role, detail, source)
+                 for (ts, _, observer, kind, role, detail), code in zip(sightings, codes)])
+            if progress:
+                assignments = ", ".join(f"{column} = ?" for column in progress)
+                self.db.execute(f"UPDATE sources SET {assignments} WHERE id = ?", (*progress.values(), source))
+        self.stats["rows"] += len(sightings)
+
+    def _forget(self, source):
+        with self.db:
+            self.db.execute("DELETE FROM observations WHERE source = ?", (source,))
+            self.db.execute("UPDATE sources SET offset = 0, header = NULL WHERE id = ?", (source,))
+        self.stats["reloaded"] += 1
+
+    def ingest_csv(self, path, observer=None):
+        """Append the complete lines added to a collector CSV since the last ingest."""
+        source, offset, _, header = self._source(path)
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            first = f.readline()
+            current = next(csv.reader([first.decode("utf-8", errors="replace")]), [])
+            if header is not None and (size < offset or json.loads(header) != current):
+                self._forget(source)   # truncated, rotated or replaced
+                offset, header = 0, None
+            layout = csv_layout(path, current)
+            if layout is None:
+                return 0
+            kind, rows = layout
+            kind_code = KINDS.index(kind)
+            if offset == 0:
+                offset = len(first)
+                self._insert(source, [], offset=offset, header=json.dumps(current))
+            f.seek(offset)
+            added = 0
+            while True:
+                chunk = f.readlines(BATCH_ROWS * 200)
+                if chunk and not chunk[-1].endswith(b"\n"):
+                    chunk.pop()   # a row still being written
+                if not chunk:
+                    break
+                offset += sum(len(line) for line in chunk)
+                text = io.StringIO(b"".join(chunk).decode("utf-8", errors="replace"), newline="")
+                sightings = []
+                for row in csv.DictReader(text, fieldnames=current):
+                    ts = self._epoch(row.get("Timestamp") or "")
+                    router = row.get("Router")
+                    where = int(router) if router and router.isdigit() else observer
+                    for node, role, detail in rows(row):
+                        sightings.append((ts, node, where, kind_code, role, detail))
+                self._insert(source, sightings, offset=offset)
+                added += len(sightings)
+                f.seek(offset)
+        self.stats["files"] += 1
+        return added
+
+    def ingest_peer_list(self, path, kind, observer=None):
+        """A *_tunnels_<port>.txt snapshot, stamped with its mtime; re-read when it changes."""
+        source, _, mtime, _ = self._source(path)
+        current = os.path.getmtime(path)
+        if mtime == current:
+            return 0
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            ids = list(dict.fromkeys(rid for line in f for rid in RID_RE.findall(line)))
+        ts = int(current)
+        self._insert(source, [(ts, rid, observer, KINDS.index(kind), None, None) for rid in ids], mtime=current)
+        self.stats["files"] += 1
+        return len(ids)
+
+    def ingest_fastset(self, path):
+        """Lines "M/D/YYYY<TAB>H:MM:SS<TAB>router<TAB>node ID" (4-Fastset-Nodes-By-Time.txt), appended from the last offset."""
+        source, offset, _, _ = self._source(path)
+        if os.path.getsize(path) < offset:
+            self._forget(source)
+            offset = 0
+        kind = KINDS.index("fastset")
+        sightings = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                line = raw.decode("utf-8", errors="ignore")
+                parts = [p.strip() for p in line.rstrip("\n").split("\t") if p.strip()]
+                match = RID_RE.search(line)
+                if len(parts) < 3 or not match:
+                    continue
+                try:
+                    ts = int(time.mktime(time.strptime(f"{parts[0]} {parts[1]}", "%m/%d/%Y %H:%M:%S")))
+                except ValueError:
+                    continue
+                router = parts[2] if len(parts) > 3 and parts[2].isdigit() else None
+                sightings.append((ts, match.group(0), int(router) if router else None, kind, None, None))
+        self._insert(source, sightings, offset=offset)
+        self.stats["files"] += 1
+        return len(sightings)
+
+    def ingest(self, path):
+        """Ingest a file or every recognised file under a directory; returns new sightings."""
+        if os.path.isdir(path):
+            added = 0
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(files):
+                    added += self.ingest(os.path.join(root, name))
+            return added
+        path = os.path.abspath(path)
+        name = os.path.basename(path)
+        if name.endswith(".csv"):
+            return self.ingest_csv(path)
+        match = _PEER_LIST_RE.match(name)
+        if match:
+            if match.group(3):
+                return self.ingest_peer_list(path, "high_capacity")
+            return self.ingest_peer_list(path, match.group(1), int(match.group(2)))
+        if _FASTSET_RE.search(name):
+            return self.ingest_fastset(path)
+        return 0
+
+    # --- queries ---
+
+    def _node_code(self, node):
+        """Code of a full ID or unambiguous abbreviation (None if unknown)."""
+        return self.registry.code(node) if isinstance(node, str) else node
+
+    def _query(self, where, params, start, end, kind, observer, role, limit, order="ts"):
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(parse_time(start) if isinstance(start, str) else start)
+        if end is not None:
+            where.append("ts < ?")
+            params.append(parse_time(end) if isinstance(end, str) else end)
+        # unary + keeps the planner on the (node|observer, ts) index of the first condition
+        if kind is not None:
+            where.append("+kind = ?")
+            params.append(KINDS.index(kind))
+        if observer is not None:
+            where.append("+observer = ?")
+            params.append(int(observer))
+        if role is not None:
+            where.append("role LIKE ?")
+            params.append(role)
+        sql = (f"SELECT ts, node, observer, kind, role, detail FROM observations WHERE {' AND '.join(where)} "
+               f"ORDER BY {order}" + (f" LIMIT {int(limit)}" if limit else ""))
+        return [Observation(format_time(ts), self.registry.router_id(node), obs, KINDS[k], r, d)
+                for ts, node, obs, k, r, d in self.db.execute(sql, params)]
+
+    def sightings(self, node, start=None, end=None, kind=None, observer=None, role=None, limit=None):
+        """Every sighting of one peer (full ID or abbreviation), oldest first.
+
+        `start`/`end` are epoch seconds or "YYYY-MM-DD[ HH:MM[:SS]]" (end
+        exclusive); `role` is a SQL LIKE pattern, e.g. "%Fast%" for the
+        FastSet in profile groups.
+        """
+        code = self._node_code(node)
+        if code is None:
+            return []
+        return self._query(["node = ?"], [code], start, end, kind, observer, role, limit)
+
+    def observed_by(self, observer, start=None, end=None, kind=None, role=None, limit=None):
+        """Everything one of our routers (console port) saw, oldest first."""
+        return self._query(["observer = ?"], [int(observer)], start, end, kind, None, role, limit)
+
+    def intervals(self, node, gap=INTERVAL_GAP, **filters):
+        """(first, last, sightings, observers) runs of a peer's sightings no more than `gap` seconds apart."""
+        runs = []
+        for obs in self.sightings(node, **filters):
+            ts = parse_time(obs.timestamp)
+            if runs and ts - runs[-1][1] <= gap:
+                run = runs[-1]
+                run[1] = ts
+                run[2] += 1
+                run[3].add(obs.observer)
+            else:
+                runs.append([ts, ts, 1, {obs.observer}])
+        return [(format_time(first), format_time(last), count, sorted(o for o in observers if o is not None))
+                for first, last, count, observers in runs]
+
+    def summary(self, node, start=None, end=None):
+        """{(kind, role): (sightings, observers, first, last)} for one peer."""
+        code = self._node_code(node)
+        if code is None:
+            return {}
+        where, params = ["node = ?"], [code]
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(parse_time(start) if isinstance(start, str) else start)
+        if end is not None:
+            where.append("ts < ?")
+            params.append(parse_time(end) if isinstance(end, str) else end)
+        rows = self.db.execute(
+            f"SELECT kind, role, COUNT(*), COUNT(DISTINCT observer), MIN(ts), MAX(ts) FROM observations "
+            f"WHERE {' AND '.join(where)} GROUP BY kind, role ORDER BY kind, role", params)
+        return {(KINDS[k], r): (n, o, format_time(first), format_time(last)) for k, r, n, o, first, last in rows}
+
+    def top(self, kind=None, start=None, end=None, limit=20):
+        """[(peer ID, sightings, observing routers)] most often seen, optionally of one kind/time range."""
+        where, params = ["1"], []
+        if kind is not None:
+            where.append("kind = ?")
+            params.append(KINDS.index(kind))
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(parse_time(start) if isinstance(start, str) else start)
+        if end is not None:
+            where.append("ts < ?")
+            params.append(parse_time(end) if isinstance(end, str) else end)
+        rows = self.db.execute(
+            f"SELECT node, COUNT(*) AS n, COUNT(DISTINCT observer) FROM observations WHERE {' AND '.join(where)} "
+            f"GROUP BY node ORDER BY n DESC LIMIT ?", params + [int(limit)])
+        return [(self.registry.router_id(node), n, observers) for node, n, observers in rows]
+
+    def counts(self):
+        """{kind: (sightings, first, last)} over the whole store."""
+        rows = self.db.execute("SELECT kind, COUNT(*), MIN(ts), MAX(ts) FROM observations GROUP BY kind")
+        return {KINDS[k]: (n, format_time(first), format_time(last)) for k, n, first, last in rows}
+
+    def close(self):
+        self.db.close()
+        self.registry.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Indexed store of peer sightings from the collector output.")
+    parser.add_argument("--db", default=STORE_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="load new collector output (files or directories)")
+    ingest.add_argument("paths", nargs="+")
+    node = commands.add_parser("node", help="sightings of one peer (full ID or abbreviation)")
+    node.add_argument("node")
+    node.add_argument("--intervals", type=float, metavar="GAP",
+                      help="print runs of sightings no more than GAP seconds apart instead of every row")
+    node.add_argument("--summary", action="store_true", help="counts per kind and role")
+    observer = commands.add_parser("observer", help="what one of our routers (console port) saw")
+    observer.add_argument("observer", type=int)
+    top = commands.add_parser("top", help="most frequently seen peers")
+    commands.add_parser("stats", help="sightings per kind")
+    for command in (node, observer, top):
+        command.add_argument("--from", dest="start")
+        command.add_argument("--to", dest="end")
+        command.add_argument("--kind", choices=KINDS)
+        command.add_argument("--limit", type=int)
+    for command in (node, observer):
+        command.add_argument("--role", help="SQL LIKE pattern, e.g. %%Fast%% for the FastSet in profile groups")
+    node.add_argument("--observer", type=int)
+    return parser.parse_args()
+
+
+def _print_rows(rows):
+    for row in rows:
+        print("\t".join("" if value is None else str(value) for value in row))
+
+
+def main():
+    args = parse_args()
+    store = ObservationStore(args.db)
+    start = time.perf_counter()
+    try:
+        if args.command == "ingest":
+            added = sum(store.ingest(path) for path in args.paths)
+            print(f"[DONE] {added} new sightings from {store.stats['files']} files "
+                  f"({store.stats['reloaded']} reloaded) in {time.perf_counter() - start:.1f}s")
+        elif args.command == "node":
+            filters = dict(start=args.start, end=args.end, kind=args.kind, observer=args.observer, role=args.role)
+            if args.summary:
+                _print_rows((kind, role) + values for (kind, role), values in store.summary(args.node, args.start, args.end).items())
+            elif args.intervals:
+                _print_rows(store.intervals(args.node, args.intervals, **filters))
+            else:
+                _print_rows(store.sightings(args.node, limit=args.limit, **filters))
+        elif args.command == "observer":
+            _print_rows(store.observed_by(args.observer, args.start, args.end, args.kind, args.role, args.limit))
+        elif args.command == "top":
+            _print_rows(store.top(args.kind, args.start, args.end, args.limit or 20))
+        else:
+            _print_rows((kind,) + values for kind, values in store.counts().items())
+    finally:
+        store.close()
+    if args.command != "ingest":
+        print(f"[DONE] {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
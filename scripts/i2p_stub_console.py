@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Stub Console
+Serves the recorded console captures in data/ as if they were live routers,
+so the swarm collectors can be exercised without a running I2P swarm.
+
+Every data/tunnels_data_<port>.html is served as /tunnels on
+127.0.0.1:<port + offset>, and data/high_capacity_routers_<port>.html as
+/profiles. Routers without a recorded profiles page get a synthetic one
+listing the peers of their /tunnels page, and /netdb?r=<id> answers with a
+synthetic router info whose host address is derived from the ID (a share
+of IDs publish none).
+
+For load tests, --routers N serves N virtual routers on consecutive ports
+from --base-port, each replaying one of the recorded routers in turn, and
+--latency/--jitter/--failure-rate/--timeout-rate make responses slow,
+failing (HTTP 503) or hanging like overloaded consoles.
+
+Usage:
+  python3 i2p_stub_console.py --data-dir ../data --offset 0
+  python3 i2p_stub_console.py --routers 500 --base-port 20000 --latency 0.05 --failure-rate 0.01
+
+Requires: aiohttp
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import os
+import random
+import re
+
+from aiohttp import web
+
+from i2p_router_ids import RID_RE
+
+# === Configuration ===
+STUB_HOST = "127.0.0.1"
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "data")
+PAGE_PATTERNS = {
+    "/tunnels": "tunnels_data_{port}.html",
+    "/profiles": "high_capacity_routers_{port}.html",
+}
+BASE_PORT = 20000            # below the usual ephemeral range, which client sockets use
+HANG_SECONDS = 60            # how long a "timeout" response stalls
+UNPUBLISHED_SHARE = 0.2      # synthetic netdb entries without a host address
+PROFILE_GROUPS = ("Fast, High Capacity, Integrated", "Fast, High Capacity", "High Capacity", "Standard")
+PROFILE_CAPS = ("XfR", "PR", "OfR", "LU", "NR")
+
+
+def recorded_ports(data_dir):
+    """Ports that have a recorded /tunnels capture in data_dir."""
+    ports = []
+    for path in glob.glob(os.path.join(data_dir, "tunnels_data_*.html")):
+        match = re.search(r"tunnels_data_(\d+)\.html$", path)
+        if match:
+            ports.append(int(match.group(1)))
+    return sorted(ports)
+
+
+def _digest(node_id):
+    return hashlib.sha256(node_id.encode()).digest()
+
+
+def synthetic_profiles_page(peer_ids):
+    """A /profiles?f=1 page with a profilelist row per peer (values derived from the ID)."""
+    rows = []
+    for peer_id in peer_ids:
+        d = _digest(peer_id)
+        rows.append(
+            '<tr><td align="center" nowrap><img height="11" width="16" alt="US" title="United States" '
+            f'src="/flags.jsp?c=us"> <tt><a title="NetDb entry" href="netdb?r={peer_id}">{peer_id[:4]}</a></tt></td>'
+            f'<td align="center">{PROFILE_GROUPS[d[0] % len(PROFILE_GROUPS)]}'
+            f'<td align="right">{PROFILE_CAPS[d[1] % len(PROFILE_CAPS)]}'
+            f'<td align="right">0.9.{60 + d[2] % 5}</td><td align="right">{d[3] + d[4] / 100:.2f}</td>'
+            f'<td align="right">{d[5] / 10:.2f}</td><td align="right">{d[6] / 255:.2f}</td>'
+            '<td align="center">OK&nbsp;</td><td nowrap align="center">profile</td>\n</tr>')
+    return ("<html><head><title>I2P Router Console - peer profiles</title></head><body>"
+            '<table id="profilelist"><tr><th>Peer</th><th>Groups</th><th>Caps</th><th>Version</th><th>Speed</th>'
+            "<th>Capacity</th><th>Integration</th><th>Status</th><th>View/Edit</th></tr>"
+            + "".join(rows) + "</table></body></html>")
+
+
+def synthetic_netdb_page(node_id):
+    """A netdb?r= page; most IDs publish one IPv4 host, some publish none."""
+    d = _digest(node_id)
+    if d[0] < 256 * UNPUBLISHED_SHARE:
+        body = "<tr><td><b>Addresses:</b> none</td></tr>"
+    else:
+        body = (f"<tr><td><b>NTCP2</b> cost: 14 host: {10 + d[1] % 200}.{d[2]}.{d[3]}.{1 + d[4] % 254} "
+                f"port: {1024 + int.from_bytes(d[5:7], 'big') % 60000}</td></tr>")
+    return (f"<html><head><title>I2P Router Console - network database</title></head><body>"
+            f'<table class="netdbentry"><tr><th>Router: {node_id}</th></tr>{body}</table></body></html>')
+
+
+def load_pages(data_dir, port):
+    """{route: html} for one recorded router, with a synthetic /profiles page if none was recorded."""
+    pages = {}
+    for route, pattern in PAGE_PATTERNS.items():
+        path = os.path.join(data_dir, pattern.format(port=port))
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                pages[route] = f.read()
+    if "/profiles" not in pages and "/tunnels" in pages:
+        pages["/profiles"] = synthetic_profiles_page(list(dict.fromkeys(RID_RE.findall(pages["/tunnels"]))))
+    return pages
+
+
+class Faults:
+    """Injected latency and failures shared by every stub router."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, timeout_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.rng = random.Random(seed)
+
+    async def apply(self):
+        """Sleep for the simulated latency; raises the injected failure, if any."""
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        draw = self.rng.random()
+        if draw < self.timeout_rate:
+            await asyncio.sleep(HANG_SECONDS)
+        elif draw < self.timeout_rate + self.failure_rate:
+            raise web.HTTPServiceUnavailable()
+
+
+def make_app(data_dir, port, pages=None, faults=None):
+    pages = pages if pages is not None else load_pages(data_dir, port)
+
+    async def serve(request):
+        if faults is not None:
+            await faults.apply()
+        if request.path == "/netdb" and "r" in request.query:
+            return web.Response(text=synthetic_netdb_page(request.query["r"]), content_type="text/html")
+        html = pages.get(request.path)
+        if html is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", serve)
+    return app
+
+
+def virtual_routers(recorded, count, base_port=BASE_PORT):
+    """(listen port, recorded port) for `count` routers replaying the recordings round-robin."""
+    return [(base_port + i, recorded[i % len(recorded)]) for i in range(count)]
+
+
+async def start_stub_consoles(data_dir=DATA_DIR, host=STUB_HOST, offset=0, ports=None, routers=None,
+                              base_port=BASE_PORT, faults=None):
+    """Start one stub console per recorded port, or `routers` virtual ones from
+    `base_port`; returns (runners, listening ports)."""
+    recorded = ports or recorded_ports(data_dir)
+    if routers:
+        layout = virtual_routers(recorded, routers, base_port)
+    else:
+        layout = [(port + offset, port) for port in recorded]
+    cache = {}
+    runners, listening = [], []
+    for listen_port, port in layout:
+        if port not in cache:
+            cache[port] = load_pages(data_dir, port)
+        runner = web.AppRunner(make_app(data_dir, port, cache[port], faults), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, listen_port).start()
+        runners.append(runner)
+        listening.append(listen_port)
+    return runners, listening
+
+
+async def stop_stub_consoles(runners):
+    for runner in runners:
+        await runner.cleanup()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Serve recorded console pages as stub routers.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--host", default=STUB_HOST)
+    parser.add_argument("--offset", type=int, default=0, help="added to every recorded port")
+    parser.add_argument("--routers", type=int, help="serve this many virtual routers from --base-port instead")
+    parser.add_argument("--base-port", type=int, default=BASE_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random latency, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help=f"share of requests stalled {HANG_SECONDS}s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    faults = None
+    if args.latency or args.jitter or args.failure_rate or args.timeout_rate:
+        faults = Faults(args.latency, args.jitter, args.failure_rate, args.timeout_rate, args.seed)
+    runners, ports = await start_stub_consoles(args.data_dir, args.host, args.offset, routers=args.routers,
+                                               base_port=args.base_port, faults=faults)
+    shown = " ".join(map(str, ports)) if len(ports) <= 32 else f"{ports[0]}-{ports[-1]}"
+    print(f"[START] Serving {len(ports)} stub consoles on {args.host}: {shown}", flush=True)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await stop_stub_consoles(runners)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
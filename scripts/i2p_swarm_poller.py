@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Swarm Poller
+Polls the /tunnels page of every router console in the swarm concurrently
+from a single process, instead of running one blocking collector per replica.
+
+Each cycle fetches all targets over one pooled keep-alive HTTP session,
+bounded by a global concurrency cap and a per-target deadline, so a slow or
+dead console only costs its own deadline and never stalls the cycle.
+
+Usage:
+  python3 i2p_swarm_poller.py --ports 32797 32808 32830 --interval 60
+
+Requires: aiohttp
+"""
+
+import aiohttp
+import argparse
+import asyncio
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from i2p_metrics import Metrics
+
+# === Configuration ===
+CONSOLE_HOST = "127.0.0.1"
+CONSOLE_PORTS = [7657]
+PAGE_PATH = "/tunnels"
+FETCH_INTERVAL = 60          # seconds between cycle starts
+RUN_DURATION = 24 * 60 * 60  # 24 hours
+MAX_CONCURRENCY = 64         # in-flight requests across the whole swarm
+TARGET_DEADLINE = 10         # seconds allowed per router per request
+KEEPALIVE_TIMEOUT = 2 * FETCH_INTERVAL
+
+OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "i2p_swarm_data")
+
+Target = namedtuple("Target", ["name", "base_url"])
+PollResult = namedtuple("PollResult", ["target", "timestamp", "status", "html", "elapsed", "error"])
+
+
+def make_targets(host, ports):
+    """One target per host console port, named by the port like the data/ captures."""
+    return [Target(str(port), f"http://{host}:{port}") for port in ports]
+
+
+class SwarmPoller:
+    """Concurrent console fetcher sharing one connection pool across all routers.
+
+    Fetch times, failures and queue depth are recorded in `metrics`
+    (i2p_metrics.Metrics).
+    """
+
+    def __init__(self, targets, path=PAGE_PATH, max_concurrency=MAX_CONCURRENCY,
+                 deadline=TARGET_DEADLINE, keepalive_timeout=KEEPALIVE_TIMEOUT, metrics=None):
+        self.targets = list(targets)
+        self.path = path
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self._semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.watch("i2p_fetch_in_flight", lambda: self.in_flight)
+        self.metrics.watch("i2p_fetch_waiting", lambda: self.waiting)
+
+    def set_targets(self, targets):
+        """Replace the routers polled from the next cycle on (connections and caches are kept)."""
+        self.targets = list(targets)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.deadline),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def fetch_text(self, target, path):
+        """GET base_url + path under the concurrency cap; raises on HTTP errors."""
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            async with self.session.get(target.base_url + path) as resp:
+                resp.raise_for_status()
+                return await resp.text()
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def fetch(self, target, timestamp=None):
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        start = time.perf_counter()
+        try:
+            html = await self.fetch_text(target, self.path)
+            result = PollResult(target, timestamp, "ok", html, time.perf_counter() - start, None)
+        except asyncio.TimeoutError:
+            result = PollResult(target, timestamp, "timeout", None, time.perf_counter() - start,
+                                f"no response within {self.deadline}s")
+        except Exception as e:
+            result = PollResult(target, timestamp, "error", None, time.perf_counter() - start, str(e))
+        self.metrics.observe("i2p_fetch_seconds", result.elapsed, status=result.status)
+        if result.status != "ok":
+            self.metrics.inc("i2p_errors_total", router=target.name, stage="fetch", kind=result.status)
+        return result
+
+    async def poll_cycle(self):
+        """Fetch every target once; all results of a cycle share one timestamp."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return await asyncio.gather(*(self.fetch(t, timestamp) for t in self.targets))
+
+    async def run(self, handler, interval=FETCH_INTERVAL, duration=RUN_DURATION):
+        """Poll every `interval` seconds for `duration`, passing each cycle to handler(results)."""
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < duration:
+            cycle_start = time.monotonic()
+            results = await self.poll_cycle()
+            outcome = handler(results)
+            if asyncio.iscoroutine(outcome):
+                await outcome
+            elapsed = time.monotonic() - cycle_start
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+
+def save_pages(output_dir):
+    """Cycle handler that keeps the latest page of each router as tunnels_data_<port>.html."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    def handler(results):
+        ok = 0
+        for result in results:
+            if result.status != "ok":
+                print(f"[{result.timestamp}] {result.target.name}: {result.status} ({result.error})")
+                continue
+            ok += 1
+            path = os.path.join(output_dir, f"tunnels_data_{result.target.name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(result.html)
+        slowest = max((r.elapsed for r in results), default=0.0)
+        now = results[0].timestamp if results else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{now}] Polled {ok}/{len(results)} routers, slowest {slowest:.2f}s.")
+
+    return handler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Poll /tunnels on every router console concurrently.")
+    parser.add_argument("--host", default=CONSOLE_HOST)
+    parser.add_argument("--ports", type=int, nargs="+", default=CONSOLE_PORTS,
+                        help="host console ports, one per router replica")
+    parser.add_argument("--interval", type=float, default=FETCH_INTERVAL)
+    parser.add_argument("--duration", type=float, default=RUN_DURATION)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--deadline", type=float, default=TARGET_DEADLINE)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    from i2p_targets import add_target_arguments   # i2p_targets builds on this module
+    add_target_arguments(parser)
+    return parser.parse_args()
+
+
+async def main():
+    from i2p_targets import initial_targets
+
+    args = parse_args()
+    targets, registry = initial_targets(args)
+    print(f"[START] Polling {len(targets)} routers every {args.interval}s...")
+    async with SwarmPoller(targets, max_concurrency=args.concurrency, deadline=args.deadline) as poller:
+        rediscovery = asyncio.ensure_future(registry.watch(poller.set_targets, args.refresh)) if registry else None
+        try:
+            await poller.run(save_pages(args.output_dir), args.interval, args.duration)
+        finally:
+            if rediscovery is not None:
+                rediscovery.cancel()
+    print("[DONE] Swarm polling complete.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Router Target Registry
+Discovers the router console endpoints to poll instead of hard-coding
+http://127.0.0.1:7657 or a port list. The stack in swarmi2p_install.yml
+publishes every port with `published: 0`, so each replica's console ends up
+on a random host port (32797, 32808, ...); targets are named by that port,
+like the captured files.
+
+Sources (--targets SPEC):
+
+  ports:32797,32808     a static list of host ports
+  file:targets.txt      one target per line: "<port>", "<host>:<port>" or
+                        "<name> <url>"; re-read on every refresh
+  docker[:<filter>]     `docker ps`: every container publishing the console
+                        port (7657), optionally only names containing <filter>
+  docker-api[:<socket>] the same through the Docker Engine API on its unix
+                        socket (default /var/run/docker.sock), no CLI needed
+  compose:<file>        services of a compose file publishing the console
+                        port; dynamic ("published: 0") ports are resolved
+                        with `docker compose -f <file> ps`
+
+TargetRegistry.watch() re-runs discovery periodically and applies the
+difference to a running SwarmPoller or AdaptiveScheduler, so routers can
+be added or removed mid-run; the collector keeps its netdb cache,
+change detectors and trackers. A failed discovery keeps the current
+targets.
+
+Usage (print what a source discovers):
+  python3 i2p_targets.py docker:i2p
+  python3 i2p_targets.py compose:../docker/swarmi2p_install.yml
+
+Requires: nothing beyond the standard library (PyYAML for compose files,
+the docker CLI for the docker and compose sources)
+"""
+
+import asyncio
+import http.client
+import json
+import re
+import socket
+import subprocess
+import sys
+from datetime import datetime
+
+from i2p_swarm_poller import CONSOLE_HOST, Target, make_targets
+
+# === Configuration ===
+CONSOLE_PORT = 7657                  # console port inside each container
+DOCKER_SOCKET = "/var/run/docker.sock"
+REFRESH_INTERVAL = 60                # seconds between discoveries
+DISCOVERY_TIMEOUT = 30               # seconds allowed for a docker call
+WILDCARD_HOSTS = ("", "0.0.0.0", "::", "[::]")
+
+_DOCKER_PORT_RE = re.compile(r"(?:(\[[0-9a-fA-F:]*\]|[\d.]+|::):)?(\d+)->(\d+)/tcp")
+
+
+def _target(host, port, name=None):
+    host = f"[{host}]" if ":" in host else host
+    return Target(name or str(port), f"http://{host}:{port}")
+
+
+def _host(ip, default):
+    return default if ip in WILDCARD_HOSTS else ip.strip("[]")
+
+
+class StaticSource:
+    """A fixed list of host console ports."""
+
+    def __init__(self, ports, host=CONSOLE_HOST):
+        self.ports = list(ports)
+        self.host = host
+
+    def discover(self):
+        return make_targets(self.host, self.ports)
+
+
+class FileSource:
+    """Targets listed in a text file, one per line ('#' starts a comment)."""
+
+    def __init__(self, path, host=CONSOLE_HOST):
+        self.path = path
+        self.host = host
+
+    def discover(self):
+        targets = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                fields = line.split()
+                if len(fields) == 2:
+                    targets.append(Target(fields[0], fields[1].rstrip("/")))
+                elif line.isdigit():
+                    targets.append(_target(self.host, int(line)))
+                else:
+                    host, _, port = line.rpartition(":")
+                    targets.append(_target(host.strip("[]") or self.host, int(port)))
+        return targets
+
+
+class DockerCliSource:
+    """Containers from `docker ps` that publish the console port."""
+
+    def __init__(self, name_filter=None, console_port=CONSOLE_PORT, host=CONSOLE_HOST, docker="docker"):
+        self.name_filter = name_filter
+        self.console_port = console_port
+        self.host = host
+        self.docker = docker
+
+    def discover(self):
+        output = subprocess.run(
+            [self.docker, "ps", "--format", "{{.Names}}\t{{.Ports}}"],
+            capture_output=True, text=True, check=True, timeout=DISCOVERY_TIMEOUT).stdout
+        return self.parse(output)
+
+    def parse(self, output):
+        targets = {}
+        for line in output.splitlines():
+            name, _, ports = line.partition("\t")
+            if self.name_filter and self.name_filter not in name:
+                continue
+            for ip, public, private in _DOCKER_PORT_RE.findall(ports):
+                if int(private) == self.console_port:
+                    target = _target(_host(ip, self.host), int(public))
+                    targets.setdefault(target.name, target)   # IPv4 and IPv6 bindings of one port
+        return sorted(targets.values(), key=lambda t: int(t.name))
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=DISCOVERY_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DockerApiSource:
+    """Containers from the Docker Engine API (GET /containers/json) publishing the console port."""
+
+    def __init__(self, socket_path=DOCKER_SOCKET, name_filter=None, console_port=CONSOLE_PORT,
+                 host=CONSOLE_HOST):
+        self.socket_path = socket_path
+        self.name_filter = name_filter
+        self.console_port = console_port
+        self.host = host
+
+    def discover(self):
+        conn = _UnixHTTPConnection(self.socket_path)
+        try:
+            conn.request("GET", "/containers/json")
+            resp = conn.getresponse()
+            if resp.status != 200:
+                raise RuntimeError(f"docker API answered {resp.status} {resp.reason}")
+            return self.parse(json.loads(resp.read()))
+        finally:
+            conn.close()
+
+    def parse(self, containers):
+        targets = {}
+        for container in containers:
+            names = " ".join(container.get("Names", []))
+            if self.name_filter and self.name_filter not in names:
+                continue
+            for port in container.get("Ports", []):
+                if port.get("PrivatePort") == self.console_port and port.get("PublicPort") \
+                        and port.get("Type", "tcp") == "tcp":
+                    target = _target(_host(port.get("IP", ""), self.host), port["PublicPort"])
+                    targets.setdefault(target.name, target)
+        return sorted(targets.values(), key=lambda t: int(t.name))
+
+
+class ComposeSource:
+    """Services of a compose file that publish the console port.
+
+    Fixed published ports are read from the file; services publishing it
+    dynamically are looked up in the running project.
+    """
+
+    def __init__(self, path, console_port=CONSOLE_PORT, host=CONSOLE_HOST, docker="docker"):
+        self.path = path
+        self.console_port = console_port
+        self.host = host
+        self.docker = docker
+
+    def published_ports(self):
+        """{service: [published port, 0 when dynamic]} for the console port."""
+        import yaml
+
+        with open(self.path, encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        services = {}
+        for service, spec in (config.get("services") or {}).items():
+            for entry in (spec or {}).get("ports") or []:
+                published = self._published(entry)
+                if published is not None:
+                    services.setdefault(service, []).append(published)
+        return services
+
+    def _published(self, entry):
+        """Published host port for a console-port mapping, 0 if dynamic, None if another port."""
+        if isinstance(entry, dict):
+            if int(entry.get("target", -1)) != self.console_port or entry.get("protocol", "tcp") != "tcp":
+                return None
+            return int(entry.get("published") or 0)
+        text, _, protocol = str(entry).partition("/")
+        if protocol and protocol.lower() != "tcp":
+            return None
+        host_part, _, container = text.rpartition(":")
+        if not container.isdigit() or int(container) != self.console_port:
+            return None
+        port = host_part.rpartition(":")[2]
+        return int(port) if port.isdigit() else 0
+
+    def discover(self):
+        services = self.published_ports()
+        targets = {}
+        for ports in services.values():
+            for port in ports:
+                if port:
+                    target = _target(self.host, port)
+                    targets[target.name] = target
+        if any(0 in ports for ports in services.values()):
+            output = subprocess.run(
+                [self.docker, "compose", "-f", self.path, "ps", "--format", "json"],
+                capture_output=True, text=True, check=True, timeout=DISCOVERY_TIMEOUT).stdout
+            for target in self.parse_ps(output, {s for s, ports in services.items() if 0 in ports}):
+                targets[target.name] = target
+        return sorted(targets.values(), key=lambda t: int(t.name))
+
+    def parse_ps(self, output, services):
+        """`docker compose ps --format json` output: one JSON array, or one object per line."""
+        output = output.strip()
+        if not output:
+            return []
+        rows = json.loads(output) if output.startswith("[") else [json.loads(line) for line in output.splitlines()]
+        targets = []
+        for row in rows:
+            if row.get("Service") not in services:
+                continue
+            for publisher in row.get("Publishers") or []:
+                if publisher.get("TargetPort") == self.console_port and publisher.get("PublishedPort"):
+                    targets.append(_target(_host(publisher.get("URL", ""), self.host), publisher["PublishedPort"]))
+        return targets
+
+
+def make_source(spec, host=CONSOLE_HOST, console_port=CONSOLE_PORT):
+    """Source for a --targets SPEC (see module docstring)."""
+    kind, _, arg = spec.partition(":")
+    if kind == "ports":
+        return StaticSource([int(p) for p in re.split(r"[,\s]+", arg) if p], host)
+    if kind == "file":
+        return FileSource(arg, host)
+    if kind == "docker":
+        return DockerCliSource(arg or None, console_port, host)
+    if kind == "docker-api":
+        return DockerApiSource(arg or DOCKER_SOCKET, console_port=console_port, host=host)
+    if kind == "compose":
+        return ComposeSource(arg, console_port, host)
+    raise ValueError(f"unknown target source {spec!r} (ports:, file:, docker, docker-api, compose:)")
+
+
+class TargetRegistry:
+    """Current targets of a source, with the difference of each rediscovery."""
+
+    def __init__(self, source):
+        self.source = source
+        self.targets = {}     # name -> Target
+        self.stats = {"refreshes": 0, "failures": 0, "added": 0, "removed": 0}
+
+    def refresh(self):
+        """Rediscover; returns (added, removed) Target lists. Raises if discovery fails."""
+        discovered = {target.name: target for target in self.source.discover()}
+        added = [t for name, t in discovered.items() if self.targets.get(name) != t]
+        removed = [t for name, t in self.targets.items() if discovered.get(name) != t]
+        self.targets = discovered
+        self.stats["refreshes"] += 1
+        self.stats["added"] += len(added)
+        self.stats["removed"] += len(removed)
+        return added, removed
+
+    def current(self):
+        return list(self.targets.values())
+
+    async def watch(self, apply, interval=REFRESH_INTERVAL):
+        """Rediscover every `interval` seconds and call apply(targets) on changes,
+        until cancelled. Discovery runs in a thread; failures keep the targets."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                added, removed = await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                self.stats["failures"] += 1
+                print(f"[WARN] Target discovery failed, keeping {len(self.targets)} routers: {e}", file=sys.stderr)
+                continue
+            if added or removed:
+                apply(self.current())
+                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                print(f"[{now}] Targets: +{len(added)} -{len(removed)}, now {len(self.targets)} routers"
+                      + (f" (added {' '.join(t.name for t in added[:10])}{' ...' if len(added) > 10 else ''})"
+                         if added else ""))
+
+
+def initial_targets(args):
+    """(targets, registry or None) for a collector's --targets / --host / --ports arguments."""
+    if not getattr(args, "targets", None):
+        return make_targets(args.host, args.ports), None
+    registry = TargetRegistry(make_source(args.targets, args.host))
+    registry.refresh()
+    return registry.current(), registry
+
+
+def add_target_arguments(parser):
+    parser.add_argument("--targets", metavar="SPEC",
+                        help="discover routers instead of --ports: ports:P1,P2 | file:PATH | docker[:NAME] | "
+                             "docker-api[:SOCKET] | compose:FILE (re-discovered every --refresh seconds)")
+    parser.add_argument("--refresh", type=float, default=REFRESH_INTERVAL,
+                        help="seconds between target rediscoveries")
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.split("Usage")[0].strip())
+        return 1
+    registry = TargetRegistry(make_source(sys.argv[1]))
+    registry.refresh()
+    for target in registry.current():
+        print(f"{target.name}\t{target.base_url}")
+    print(f"[DONE] {len(registry.targets)} routers", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
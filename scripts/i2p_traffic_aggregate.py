@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Traffic Metadata Aggregation
+Exact, out-of-core statistics over the multi-million-row traffic metadata
+CSVs (i2pmetadata-*.csv, TrafficMetadata*.csv), replacing the notebook's
+load-everything-then-sample approach.
+
+The file is split into newline-aligned byte ranges, and each range is read
+in fixed-size blocks and reduced to partial aggregates. Ranges can be
+handled by a process pool, and the partials are then merged. Memory grows
+with the number of distinct IPs, edges and time buckets, never with the row
+count. Results:
+
+  edges.csv            Src IP, Dst IP, Packets, Bytes     (graph weights)
+  ips.csv              per IP packets/bytes sent and received
+  top_talkers.csv      top-k sources by bytes sent
+  timeline.csv         packets/bytes per time bucket
+  protocols.csv        packets/bytes per protocol
+  size_histogram.csv   packet-size histogram (exact per-byte counts kept,
+                       binned on output)
+
+Both CSV layouts are accepted: the 8-column cleaned export
+(Time,Src IP,Src Port,Dst IP,Dst Port,Proto,TTL,PacketSize(Bytes)) and the
+raw i2pmetadata-4-17-25-final.sh output, whose rows carry separate TCP and
+UDP port fields.
+
+Usage:
+  python3 i2p_traffic_aggregate.py TrafficMetadata.csv out/ [--workers 8] [--bucket 60] [--top 20]
+
+Requires: pandas, numpy
+"""
+
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# === Configuration ===
+BLOCK_BYTES = 16 * 1024 * 1024      # raw bytes parsed at once per worker (~20x that in memory)
+BUCKET_SECONDS = 60                 # timeline resolution
+TOP_K = 20
+MAX_PACKET_SIZE = 65535
+SIZE_BINS = (0, 64, 128, 256, 512, 1024, 1280, 1500, 9000, MAX_PACKET_SIZE + 1)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+COLUMNS = ["Time", "Src IP", "Src Port", "Dst IP", "Dst Port", "Proto", "TTL", "PacketSize(Bytes)"]
+# raw tshark fields as written by i2pmetadata-4-17-25-final.sh
+RAW_COLUMNS = ["Time", "Src IP", "TCP Src Port", "UDP Src Port", "Dst IP", "TCP Dst Port", "UDP Dst Port",
+               "Proto", "TTL", "PacketSize(Bytes)"]
+SIZE = "PacketSize(Bytes)"
+USED_COLUMNS = ["Time", "Src IP", "Dst IP", "Proto", SIZE]   # ports and TTL are not aggregated
+TOTALS = ["Packets", "Bytes"]
+
+
+def _totals(groups):
+    return groups[SIZE].agg(["size", "sum"]).set_axis(TOTALS, axis=1)
+
+
+def _merge(a, b):
+    """Sum two partial total frames that share an index layout."""
+    if a is None:
+        return b
+    if b is None or b.empty:
+        return a
+    return pd.concat([a, b]).groupby(level=list(range(a.index.nlevels)), sort=False).sum()
+
+
+class TrafficAggregate:
+    """Mergeable exact totals: edges, per-IP, timeline, protocols, packet sizes."""
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.edges = None          # (Src IP, Dst IP) -> Packets, Bytes
+        self.timeline = None       # bucket start -> Packets, Bytes
+        self.protocols = None      # Proto -> Packets, Bytes
+        self.sizes = np.zeros(MAX_PACKET_SIZE + 2, dtype=np.int64)   # last slot: unparseable sizes
+        self.rows = 0
+        self.skipped = 0
+
+    def add_frame(self, df):
+        """Fold a block of rows (USED_COLUMNS) into the totals."""
+        self.rows += len(df)
+        size = pd.to_numeric(df[SIZE], errors="coerce")
+        stamps = pd.to_datetime(df["Time"], format=TIMESTAMP_FORMAT, errors="coerce")
+        valid = size.notna() & df["Src IP"].notna() & df["Dst IP"].notna()
+        self.skipped += int((~valid).sum())
+        df = pd.DataFrame({"Src IP": df["Src IP"], "Dst IP": df["Dst IP"], "Proto": df["Proto"].fillna(""),
+                           "Bucket": stamps.dt.floor(f"{self.bucket_seconds}s"), SIZE: size})[valid]
+        df[SIZE] = df[SIZE].astype(np.int64)
+
+        self.edges = _merge(self.edges, _totals(df.groupby(["Src IP", "Dst IP"], sort=False, observed=True)))
+        self.timeline = _merge(self.timeline, _totals(df.dropna(subset=["Bucket"]).groupby("Bucket", sort=False)))
+        self.protocols = _merge(self.protocols, _totals(df.groupby("Proto", sort=False)))
+        clipped = df[SIZE].to_numpy().clip(0, MAX_PACKET_SIZE + 1)
+        self.sizes += np.bincount(clipped, minlength=len(self.sizes))
+
+    def merge(self, other):
+        self.edges = _merge(self.edges, other.edges)
+        self.timeline = _merge(self.timeline, other.timeline)
+        self.protocols = _merge(self.protocols, other.protocols)
+        self.sizes += other.sizes
+        self.rows += other.rows
+        self.skipped += other.skipped
+        return self
+
+    # --- plot-ready results ---
+
+    def edge_table(self):
+        if self.edges is None:
+            return pd.DataFrame(columns=["Src IP", "Dst IP"] + TOTALS)
+        return self.edges.sort_values("Bytes", ascending=False, kind="mergesort").reset_index()
+
+    def ip_table(self):
+        edges = self.edge_table()
+        sent = edges.groupby("Src IP")[TOTALS].sum().add_suffix(" Sent")
+        received = edges.groupby("Dst IP")[TOTALS].sum().add_suffix(" Received")
+        table = sent.join(received, how="outer").fillna(0).astype(np.int64)
+        table["Bytes Total"] = table["Bytes Sent"] + table["Bytes Received"]
+        table.index.name = "IP"
+        return table.sort_values("Bytes Total", ascending=False, kind="mergesort").reset_index()
+
+    def top_talkers(self, k=TOP_K, by="Bytes Sent"):
+        return self.ip_table().nlargest(k, by, keep="first").reset_index(drop=True)
+
+    def timeline_table(self):
+        if self.timeline is None:
+            return pd.DataFrame(columns=["Time"] + TOTALS)
+        return self.timeline.sort_index().rename_axis("Time").reset_index()
+
+    def protocol_table(self):
+        if self.protocols is None:
+            return pd.DataFrame(columns=["Proto"] + TOTALS)
+        return self.protocols.sort_values("Packets", ascending=False, kind="mergesort").reset_index()
+
+    def size_histogram(self, bins=SIZE_BINS):
+        """Packets per [start, end) size bin; sizes are kept exactly, so any bins work."""
+        cumulative = np.concatenate([[0], np.cumsum(self.sizes[:MAX_PACKET_SIZE + 1])])
+        edges = np.clip(np.asarray(bins), 0, MAX_PACKET_SIZE + 1)
+        return pd.DataFrame({"Bin Start": edges[:-1], "Bin End": edges[1:],
+                             "Packets": cumulative[edges[1:]] - cumulative[edges[:-1]]})
+
+    def size_stats(self):
+        counts = self.sizes[:MAX_PACKET_SIZE + 1]
+        total = int(counts.sum())
+        if not total:
+            return {"packets": 0}
+        values = np.arange(len(counts))
+        mean = float((values * counts).sum() / total)
+        cumulative = np.cumsum(counts)
+        median, p95 = np.searchsorted(cumulative, [0.5 * total, 0.95 * total])
+        return {"packets": total, "bytes": int((values * counts).sum()), "mean": mean,
+                "median": int(median), "p95": int(p95), "max": int(values[counts > 0][-1])}
+
+    def write(self, output_dir, k=TOP_K, bins=SIZE_BINS):
+        os.makedirs(output_dir, exist_ok=True)
+        tables = {
+            "edges": self.edge_table(), "ips": self.ip_table(), "top_talkers": self.top_talkers(k),
+            "timeline": self.timeline_table(), "protocols": self.protocol_table(),
+            "size_histogram": self.size_histogram(bins),
+        }
+        for name, table in tables.items():
+            table.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
+        return tables
+
+
+# --- Reading -------------------------------------------------------------------
+
+def _layout(path):
+    """(header line present, column names) from the first lines of the file."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        first = f.readline()
+        second = f.readline()
+    has_header = first.startswith("Time,")
+    sample = second if has_header else first
+    return has_header, RAW_COLUMNS if sample.count(",") + 1 == len(RAW_COLUMNS) else COLUMNS
+
+
+def byte_ranges(path, parts):
+    """Split a file into `parts` newline-aligned (start, end) byte ranges."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(bounds[-1], size * i // parts))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _blocks(path, start, end, block_bytes):
+    """Raw byte blocks of [start, end), each ending on a line boundary."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            block = f.read(min(block_bytes, end - f.tell()))
+            if f.tell() < end and not block.endswith(b"\n"):
+                block += f.readline()
+            yield block
+
+
+def aggregate_range(path, start, end, columns, skip_header=False, bucket_seconds=BUCKET_SECONDS,
+                    block_bytes=BLOCK_BYTES):
+    """Worker: totals of one byte range, parsed a block at a time."""
+    aggregate = TrafficAggregate(bucket_seconds)
+    for i, block in enumerate(_blocks(path, start, end, block_bytes)):
+        df = pd.read_csv(io.BytesIO(block), header=None, names=columns, usecols=USED_COLUMNS,
+                         skiprows=1 if skip_header and i == 0 else 0, dtype={"Src IP": str, "Dst IP": str, "Proto": str, "Time": str},
+                         on_bad_lines="skip", encoding_errors="replace", low_memory=False)
+        aggregate.add_frame(df)
+    return aggregate
+
+
+def aggregate(path, workers=1, bucket_seconds=BUCKET_SECONDS, block_bytes=BLOCK_BYTES):
+    """Exact TrafficAggregate of a whole CSV, across `workers` processes."""
+    has_header, columns = _layout(path)
+    ranges = byte_ranges(path, max(1, workers))
+    jobs = [(path, start, end, columns, has_header and start == 0, bucket_seconds, block_bytes)
+            for start, end in ranges]
+    total = TrafficAggregate(bucket_seconds)
+    if workers <= 1:
+        for job in jobs:
+            total.merge(aggregate_range(*job))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(aggregate_range, *zip(*jobs)):
+            total.merge(partial)
+    return total
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exact streaming aggregates of a traffic metadata CSV.")
+    parser.add_argument("csv", help="traffic metadata CSV (cleaned export or raw capture output)")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bucket", type=int, default=BUCKET_SECONDS, help="timeline bucket in seconds")
+    parser.add_argument("--top", type=int, default=TOP_K, help="number of top talkers")
+    parser.add_argument("--block-mb", type=int, default=BLOCK_BYTES // (1024 * 1024),
+                        help="raw megabytes parsed at once per worker")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    print(f"[START] Aggregating {args.csv} with {args.workers} workers...")
+    result = aggregate(args.csv, args.workers, args.bucket, args.block_mb * 1024 * 1024)
+    tables = result.write(args.output_dir, args.top)
+    stats = result.size_stats()
+    print(f"[DONE] {result.rows} rows ({result.skipped} skipped) in {time.time() - start:.1f}s: "
+          f"{len(tables['edges'])} edges, {len(tables['ips'])} IPs, {len(tables['timeline'])} buckets, "
+          f"{stats.get('bytes', 0)} bytes, median packet {stats.get('median', 0)} B -> {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Console Fast Section Parser
+Extracts the tunnel and profile tables straight from the raw console HTML
+without building a DOM. Each parser jumps to its section header with a
+string search, slices out the following table and tokenizes only its rows
+and cells, so the router summary sidebar, scripts and unrelated tables are
+never touched.
+
+The records are those of the original BeautifulSoup/html5lib collectors
+(same keys, same get_text/strip semantics), apart from the intended
+differences listed at check(). tests/test_tunnel_parser.py asserts that
+over every recorded page; running this file does the same and reports the
+speedup:
+
+  python3 i2p_tunnel_parser.py ../data
+
+Requires: nothing beyond the standard library (the check needs beautifulsoup4, html5lib)
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+from html import unescape
+
+CLIENT_SECTION_TITLE = "Client tunnels for shared clients"
+EXPLORATORY_SECTION_TITLE = "Exploratory tunnels"
+MULTI_PEERS_SECTION_TITLE = "Peers in multiple participating tunnels (including inactive)"
+CLIENT_ROLES = ["Gateway", "Participant", "Endpoint"]
+
+_TAG_RE = re.compile(r"<!--.*?-->|<[^>]*>", re.S)
+_TR_RE = re.compile(r"<tr\b", re.I)
+_TD_RE = re.compile(r"<td\b[^>]*>", re.I)
+_IMG_RE = re.compile(r"<img\b([^>]*)>", re.I)
+_A_RE = re.compile(r"<a\b([^>]*)>(.*?)</a>", re.I | re.S)
+_TT_RE = re.compile(r"<tt\b[^>]*>(.*?)</tt>", re.I | re.S)
+_PEER_SPAN_RE = re.compile(r'<span\b[^>]*\bclass="([^"]*)"[^>]*>(.*?)</span>', re.I | re.S)
+_CLIENT_HEADER_RE = re.compile(
+    r"<h3\b[^>]*>(?:\s*<a\b[^>]*>\s*</a>)?\s*" + re.escape(CLIENT_SECTION_TITLE), re.I)
+_EXPLORATORY_HEADER_RE = re.compile(
+    r"<h3\b[^>]*>(?:\s*<a\b[^>]*>\s*</a>)?\s*" + re.escape(EXPLORATORY_SECTION_TITLE), re.I)
+_NETDB_HREF_RE = re.compile(r'href="netdb\?r=([^"]+)"')
+_PARTICIPATING_HEADER_RE = re.compile(r'<h3\b[^>]*\bid="participating"', re.I)
+_MULTI_PEERS_HEADER_RE = re.compile(
+    r'<h3\b[^>]*\bclass="[^"]*\btabletitle\b[^"]*"[^>]*>' + re.escape(MULTI_PEERS_SECTION_TITLE) + r"</h3>",
+    re.I)
+_TUNNELDISPLAY_TABLE_RE = re.compile(r'<table\b[^>]*\bclass="[^"]*\btunneldisplay\b[^"]*"[^>]*>', re.I)
+_PARTICIPATING_TABLE_RE = re.compile(r'<table\b[^>]*\bclass="tunneldisplay tunnels_participating"[^>]*>', re.I)
+_PROFILE_TABLE_RE = re.compile(r'<table\b[^>]*\bid="profilelist"[^>]*>', re.I)
+
+
+# === Tokenizer helpers ===
+
+def _attr(attrs, name):
+    match = re.search(r'(?:^|\s)' + name + r'="([^"]*)"', attrs)
+    return unescape(match.group(1)) if match else None
+
+
+def _strings(fragment):
+    return [unescape(s) for s in _TAG_RE.split(fragment) if s]
+
+
+def _text_strip(fragment):
+    """BeautifulSoup get_text(strip=True): every text node stripped, then joined."""
+    return "".join(s.strip() for s in _strings(fragment))
+
+
+def _text(fragment):
+    """BeautifulSoup .text: all text nodes joined as-is."""
+    return "".join(_strings(fragment))
+
+
+def _section_table(html, header_re, table_re):
+    """The table following the first header match, or None."""
+    header = header_re.search(html)
+    if not header:
+        return None
+    table = table_re.search(html, header.end())
+    if not table:
+        return None
+    end = html.find("</table>", table.end())
+    return html[table.end():end if end != -1 else len(html)]
+
+
+def _rows(table):
+    """Cell fragments of every row after the header row; copes with unclosed <td>/<tr>."""
+    starts = [m.start() for m in _TR_RE.finditer(table)]
+    for i, start in enumerate(starts[1:], 1):
+        row = table[start:starts[i + 1] if i + 1 < len(starts) else len(table)]
+        tds = list(_TD_RE.finditer(row))
+        cells = []
+        for j, td in enumerate(tds):
+            cell = row[td.end():tds[j + 1].start() if j + 1 < len(tds) else len(row)]
+            close = cell.find("</td>")
+            cells.append(cell[:close] if close != -1 else cell)
+        yield cells
+
+
+def _img_title(cell):
+    """title of the first <img> (the country flag), else "Unknown"."""
+    img = _IMG_RE.search(cell)
+    title = _attr(img.group(1), "title") if img else None
+    return title if title is not None else "Unknown"
+
+
+def _netdb_link(fragment):
+    """(full ID, abbreviation) from the first <a> when it points at netdb?r=."""
+    a_tag = _A_RE.search(fragment)
+    if a_tag:
+        href = _attr(a_tag.group(1), "href") or ""
+        if "netdb?r=" in href:
+            return href.split("netdb?r=")[-1], _text_strip(a_tag.group(2))
+    return None
+
+
+# === Section parsers ===
+
+def _parse_pool_tunnels(html, header_re):
+    """Rows of a client or exploratory pool table (same layout)."""
+    table = _section_table(html, header_re, _TUNNELDISPLAY_TABLE_RE)
+    if table is None:
+        return []
+
+    records = []
+    seen = set()
+    for cells in _rows(table):
+        if len(cells) < 7:
+            continue
+        direction = _attr(_IMG_RE.search(cells[0]).group(1), "alt")
+        expiration = _text_strip(cells[1])
+        usage = _text_strip(cells[2])
+
+        for i, role in enumerate(CLIENT_ROLES):
+            for span in _PEER_SPAN_RE.finditer(cells[3 + i]):
+                if "tunnel_peer" not in span.group(1).split():
+                    continue
+                body = span.group(2)
+                country = _img_title(body)
+                node_id = "Unknown"
+                abbrev = "Unknown"
+                tt = _TT_RE.search(body)
+                link = _netdb_link(tt.group(1)) if tt else None
+                if link:
+                    node_id, abbrev = link
+                elif "Local" in _text(body):
+                    node_id = "Local"
+                    abbrev = "Local"
+                    country = "Localhost"
+
+                key = (direction, node_id, role)
+                if key in seen:
+                    continue
+                seen.add(key)
+                records.append({
+                    "Direction": direction, "Expiration": expiration, "Usage": usage,
+                    "Node Role": role, "Node Abbrev": abbrev, "Full ID": node_id,
+                    "Country": country,
+                    "IP Address": "127.0.0.1" if node_id == "Local" else "Unknown",
+                })
+    return records
+
+
+def parse_client_tunnels(html):
+    return _parse_pool_tunnels(html, _CLIENT_HEADER_RE)
+
+
+def parse_exploratory_tunnels(html):
+    return _parse_pool_tunnels(html, _EXPLORATORY_HEADER_RE)
+
+
+# pool -> (start, end) patterns of the shell collectors' peer-list greps (Xfetch_tunnels_data.sh,
+# Xdynamic_high_capacity_peers.sh)
+POOL_GREPS = {
+    "client": (CLIENT_SECTION_TITLE, "</table>"),
+    "exploratory": (EXPLORATORY_SECTION_TITLE, CLIENT_SECTION_TITLE),
+    "high_capacity": ("High Capacity", "</table>"),
+}
+GREP_CONTEXT = 1000
+
+
+def grep_peer_ids(html, start, end, context=GREP_CONTEXT):
+    """netdb?r= IDs as `grep -A <context> start | grep -B <context> end | grep -oP ...` finds them:
+    line windows rather than tables, so e.g. the client list also takes in the participating
+    tables further down the page."""
+    lines = html.split("\n")
+    after = []
+    shown = -1
+    for i, line in enumerate(lines):
+        if start in line:
+            if after and i > shown + 1:
+                after.append("--")   # grep's group separator, which counts towards -B
+            after.extend(lines[max(i, shown + 1):i + context + 1])
+            shown = max(shown, i + context)
+    kept = set()
+    for i, line in enumerate(after):
+        if end in line:
+            kept.update(range(max(0, i - context), i + 1))
+    return [peer_id for i in sorted(kept) for peer_id in _NETDB_HREF_RE.findall(after[i])]
+
+
+def parse_pool_peer_ids(html, pool):
+    """Peer ID list of a "client", "exploratory" or "high_capacity" pool, derived as the shell
+    collectors wrote client_tunnels_<port>.txt, exploratory_tunnels_<port>.txt and
+    high_capacity_peers.txt (in page order with repeats)."""
+    return grep_peer_ids(html, *POOL_GREPS[pool])
+
+
+def parse_pool_paths(html, pool):
+    """(direction, hop IDs gateway..endpoint) per "client" or "exploratory"
+    tunnel row; hops are full IDs, "Local" (this router) or "Unknown"."""
+    header_re = _CLIENT_HEADER_RE if pool == "client" else _EXPLORATORY_HEADER_RE
+    table = _section_table(html, header_re, _TUNNELDISPLAY_TABLE_RE)
+    if table is None:
+        return []
+    paths = []
+    for cells in _rows(table):
+        if len(cells) < 7:
+            continue
+        hops = []
+        for cell in cells[3:]:
+            for span in _PEER_SPAN_RE.finditer(cell):
+                if "tunnel_peer" not in span.group(1).split():
+                    continue
+                tt = _TT_RE.search(span.group(2))
+                link = _netdb_link(tt.group(1)) if tt else None
+                hops.append(link[0] if link else "Local" if "Local" in _text(span.group(2)) else "Unknown")
+        if hops:
+            paths.append((_attr(_IMG_RE.search(cells[0]).group(1), "alt"), hops))
+    return paths
+
+
+def _participating_peer(cell):
+    if "Local" in _text_strip(cell):
+        return ("Local", "Local")
+    link = _netdb_link(cell)
+    if link:
+        return link
+    tt = _TT_RE.search(cell)
+    if tt:
+        text = _text_strip(tt.group(1))
+        return (text, text)
+    return ("Unknown", "Unknown")
+
+
+def parse_participating_tunnels(html):
+    table = _section_table(html, _PARTICIPATING_HEADER_RE, _PARTICIPATING_TABLE_RE)
+    if table is None:
+        return []
+
+    records = []
+    for cells in _rows(table):
+        if len(cells) < 8:
+            continue
+        record = {"Receive on": _text_strip(cells[0]), "Send on": _text_strip(cells[2])}
+        for prefix, cell in (("From", cells[1]), ("To", cells[3])):
+            full_id, abbrev = _participating_peer(cell)
+            record[f"{prefix} Full ID"] = full_id
+            record[f"{prefix} Country"] = _img_title(cell)
+            record[f"{prefix} Abbrev"] = abbrev
+            record[f"{prefix} IP"] = "Unknown"
+        record["Expiration"] = _text_strip(cells[4])
+        record["Usage"] = _text_strip(cells[5])
+        record["Rate"] = _text_strip(cells[6])
+        record["Role"] = _text_strip(cells[7])
+        records.append(record)
+    return records
+
+
+def parse_multi_peers(html):
+    table = _section_table(html, _MULTI_PEERS_HEADER_RE, _PARTICIPATING_TABLE_RE)
+    if table is None:
+        return []
+
+    records = []
+    for cells in _rows(table):
+        if len(cells) < 3:
+            continue
+        peer_id = "Unknown"
+        for a_tag in _A_RE.finditer(cells[0]):
+            if _attr(a_tag.group(1), "title") == "NetDb entry":
+                peer_id = (_attr(a_tag.group(1), "href") or "").split("netdb?r=")[-1]
+                break
+        records.append({
+            "Full Peer ID": peer_id,
+            "Country": _img_title(cells[0]),
+            "Tunnels": _text_strip(cells[1]),
+            "Usage": _text_strip(cells[2]),
+        })
+    return records
+
+
+def parse_profiles(html):
+    """Rows of the /profiles?f=1 "profilelist" table."""
+    table_start = _PROFILE_TABLE_RE.search(html)
+    if not table_start:
+        return []
+    end = html.find("</table>", table_start.end())
+    table = html[table_start.end():end if end != -1 else len(html)]
+
+    records = []
+    for cells in _rows(table):
+        if len(cells) < 9:
+            continue
+        a_tag = _A_RE.search(cells[0])
+        records.append({
+            "Country": _img_title(cells[0]),
+            "Node Abbrev": _text(a_tag.group(2)).strip() if a_tag else "Unknown",
+            "Full Node ID": (_attr(a_tag.group(1), "href") or "").split("netdb?r=")[-1] if a_tag else "Unknown",
+            "Groups": _text(cells[1]).strip(),
+            "Caps": _text(cells[2]).strip(),
+            "Version": _text(cells[3]).strip(),
+            "Speed": _text(cells[4]).strip(),
+            "Capacity": _text(cells[5]).strip(),
+            "Integration": _text(cells[6]).strip(),
+            "Status": _text(cells[7]).strip(),
+            "IP Address": "Unknown",
+        })
+    return records
+
+
+# === Differential check against the original collectors ===
+#
+# The oracle is the extraction code of the original collector scripts:
+# extract_tunnel_data() (i2pparticipat-tun-24h-4-18-25.py) and
+# extract_peer_data() (i2p_participating_peers.py) are loaded from the
+# scripts themselves; the client tunnel and profiles loggers extract inline
+# in their capture loops, so those loop bodies are reproduced below with
+# only the netdb lookup left out. Intended differences (see as_legacy()):
+#
+#   - the client section is found by its title: its h3 id ("UsNd" in the
+#     client logger) is generated per router session, and none of the
+#     recorded pages has that id, so the original yields no rows at all.
+#     The oracle is given each page's actual id.
+#   - "Local" hops (a tunnel_local span without <tt>) are recorded as
+#     Full ID "Local", Country "Localhost", IP 127.0.0.1; the original only
+#     looked for "Local" inside <tt> and logged them as Unknown.
+#   - IP columns are "Unknown"; they are filled in later by the resolver.
+
+_CLIENT_ID_RE = re.compile(r'<h3\b[^>]*\bid="([^"]*)"[^>]*>(?:\s*<a\b[^>]*>\s*</a>)?\s*'
+                           + re.escape(CLIENT_SECTION_TITLE), re.I)
+_EXPLORATORY_ID = "exploratorytunnels"
+
+
+def _legacy_functions(script, names):
+    """Functions `names` of an original collector script, without running its capture loop."""
+    import ast
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    body = [node for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))
+            or isinstance(node, ast.FunctionDef) and node.name in names]
+    namespace = {"get_node_ip": lambda node_id: "Unknown", "print": lambda *args, **kwargs: None}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), namespace)
+    return [namespace[name] for name in names]
+
+
+def _legacy_pool_tunnels(html, header_id):
+    """The client logger's row loop (i2p_client_tunnels_24h_4_19_25.py) for the section with `header_id`."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html5lib")
+    header = soup.find("h3", id=header_id)
+    table = header.find_next("table", class_="tunneldisplay") if header else None
+    if not table:
+        return []
+    records = []
+    seen = set()
+    for row in table.find_all("tr")[1:]:
+        cells = row.find_all("td")
+        if len(cells) < 7:
+            continue
+        direction = cells[0].find("img")["alt"]
+        expiration = cells[1].get_text(strip=True)
+        usage = cells[2].get_text(strip=True)
+        for i, role in enumerate(CLIENT_ROLES):
+            for span in cells[3 + i].find_all("span", class_="tunnel_peer"):
+                country = node_id = abbrev = ip = "Unknown"
+                img = span.find("img")
+                if img:
+                    country = img.get("title", "Unknown")
+                tt = span.find("tt")
+                if tt:
+                    a_tag = tt.find("a")
+                    if a_tag and "netdb?r=" in a_tag.get("href", ""):
+                        node_id = a_tag["href"].split("netdb?r=")[-1]
+                        abbrev = a_tag.get_text(strip=True)
+                    elif "Local" in tt.text:
+                        node_id = abbrev = "Local"
+                        ip = "127.0.0.1"
+                        country = "Localhost"
+                if (direction, node_id, role) not in seen:
+                    seen.add((direction, node_id, role))
+                    records.append({
+                        "Direction": direction, "Expiration": expiration, "Usage": usage,
+                        "Node Role": role, "Node Abbrev": abbrev, "Full ID": node_id,
+                        "Country": country, "IP Address": ip,
+                    })
+    return records
+
+
+def _legacy_profiles(html):
+    """The profiles logger's row loop (i2p_profiles_24h_4_20_25.py)."""
+    from bs4 import BeautifulSoup
+
+    table = BeautifulSoup(html, "html5lib").find("table", id="profilelist")
+    if not table:
+        return []
+    records = []
+    for row in table.find_all("tr")[1:]:
+        cells = row.find_all("td")
+        if len(cells) < 9:
+            continue
+        img = cells[0].find("img")
+        a = cells[0].find("a")
+        records.append({
+            "Country": img.get("title", "Unknown") if img else "Unknown",
+            "Node Abbrev": a.text.strip() if a else "Unknown",
+            "Full Node ID": a.get("href", "").split("netdb?r=")[-1] if a else "Unknown",
+            "Groups": cells[1].text.strip(), "Caps": cells[2].text.strip(),
+            "Version": cells[3].text.strip(), "Speed": cells[4].text.strip(),
+            "Capacity": cells[5].text.strip(), "Integration": cells[6].text.strip(),
+            "Status": cells[7].text.strip(), "IP Address": "Unknown",
+        })
+    return records
+
+
+def legacy_oracles():
+    """{section: html -> records} with the original collectors' extraction."""
+    from i2p_tunnel_snapshot import MultiTunnelPeerExtractor, ParticipatingTunnelExtractor
+
+    extract_tunnel_data, _ = _legacy_functions("i2pparticipat-tun-24h-4-18-25.py",
+                                               ["extract_tunnel_data", "extract_peer_from_cell"])
+    extract_peer_data, = _legacy_functions("i2p_participating_peers.py", ["extract_peer_data"])
+
+    def client(html):
+        header = _CLIENT_ID_RE.search(html)
+        return _legacy_pool_tunnels(html, header.group(1)) if header else []
+
+    return {
+        "client": client,
+        "exploratory": lambda html: _legacy_pool_tunnels(html, _EXPLORATORY_ID),
+        "participating": lambda html: [dict(zip(ParticipatingTunnelExtractor.headers, row))
+                                       for row in extract_tunnel_data(html)],
+        "multi_peers": lambda html: [dict(zip(MultiTunnelPeerExtractor.headers, row))
+                                     for row in extract_peer_data(html)],
+        "profiles": _legacy_profiles,
+    }
+
+
+FAST_PARSERS = {
+    "client": parse_client_tunnels,
+    "exploratory": parse_exploratory_tunnels,
+    "participating": parse_participating_tunnels,
+    "multi_peers": parse_multi_peers,
+    "profiles": parse_profiles,
+}
+
+
+def as_legacy(section, records):
+    """Fast parser records with the intended differences undone (Local hops back to Unknown)."""
+    if section not in ("client", "exploratory"):
+        return records
+    legacy = []
+    seen = set()
+    for record in records:
+        if record["Full ID"] == "Local":
+            record = dict(record, **{"Full ID": "Unknown", "Node Abbrev": "Unknown",
+                                     "Country": "Unknown", "IP Address": "Unknown"})
+        key = (record["Direction"], record["Full ID"], record["Node Role"])
+        if key not in seen:
+            seen.add(key)
+            legacy.append(record)
+    return legacy
+
+
+def check(data_dir, repeat=5):
+    """Compare the fast parsers with the original collectors on every recorded page;
+    returns the number of mismatches."""
+    oracles = legacy_oracles()
+    suites = [
+        ("tunnels_data_*.html", ["client", "exploratory", "participating", "multi_peers"]),
+        ("high_capacity_routers_*.html", ["profiles"]),
+    ]
+    mismatches = 0
+    for pattern, sections in suites:
+        paths = sorted(glob.glob(os.path.join(data_dir, pattern)))
+        pages = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                pages.append(f.read())
+
+        rows = 0
+        for path, html in zip(paths, pages):
+            for section in sections:
+                expected = oracles[section](html)
+                got = as_legacy(section, FAST_PARSERS[section](html))
+                rows += len(got)
+                if got != expected:
+                    mismatches += 1
+                    print(f"MISMATCH {os.path.basename(path)} [{section}]: "
+                          f"{len(got)} fast vs {len(expected)} original records")
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                for section in sections:
+                    oracles[section](html)
+        slow = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                for section in sections:
+                    FAST_PARSERS[section](html)
+        fast = (time.perf_counter() - start) / repeat
+        print(f"{pattern}: {len(pages)} pages, {rows} records, "
+              f"original {slow * 1000:.1f} ms, fast {fast * 1000:.2f} ms, speedup {slow / max(fast, 1e-9):.0f}x")
+    return mismatches
+
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.pardir, "data")
+    failed = check(data_dir)
+    print("OK: fast parser matches the original collectors on every page." if not failed else f"{failed} mismatches.")
+    sys.exit(1 if failed else 0)
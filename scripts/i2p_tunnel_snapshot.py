@@ -0,0 +1,777 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Tunnel Snapshot Pipeline
+Fetches the /tunnels page once per router per cycle and hands the parsed
+document to every section extractor, instead of each collector downloading
+and parsing the same page on its own schedule.
+
+Extractors (one CSV stream each):
+  - client         "Client tunnels for shared clients" peers and roles
+  - exploratory    "Exploratory tunnels" peers and roles (not collected by default)
+  - participating  "Participating tunnels" rows
+  - multi_peers    "Peers in multiple participating tunnels" rows
+
+All rows from one cycle share the cycle timestamp and carry the router
+(host console port) they were observed on.
+
+With --participating events (or both), participating rows are fed to a
+TunnelTracker and written as created/usage/rate/expired lifecycle events
+(participating_events stream) instead of, or next to, the full snapshot.
+With --selection-metrics, client-tunnel peers feed a sliding-window
+entropy/Gini/caps-share engine (selection_metrics stream).
+With --cross-router K, every extractor's peers feed a cross-router index and
+a peer is written once it is seen by K routers within --cross-window
+(multi_router_peers stream).
+--metrics-port serves fetch/parse/resolve/write timings, rows per section,
+errors by router, netdb cache counters and queue depth (i2p_metrics.py),
+and a health summary line is printed every --summary-interval seconds.
+--targets discovers the routers (docker, compose file, target file; see
+i2p_targets.py) and rediscovers them every --refresh seconds, adding and
+removing routers without restarting collection.
+With --checkpoint, every cycle is journaled and the collector state is
+checkpointed every --checkpoint-interval seconds (i2p_checkpoint.py); a
+restarted collector resumes the run window and its change detection and
+trackers, with no duplicate or torn rows in the CSV output.
+With --changes-only a row is written only when its key (per extractor
+`change_key`) is new to that router or its `change_value` columns changed.
+
+Usage:
+  python3 i2p_tunnel_snapshot.py --ports 32797 32808 --interval 60
+  python3 i2p_tunnel_snapshot.py --targets docker:i2p --refresh 60 --adaptive
+
+Requires: aiohttp, beautifulsoup4, html5lib
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from i2p_bandwidth import BandwidthRollup, bandwidth_trackers
+from i2p_checkpoint import CHECKPOINT_INTERVAL, Checkpointer, output_manifest
+from i2p_dedup import DEDUP_TTL, ChangeDetector
+from i2p_metrics import METRICS_HOST, SUMMARY_INTERVAL, Metrics, log_summaries, serve, watch_resolver, watch_sinks
+from i2p_netdb_index import NetDbIndex
+from i2p_output_sinks import FLUSH_INTERVAL, FLUSH_ROWS, MAX_BYTES, make_sink
+from i2p_netdb_resolver import NetDbResolver
+from i2p_router_ids import RouterIdRegistry
+from i2p_peer_index import WINDOW as CROSS_ROUTER_WINDOW, PeerIndex, index_trackers
+from i2p_scheduler import MAX_INTERVAL, MIN_INTERVAL, AdaptiveScheduler
+from i2p_targets import add_target_arguments, initial_targets
+from i2p_tunnel_tracker import TunnelTracker
+from i2p_window_metrics import WINDOW as SELECTION_WINDOW, SelectionMetricsTracker
+from i2p_tunnel_parser import (
+    CLIENT_ROLES, CLIENT_SECTION_TITLE, EXPLORATORY_SECTION_TITLE, MULTI_PEERS_SECTION_TITLE,
+    parse_client_tunnels, parse_exploratory_tunnels, parse_multi_peers, parse_participating_tunnels,
+    parse_profiles,
+)
+from i2p_swarm_poller import (
+    CONSOLE_HOST, CONSOLE_PORTS, FETCH_INTERVAL, MAX_CONCURRENCY, RUN_DURATION,
+    TARGET_DEADLINE, SwarmPoller,
+)
+
+# === Configuration ===
+PROFILES_PATH = "/profiles?f=1"
+OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "i2p_tunnel_snapshots")
+
+
+def parse_page(html):
+    return BeautifulSoup(html, "html5lib")
+
+
+# === Section extractors ===
+
+class SectionExtractor:
+    """Turns one section of a parsed /tunnels page into CSV records.
+
+    `headers` are the record columns (Timestamp and Router are prepended by
+    the pipeline), `column_types` types them for columnar sinks (see
+    i2p_output_sinks.COLUMN_TYPES) and `ip_columns` maps a peer-ID column to
+    the column that receives its resolved IP. `fast_parser` is the equivalent DOM-free parser
+    from i2p_tunnel_parser, taking the raw page instead of the soup.
+    `change_key` / `change_value` define a row's identity and the columns
+    whose change makes it worth logging again (--changes-only). Each
+    `id_columns` column gets an int32 "<column> Code" from the router ID
+    registry when one is configured (--id-registry).
+    """
+
+    name = ""
+    headers = []
+    column_types = {}
+    ip_columns = {}
+    fast_parser = None
+    change_key = ()
+    change_value = ()
+    id_columns = ()
+
+    def extract(self, soup):
+        raise NotImplementedError
+
+
+def _peer_from_cell(cell):
+    cell_text = cell.get_text(strip=True)
+    if "Local" in cell_text:
+        return ("Local", "Local")
+    a_tag = cell.find("a")
+    if a_tag and "netdb?r=" in a_tag.get("href", ""):
+        full_id = a_tag["href"].split("netdb?r=")[-1]
+        abbrev = a_tag.get_text(strip=True)
+        return (full_id, abbrev)
+    tt_tag = cell.find("tt")
+    if tt_tag:
+        text = tt_tag.get_text(strip=True)
+        return (text, text)
+    return ("Unknown", "Unknown")
+
+
+def _is_client_header(tag):
+    return tag.name == "h3" and tag.get_text(strip=True).startswith(CLIENT_SECTION_TITLE)
+
+
+def _is_exploratory_header(tag):
+    return tag.name == "h3" and tag.get_text(strip=True).startswith(EXPLORATORY_SECTION_TITLE)
+
+
+class ClientTunnelExtractor(SectionExtractor):
+    """Gateway/Participant/Endpoint peers of the shared-clients tunnels.
+
+    The section anchor id (e.g. "UsNd", "QC5x") is generated per router
+    session, so the section is located by its title instead.
+    """
+
+    name = "client"
+    headers = [
+        "Direction", "Expiration", "Usage",
+        "Node Role", "Node Abbrev", "Full ID", "Country", "IP Address",
+    ]
+    ip_columns = {"Full ID": "IP Address"}
+    fast_parser = staticmethod(parse_client_tunnels)
+    change_key = ("Direction", "Full ID", "Node Role")
+    change_value = ("Usage",)
+    id_columns = ("Full ID",)
+    roles = CLIENT_ROLES
+    is_header = staticmethod(_is_client_header)
+
+    def extract(self, soup):
+        header = soup.find(self.is_header)
+        table = header.find_next("table", class_="tunneldisplay") if header else None
+        if not table:
+            return []
+
+        records = []
+        seen = set()
+        for row in table.find_all("tr")[1:]:
+            cells = row.find_all("td")
+            if len(cells) < 7:
+                continue
+            direction = cells[0].find("img")["alt"]
+            expiration = cells[1].get_text(strip=True)
+            usage = cells[2].get_text(strip=True)
+
+            for i, role in enumerate(self.roles):
+                for span in cells[3 + i].find_all("span", class_="tunnel_peer"):
+                    country = "Unknown"
+                    node_id = "Unknown"
+                    abbrev = "Unknown"
+                    img = span.find("img")
+                    if img:
+                        country = img.get("title", "Unknown")
+                    tt = span.find("tt")
+                    a_tag = tt.find("a") if tt else None
+                    if a_tag and "netdb?r=" in a_tag.get("href", ""):
+                        node_id = a_tag["href"].split("netdb?r=")[-1]
+                        abbrev = a_tag.get_text(strip=True)
+                    elif "Local" in span.get_text():
+                        node_id = "Local"
+                        abbrev = "Local"
+                        country = "Localhost"
+
+                    # one row per direction/peer/role per snapshot
+                    key = (direction, node_id, role)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    records.append({
+                        "Direction": direction, "Expiration": expiration, "Usage": usage,
+                        "Node Role": role, "Node Abbrev": abbrev, "Full ID": node_id,
+                        "Country": country,
+                        "IP Address": "127.0.0.1" if node_id == "Local" else "Unknown",
+                    })
+        return records
+
+
+class ExploratoryTunnelExtractor(ClientTunnelExtractor):
+    """Gateway/Participant/Endpoint peers of the exploratory tunnels (same table layout)."""
+
+    name = "exploratory"
+    fast_parser = staticmethod(parse_exploratory_tunnels)
+    is_header = staticmethod(_is_exploratory_header)
+
+
+class ParticipatingTunnelExtractor(SectionExtractor):
+    """Rows of the "Participating tunnels" table."""
+
+    name = "participating"
+    headers = [
+        "Receive on", "From Full ID", "From Country", "From Abbrev", "From IP",
+        "Send on", "To Full ID", "To Country", "To Abbrev", "To IP",
+        "Expiration", "Usage", "Rate", "Role",
+    ]
+    column_types = {"Receive on": "int", "Send on": "int"}
+    ip_columns = {"From Full ID": "From IP", "To Full ID": "To IP"}
+    fast_parser = staticmethod(parse_participating_tunnels)
+    change_key = ("Receive on", "Send on", "From Full ID", "To Full ID")
+    change_value = ("Usage", "Rate")
+    id_columns = ("From Full ID", "To Full ID")
+
+    def extract(self, soup):
+        header = soup.find("h3", id="participating")
+        if not header:
+            return []
+        table = header.find_next("table", class_="tunneldisplay tunnels_participating")
+        if not table:
+            return []
+
+        records = []
+        for row in table.find_all("tr")[1:]:
+            cells = row.find_all("td")
+            if len(cells) < 8:
+                continue
+            record = {"Receive on": cells[0].get_text(strip=True),
+                      "Send on": cells[2].get_text(strip=True)}
+            for prefix, cell in (("From", cells[1]), ("To", cells[3])):
+                img = cell.find("img")
+                full_id, abbrev = _peer_from_cell(cell)
+                record[f"{prefix} Full ID"] = full_id
+                record[f"{prefix} Country"] = img["title"] if img and "title" in img.attrs else "Unknown"
+                record[f"{prefix} Abbrev"] = abbrev
+                record[f"{prefix} IP"] = "Unknown"
+            record["Expiration"] = cells[4].get_text(strip=True)
+            record["Usage"] = cells[5].get_text(strip=True)
+            record["Rate"] = cells[6].get_text(strip=True)
+            record["Role"] = cells[7].get_text(strip=True)
+            records.append(record)
+        return records
+
+
+class MultiTunnelPeerExtractor(SectionExtractor):
+    """Rows of the "Peers in multiple participating tunnels" table."""
+
+    name = "multi_peers"
+    headers = ["Full Peer ID", "Country", "Tunnels", "Usage"]
+    column_types = {"Tunnels": "int"}
+    ip_columns = {}
+    fast_parser = staticmethod(parse_multi_peers)
+    change_key = ("Full Peer ID",)
+    change_value = ("Tunnels",)
+    id_columns = ("Full Peer ID",)
+
+    def extract(self, soup):
+        header = soup.find("h3", class_="tabletitle", string=MULTI_PEERS_SECTION_TITLE)
+        if not header:
+            return []
+        table = header.find_next("table", class_="tunneldisplay tunnels_participating")
+        if not table:
+            return []
+
+        records = []
+        for row in table.find_all("tr")[1:]:
+            cells = row.find_all("td")
+            if len(cells) < 3:
+                continue
+            peer_cell = cells[0]
+            img = peer_cell.find("img")
+            a_tag = peer_cell.find("a", title="NetDb entry")
+            records.append({
+                "Full Peer ID": a_tag["href"].split("netdb?r=")[-1] if a_tag else "Unknown",
+                "Country": img["title"] if img and "title" in img.attrs else "Unknown",
+                "Tunnels": cells[1].get_text(strip=True),
+                "Usage": cells[2].get_text(strip=True),
+            })
+        return records
+
+
+class ProfileExtractor(SectionExtractor):
+    """Rows of the "profilelist" table on the /profiles?f=1 page (not /tunnels)."""
+
+    name = "profiles"
+    headers = [
+        "Country", "Node Abbrev", "Full Node ID", "Groups", "Caps", "Version",
+        "Speed", "Capacity", "Integration", "Status", "IP Address",
+    ]
+    column_types = {"Speed": "float", "Capacity": "float", "Integration": "float"}
+    ip_columns = {"Full Node ID": "IP Address"}
+    fast_parser = staticmethod(parse_profiles)
+    change_key = ("Full Node ID",)
+    change_value = ("Version", "Status")
+    id_columns = ("Full Node ID",)
+
+    def extract(self, soup):
+        table = soup.find("table", id="profilelist")
+        if not table:
+            return []
+
+        records = []
+        for row in table.find_all("tr")[1:]:
+            cells = row.find_all("td")
+            if len(cells) < 9:
+                continue
+            img = cells[0].find("img")
+            a = cells[0].find("a")
+            records.append({
+                "Country": img.get("title", "Unknown") if img else "Unknown",
+                "Node Abbrev": a.text.strip() if a else "Unknown",
+                "Full Node ID": a.get("href", "").split("netdb?r=")[-1] if a else "Unknown",
+                "Groups": cells[1].text.strip(),
+                "Caps": cells[2].text.strip(),
+                "Version": cells[3].text.strip(),
+                "Speed": cells[4].text.strip(),
+                "Capacity": cells[5].text.strip(),
+                "Integration": cells[6].text.strip(),
+                "Status": cells[7].text.strip(),
+                "IP Address": "Unknown",
+            })
+        return records
+
+
+DEFAULT_EXTRACTORS = [ClientTunnelExtractor, ParticipatingTunnelExtractor, MultiTunnelPeerExtractor]
+
+
+def output_columns(extractor, registry=None):
+    """(headers, column_types) of an extractor's stream, with ID code columns when interning."""
+    if registry is None or not extractor.id_columns:
+        return extractor.headers, extractor.column_types
+    codes = [f"{column} Code" for column in extractor.id_columns]
+    return extractor.headers + codes, dict(extractor.column_types, **{c: "int32" for c in codes})
+
+
+def add_id_codes(registry, extractor, records):
+    """Fill the "<column> Code" columns from the router ID registry."""
+    for column in extractor.id_columns:
+        codes = registry.intern_many([r[column] for r in records])
+        for record, code in zip(records, codes):
+            record[f"{column} Code"] = code
+
+
+def extract_sections(html, extractors, use_bs4=False):
+    """Run every extractor on one page; returns {extractor name: records}.
+
+    Extractors with a fast parser read the raw page directly; the html5lib
+    soup is built at most once, for --bs4 runs or extractors without one.
+    """
+    sections = {}
+    soup = None
+    for extractor in extractors:
+        if extractor.fast_parser is not None and not use_bs4:
+            sections[extractor.name] = extractor.fast_parser(html)
+            continue
+        if soup is None:
+            soup = parse_page(html)
+        sections[extractor.name] = extractor.extract(soup)
+    return sections
+
+
+# === Pipeline ===
+
+class SnapshotPipeline:
+    """Parses each fetched page once and fans it out to all extractors.
+
+    `trackers` maps an extractor name to a tracker (e.g. TunnelTracker), or a
+    list of them, whose update(router, timestamp, records) events go to the
+    tracker's own stream (trackers sharing a name share one stream);
+    extractors named in `events_only` then write no full snapshot rows.
+    With `changes_only`, each extractor's rows pass through a bounded
+    ChangeDetector keyed by router and the extractor's `change_key`.
+    `registry` (i2p_router_ids.RouterIdRegistry) adds int32 peer ID codes.
+    With a `checkpointer` (i2p_checkpoint.Checkpointer), every collected
+    cycle is journaled before it is transformed, and detectors, trackers
+    and sink positions are checkpointed periodically; call resume() before
+    the first cycle to continue an interrupted run.
+    Stage timings, rows per section, empty sections, parse errors, netdb
+    cache counters and sink buffers are recorded in `metrics`.
+    Without a poller (an aggregator of collected cycles, see i2p_shards)
+    there is no resolver and only apply() is used.
+    """
+
+    def __init__(self, poller, extractors=None, output_dir=OUTPUT_DIR, resolver=None, use_bs4=False,
+                 sink_format="csv", sink_options=None, trackers=None, events_only=(), changes_only=False,
+                 dedup_ttl=DEDUP_TTL, registry=None, metrics=None, checkpointer=None):
+        self.poller = poller
+        self.extractors = extractors or [cls() for cls in DEFAULT_EXTRACTORS]
+        self.trackers = {name: list(t) if isinstance(t, (list, tuple)) else [t]
+                         for name, t in (trackers or {}).items()}
+        self.events_only = set(events_only)
+        self.registry = registry
+        self.detectors = {
+            extractor.name: ChangeDetector(ttl=dedup_ttl)
+            for extractor in self.extractors if changes_only and extractor.change_key
+        }
+        self.use_bs4 = use_bs4
+        self.output_dir = output_dir
+        self.resolver = resolver
+        if resolver is None and poller is not None:
+            self.resolver = NetDbResolver(poller.fetch_text, db_path=os.path.join(output_dir, "netdb_cache.sqlite"))
+        self.sinks = {}
+        for extractor in self.extractors:
+            if extractor.name in self.events_only:
+                continue
+            headers, column_types = output_columns(extractor, registry)
+            self.sinks[extractor.name] = make_sink(
+                sink_format, output_dir, f"{extractor.name}_tunnels_snapshot",
+                ["Timestamp", "Router"] + headers, column_types, **(sink_options or {}))
+        for tracker in (t for group in self.trackers.values() for t in group):
+            if tracker.name in self.sinks:
+                continue
+            self.sinks[tracker.name] = make_sink(
+                sink_format, output_dir, tracker.name, ["Timestamp", "Router"] + tracker.headers,
+                tracker.column_types, **(sink_options or {}))
+        self.checkpointer = checkpointer
+        if checkpointer is not None and any(not hasattr(s, "files") for s in self.sinks.values()):
+            raise ValueError("checkpointing supports CSV output only")
+        self.seq = 0                       # cycles processed, the journal sequence number
+        self.run_started = time.time()     # restored by resume()
+        self.metrics = metrics if metrics is not None else getattr(poller, "metrics", None) or Metrics()
+        watch_sinks(self.metrics, self.sinks)
+        if self.resolver is not None and hasattr(self.resolver, "stats"):
+            watch_resolver(self.metrics, self.resolver)
+
+    def extract_all(self, html):
+        return extract_sections(html, self.extractors, self.use_bs4)
+
+    async def fill_ips(self, target, extractor, records):
+        if not extractor.ip_columns or not records:
+            return
+        node_ids = [r[col] for r in records for col in extractor.ip_columns]
+        ips = await self.resolver.resolve(target, node_ids)
+        for record in records:
+            for id_col, ip_col in extractor.ip_columns.items():
+                if record[id_col] in ips:
+                    record[ip_col] = ips[record[id_col]]
+
+    def changed_records(self, extractor, router, records, now=None):
+        detector = self.detectors.get(extractor.name)
+        if detector is None:
+            return records
+        return [
+            record for record in records
+            if detector.changed((router,) + tuple(record[c] for c in extractor.change_key),
+                                tuple(record[c] for c in extractor.change_value), now=now)
+        ]
+
+    async def collect(self, results):
+        """Parse and IP-resolve one poll; returns ([(router, timestamp, sections)], failed).
+
+        Everything after this stage (transform) depends only on its output,
+        which is what the checkpoint journal records.
+        """
+        cycle = []
+        failed = 0
+        for result in results:
+            if result.status != "ok":
+                failed += 1
+                print(f"[{result.timestamp}] {result.target.name}: {result.status} ({result.error})")
+                continue
+            router = result.target.name
+            try:
+                with self.metrics.timer("i2p_stage_seconds", stage="parse"):
+                    sections = self.extract_all(result.html)
+            except Exception as e:
+                failed += 1
+                self.metrics.inc("i2p_errors_total", router=router, stage="parse", kind=type(e).__name__)
+                print(f"[{result.timestamp}] {router}: parse error ({e})")
+                continue
+            resolve_time = 0.0
+            for extractor in self.extractors:
+                records = sections[extractor.name]
+                self.metrics.inc("i2p_rows_total", len(records), section=extractor.name)
+                if not records:
+                    self.metrics.inc("i2p_sections_empty_total", section=extractor.name, router=router)
+                start = time.perf_counter()
+                await self.fill_ips(result.target, extractor, records)
+                resolve_time += time.perf_counter() - start
+            self.metrics.observe("i2p_stage_seconds", resolve_time, stage="resolve")
+            cycle.append((router, result.timestamp, sections))
+        return cycle, failed
+
+    def transform(self, cycle):
+        """Registry codes, trackers and change detection of one collected cycle;
+        returns {stream: records}. Deterministic, so a journaled cycle replays
+        to the same rows (the detectors' clock is the poll timestamp)."""
+        batches = {name: [] for name in self.sinks}
+        for router, timestamp, sections in cycle:
+            now = time.mktime(time.strptime(timestamp, "%Y-%m-%d %H:%M:%S"))
+            for extractor in self.extractors:
+                records = sections[extractor.name]
+                for record in records:
+                    record["Timestamp"] = timestamp
+                    record["Router"] = router
+                if self.registry is not None:
+                    add_id_codes(self.registry, extractor, records)
+                for tracker in self.trackers.get(extractor.name, ()):
+                    batches[tracker.name].extend(tracker.update(router, timestamp, records))
+                if extractor.name in batches:
+                    batches[extractor.name].extend(self.changed_records(extractor, router, records, now))
+        return batches
+
+    def write(self, batches):
+        with self.metrics.timer("i2p_stage_seconds", stage="write"):
+            for name, records in batches.items():
+                self.sinks[name].write(records)
+
+    def apply(self, cycle):
+        """Journal, transform and write one collected cycle; returns {stream: records}."""
+        self.seq += 1
+        if self.checkpointer is not None:
+            with self.metrics.timer("i2p_stage_seconds", stage="journal"):
+                self.checkpointer.log(self.seq, cycle)
+        batches = self.transform(cycle)
+        self.write(batches)
+        if self.checkpointer is not None and self.checkpointer.due():
+            self.checkpoint()
+        return batches
+
+    async def process(self, results):
+        """Cycle handler for SwarmPoller.run()."""
+        cycle_start = time.perf_counter()
+        cycle, failed = await self.collect(results)
+        batches = self.apply(cycle)
+        self.metrics.observe("i2p_stage_seconds", time.perf_counter() - cycle_start, stage="cycle")
+        self.metrics.inc("i2p_cycles_total")
+
+        now = results[0].timestamp if results else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        counts = ", ".join(f"{name}={len(rows)}" for name, rows in batches.items())
+        print(f"[{now}] Snapshot of {len(results) - failed}/{len(results)} routers: {counts}")
+
+    # === Checkpoints (i2p_checkpoint) ===
+
+    def output_files(self):
+        return sorted(path for sink in self.sinks.values() for path in sink.files())
+
+    def _layout(self):
+        """What the checkpointed state must line up with: streams, detectors, trackers."""
+        return {"sinks": sorted(self.sinks), "detectors": sorted(self.detectors),
+                "trackers": {name: [t.name for t in group] for name, group in sorted(self.trackers.items())}}
+
+    def checkpoint(self):
+        """Flush every sink and the IP cache, then save the state up to the current cycle."""
+        with self.metrics.timer("i2p_stage_seconds", stage="checkpoint"):
+            for sink in self.sinks.values():
+                sink.flush()
+            if hasattr(self.resolver, "flush"):
+                self.resolver.flush()
+            files = self.output_files()
+            self.checkpointer.save({
+                "seq": self.seq,
+                "run_started": self.run_started,
+                "layout": self._layout(),
+                "manifest": output_manifest(files),
+                "detectors": {name: d.state_dict() for name, d in self.detectors.items()},
+                "trackers": {name: [t.state_dict() for t in group] for name, group in self.trackers.items()},
+                "sinks": {name: s.state_dict() for name, s in self.sinks.items()},
+            }, files)
+
+    def resume(self):
+        """Restore the last checkpoint and replay the journal after it; starts a
+        fresh checkpoint when there is none. Returns the number of replayed cycles."""
+        state = self.checkpointer.load()
+        if state is None:
+            self.checkpoint()
+            return 0
+        if state["layout"] != self._layout():
+            raise ValueError(f"checkpoint in {self.checkpointer.directory} was written with different "
+                             f"streams or trackers ({state['layout']}); remove it to start over")
+        self.checkpointer.rollback(state["manifest"], self.output_files())
+        for name, detector in self.detectors.items():
+            detector.load_state_dict(state["detectors"][name])
+        for name, group in self.trackers.items():
+            for tracker, tracker_state in zip(group, state["trackers"][name]):
+                tracker.load_state_dict(tracker_state)
+        for name, sink in self.sinks.items():
+            sink.load_state_dict(state["sinks"][name])
+        self.seq = state["seq"]
+        self.run_started = state["run_started"]
+        replayed = 0
+        for seq, cycle in self.checkpointer.pending(self.seq):
+            self.write(self.transform(cycle))
+            self.seq = seq
+            replayed += 1
+        self.checkpointer.stats["replayed"] += replayed
+        self.checkpoint()
+        return replayed
+
+    def close(self):
+        # trackers holding partial aggregates (e.g. open rollup buckets) write them out
+        batches = {}
+        for tracker in (t for group in self.trackers.values() for t in group if hasattr(t, "flush")):
+            batches.setdefault(tracker.name, []).extend(tracker.flush())
+        self.write(batches)
+        if self.checkpointer is not None:
+            self.checkpoint()
+            self.checkpointer.close()
+        for sink in self.sinks.values():
+            sink.close()
+
+
+class NetDbCaps:
+    """node ID -> caps lookup over a NetDbIndex, for SelectionMetricsTracker."""
+
+    def __init__(self, netdb_index):
+        self.netdb_index = netdb_index
+
+    def get(self, node_id, default=None):
+        entry = self.netdb_index.lookup(node_id)
+        return entry.caps if entry is not None else default
+
+
+def add_trackers(trackers, new):
+    """Add {extractor name: tracker} to `trackers`, keeping all trackers of a name in one flat list."""
+    for name, tracker in new.items():
+        group = trackers.setdefault(name, [])
+        if not isinstance(group, list):
+            group = trackers[name] = list(group) if isinstance(group, tuple) else [group]
+        group.append(tracker)
+    return trackers
+
+
+def make_trackers(args, netdb_index=None):
+    """Trackers chosen by --participating, --selection-metrics, --cross-router and --bandwidth
+    (options a collector lacks count as off)."""
+    names = [cls.name for cls in DEFAULT_EXTRACTORS]
+    trackers = {}
+    if args.participating != "snapshot":
+        add_trackers(trackers, {"participating": TunnelTracker()})
+    if getattr(args, "selection_metrics", False):
+        caps = NetDbCaps(netdb_index) if netdb_index is not None else None
+        add_trackers(trackers, {"client": SelectionMetricsTracker(args.selection_window, caps)})
+    if getattr(args, "cross_router", None):
+        index = PeerIndex(window=args.cross_window, min_routers=args.cross_router)
+        add_trackers(trackers, index_trackers(index, names))
+    if getattr(args, "bandwidth", False):
+        add_trackers(trackers, bandwidth_trackers(BandwidthRollup(), names))
+    return trackers
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch /tunnels once per router and extract every section.")
+    parser.add_argument("--host", default=CONSOLE_HOST)
+    parser.add_argument("--ports", type=int, nargs="+", default=CONSOLE_PORTS)
+    add_target_arguments(parser)
+    parser.add_argument("--interval", type=float, default=FETCH_INTERVAL)
+    parser.add_argument("--duration", type=float, default=RUN_DURATION)
+    parser.add_argument("--adaptive", action="store_true",
+                        help="poll each router on its own jittered schedule, faster while its tunnels churn")
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL)
+    parser.add_argument("--max-interval", type=float, default=MAX_INTERVAL)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--deadline", type=float, default=TARGET_DEADLINE)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--netdb-cache", help="SQLite file for resolved IPs (default: <output-dir>/netdb_cache.sqlite)")
+    parser.add_argument("--netdb-dir", action="append", default=[],
+                        help="local netDb directory to resolve IPs from first (repeatable)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--rotate", choices=["hourly", "size", "none"], default="hourly")
+    parser.add_argument("--max-bytes", type=int, default=MAX_BYTES, help="size-based rotation threshold")
+    parser.add_argument("--flush-rows", type=int, default=FLUSH_ROWS)
+    parser.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL)
+    parser.add_argument("--participating", choices=["snapshot", "events", "both"], default="snapshot",
+                        help="write participating tunnels as full snapshots, lifecycle events, or both")
+    parser.add_argument("--changes-only", action="store_true",
+                        help="write a row only when it is new to the router or its tracked columns changed")
+    parser.add_argument("--dedup-ttl", type=float, default=DEDUP_TTL,
+                        help="seconds after which an unseen row counts as new again (--changes-only)")
+    parser.add_argument("--selection-metrics", action="store_true",
+                        help="write rolling entropy/Gini/caps shares of client-tunnel peer selections")
+    parser.add_argument("--selection-window", type=float, default=SELECTION_WINDOW, help="seconds")
+    parser.add_argument("--cross-router", type=int, metavar="K",
+                        help="write peers as they become seen by >= K routers within --cross-window")
+    parser.add_argument("--cross-window", type=float, default=CROSS_ROUTER_WINDOW, help="seconds")
+    parser.add_argument("--bandwidth", action="store_true",
+                        help="write minute/hour/day Usage/Rate rollups per peer, country, role and router")
+    parser.add_argument("--metrics-port", type=int, help="serve /metrics (Prometheus) and /metrics.json here")
+    parser.add_argument("--metrics-host", default=METRICS_HOST)
+    parser.add_argument("--summary-interval", type=float, default=SUMMARY_INTERVAL,
+                        help="seconds between health summary lines (0 = off)")
+    parser.add_argument("--checkpoint", nargs="?", const="", metavar="DIR",
+                        help="journal every cycle and checkpoint state to DIR (default <output-dir>/.checkpoint); "
+                             "a restart resumes the run from there (CSV output only)")
+    parser.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL,
+                        help="seconds between checkpoints")
+    parser.add_argument("--id-registry", help="router ID registry (SQLite) for int32 peer ID code columns")
+    parser.add_argument("--bs4", action="store_true", help="parse with BeautifulSoup/html5lib instead of the fast parser")
+    args = parser.parse_args()
+    if args.checkpoint is not None and args.format != "csv":
+        parser.error("--checkpoint supports --format csv only")
+    return args
+
+
+async def main():
+    args = parse_args()
+    targets, target_registry = initial_targets(args)
+    print(f"[START] Snapshotting {len(targets)} routers every {args.interval}s to {args.output_dir}")
+    start = time.time()
+    async with SwarmPoller(targets, max_concurrency=args.concurrency, deadline=args.deadline) as poller:
+        resolver = NetDbResolver(
+            poller.fetch_text,
+            db_path=args.netdb_cache or os.path.join(args.output_dir, "netdb_cache.sqlite"),
+            netdb_index=NetDbIndex(args.netdb_dir) if args.netdb_dir else None,
+        )
+        sink_options = {
+            "rotate": None if args.rotate == "none" else args.rotate, "max_bytes": args.max_bytes,
+            "flush_rows": args.flush_rows, "flush_interval": args.flush_interval,
+        }
+        trackers = make_trackers(args, resolver.netdb_index)
+        events_only = ["participating"] if args.participating == "events" else []
+        checkpointer = None
+        if args.checkpoint is not None:
+            checkpointer = Checkpointer(args.checkpoint or os.path.join(args.output_dir, ".checkpoint"),
+                                        args.checkpoint_interval)
+        pipeline = SnapshotPipeline(poller, output_dir=args.output_dir, resolver=resolver, use_bs4=args.bs4,
+                                    sink_format=args.format, sink_options=sink_options,
+                                    trackers=trackers, events_only=events_only,
+                                    changes_only=args.changes_only, dedup_ttl=args.dedup_ttl,
+                                    registry=RouterIdRegistry(args.id_registry) if args.id_registry else None,
+                                    checkpointer=checkpointer)
+        duration = args.duration
+        if checkpointer is not None:
+            replayed = pipeline.resume()
+            duration -= time.time() - pipeline.run_started
+            print(f"[START] Checkpoint at cycle {pipeline.seq} ({replayed} replayed from the journal), "
+                  f"{max(0.0, duration):.0f}s of the run left")
+        metrics_server = None
+        if args.metrics_port:
+            metrics_server = await serve(poller.metrics, args.metrics_host, args.metrics_port)
+            print(f"[START] Metrics on http://{args.metrics_host}:{args.metrics_port}/metrics")
+        summaries = None
+        if args.summary_interval > 0:
+            summaries = asyncio.ensure_future(log_summaries(poller.metrics, args.summary_interval))
+        poller.metrics.watch("i2p_targets", lambda: len(poller.targets))
+        scheduler = None
+        if args.adaptive:
+            scheduler = AdaptiveScheduler(poller, args.interval, args.min_interval, args.max_interval)
+        rediscovery = None
+        if target_registry is not None:
+            apply = scheduler.update_targets if scheduler is not None else poller.set_targets
+            rediscovery = asyncio.ensure_future(target_registry.watch(apply, args.refresh))
+        try:
+            if scheduler is not None:
+                await scheduler.run(pipeline.process, duration)
+                print(scheduler.summary())
+            else:
+                await poller.run(pipeline.process, args.interval, duration)
+        finally:
+            for task in (summaries, rediscovery):
+                if task is not None:
+                    task.cancel()
+            if metrics_server is not None:
+                await metrics_server.cleanup()
+            pipeline.close()
+            resolver.close()
+    print(f"[DONE] Snapshot collection complete after {time.time() - start:.0f}s.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
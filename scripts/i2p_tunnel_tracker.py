@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Participating Tunnel Lifecycle Tracker
+Turns repeated participating-tunnel snapshots into compact lifecycle events
+instead of re-writing every unchanged row on every poll.
+
+A tunnel is identified across polls by (router, receive tunnel ID, send
+tunnel ID, from peer, to peer). Per poll the tracker emits:
+
+  created   first sighting, with every column of the snapshot row
+  usage     Usage changed (new value, bytes and delta since last event)
+  rate      Rate changed
+  expired   tunnel no longer listed (duration and total bytes)
+
+The countdown-only Expiration changes are not events. rebuild_snapshot()
+replays an event log into the full snapshot as of any timestamp. Every event
+carries the Timestamp of the poll that produced it (an expired event: the
+first poll without the tunnel). read_events() reads the hourly / size
+rotated participating_events_*.csv files of a run in time order.
+
+Usage:
+  python3 i2p_tunnel_tracker.py ~/i2p_tunnel_snapshots                    # per-tunnel summary
+  python3 i2p_tunnel_tracker.py participating_events_*.csv --at "2025-04-18 12:00:00"
+
+Requires: nothing beyond the standard library
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+from datetime import datetime
+
+from i2p_units import parse_bytes, parse_rate
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+SNAPSHOT_COLUMNS = [
+    "Receive on", "From Full ID", "From Country", "From Abbrev", "From IP",
+    "Send on", "To Full ID", "To Country", "To Abbrev", "To IP",
+    "Expiration", "Usage", "Rate", "Role",
+]
+EVENT_HEADERS = ["Timestamp", "Router", "Event"] + SNAPSHOT_COLUMNS + [
+    "Usage Bytes", "Usage Delta", "Rate Bps", "Duration", "Total Bytes",
+]
+KEY_COLUMNS = ("Receive on", "Send on", "From Full ID", "To Full ID")
+
+
+def tunnel_key(router, record):
+    return (router,) + tuple(record.get(column, "") for column in KEY_COLUMNS)
+
+
+def _seconds_between(start, end):
+    return (datetime.strptime(end, TIMESTAMP_FORMAT) - datetime.strptime(start, TIMESTAMP_FORMAT)).total_seconds()
+
+
+class TunnelTracker:
+    """Per-router participating tunnel state; update() returns lifecycle events.
+
+    Plugs into SnapshotPipeline as a transform of the "participating" stream.
+    """
+
+    name = "participating_events"
+    headers = EVENT_HEADERS[2:]
+    column_types = {
+        "Receive on": "int", "Send on": "int", "Usage Bytes": "int", "Usage Delta": "int",
+        "Rate Bps": "float", "Duration": "int", "Total Bytes": "int",
+    }
+
+    def __init__(self):
+        self.tunnels = {}   # key -> {"record", "first_seen", "last_seen", "bytes"}
+        self.stats = {"rows": 0, "events": 0}
+
+    def _event(self, timestamp, router, kind, record, **extra):
+        if kind in ("created", "expired"):
+            event = dict(record)   # a stored record still carries the Timestamp it was last seen at
+        else:
+            event = {column: record.get(column, "") for column in KEY_COLUMNS}
+        event.update({"Timestamp": timestamp, "Router": router, "Event": kind}, **extra)
+        return event
+
+    def update(self, router, timestamp, records):
+        """Feed one successful poll of one router; returns the events it produced."""
+        events = []
+        present = set()
+        for record in records:
+            key = tunnel_key(router, record)
+            present.add(key)
+            usage_bytes = parse_bytes(record.get("Usage"))
+            state = self.tunnels.get(key)
+            if state is None:
+                self.tunnels[key] = {"record": dict(record), "first_seen": timestamp,
+                                     "last_seen": timestamp, "bytes": usage_bytes}
+                events.append(self._event(timestamp, router, "created", record,
+                                          **{"Usage Bytes": _int(usage_bytes),
+                                             "Rate Bps": parse_rate(record.get("Rate"))}))
+                continue
+
+            last = state["record"]
+            state["last_seen"] = timestamp
+            if record.get("Usage") != last.get("Usage"):
+                delta = None
+                if usage_bytes is not None and state["bytes"] is not None:
+                    delta = usage_bytes - state["bytes"]
+                events.append(self._event(timestamp, router, "usage", record, **{
+                    "Usage": record.get("Usage"), "Expiration": record.get("Expiration"),
+                    "Usage Bytes": _int(usage_bytes), "Usage Delta": _int(delta),
+                }))
+                state["bytes"] = usage_bytes
+            if record.get("Rate") != last.get("Rate"):
+                events.append(self._event(timestamp, router, "rate", record, **{
+                    "Rate": record.get("Rate"), "Expiration": record.get("Expiration"),
+                    "Rate Bps": parse_rate(record.get("Rate")),
+                }))
+            state["record"] = dict(record)
+
+        for key in [k for k in self.tunnels if k[0] == router and k not in present]:
+            state = self.tunnels.pop(key)
+            events.append(self._event(timestamp, router, "expired", state["record"], **{
+                "Duration": int(_seconds_between(state["first_seen"], state["last_seen"])),
+                "Total Bytes": _int(state["bytes"]),
+            }))
+
+        self.stats["rows"] += len(records)
+        self.stats["events"] += len(events)
+        return events
+
+    def state_dict(self):
+        """Picklable tracker state, for i2p_checkpoint."""
+        return {"tunnels": self.tunnels, "stats": self.stats}
+
+    def load_state_dict(self, state):
+        self.tunnels = dict(state["tunnels"])
+        self.stats = dict(state["stats"])
+
+
+def _int(value):
+    return None if value is None else int(value)
+
+
+def rebuild_snapshot(events, at):
+    """Replay events (in log order) and return the tunnel rows active at `at`.
+
+    Rows carry the last reported Usage, Rate and Expiration before `at`.
+    """
+    active = {}
+    for event in events:
+        if event["Timestamp"] > at:
+            break
+        key = tunnel_key(event["Router"], event)
+        kind = event["Event"]
+        if kind == "created":
+            active[key] = {"Timestamp": event["Timestamp"], "Router": event["Router"]}
+            active[key].update({c: event.get(c, "") for c in SNAPSHOT_COLUMNS})
+        elif kind == "expired":
+            active.pop(key, None)
+        elif key in active:
+            row = active[key]
+            row["Timestamp"] = event["Timestamp"]
+            for column in ("Usage", "Rate", "Expiration"):
+                if event.get(column):
+                    row[column] = event[column]
+    return list(active.values())
+
+
+def read_events(paths):
+    """Events of participating_events CSV files (directories: every participating_events*.csv in
+    them), stably sorted by Timestamp."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "participating_events*.csv")))
+        else:
+            files += sorted(glob.glob(path)) or [path]
+    events = []
+    for path in files:
+        with open(path, newline="", encoding="utf-8") as f:
+            events += csv.DictReader(f)
+    events.sort(key=lambda event: event["Timestamp"])
+    return events
+
+
+def summarize(events):
+    """Per-tunnel duration and byte totals from the expired events."""
+    return [
+        {"Router": e["Router"], "Receive on": e["Receive on"], "Send on": e["Send on"],
+         "From Full ID": e["From Full ID"], "To Full ID": e["To Full ID"], "Role": e["Role"],
+         "Duration": e["Duration"], "Total Bytes": e["Total Bytes"]}
+        for e in events if e["Event"] == "expired"
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or replay participating tunnel events.")
+    parser.add_argument("paths", nargs="+", help="participating_events CSVs, globs or output directories")
+    parser.add_argument("--at", help="rebuild the snapshot at this time ('YYYY-MM-DD HH:MM:SS')")
+    args = parser.parse_args()
+    log = read_events(args.paths)
+    if args.at:
+        rows = rebuild_snapshot(log, args.at)
+        fieldnames = ["Timestamp", "Router"] + SNAPSHOT_COLUMNS
+    else:
+        rows = summarize(log)
+        fieldnames = ["Router", "Receive on", "Send on", "From Full ID", "To Full ID", "Role",
+                      "Duration", "Total Bytes"]
+    writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Console Value Parsing
+Converts the display strings the console prints into numbers:
+
+  Usage       "29 KiB", "1.2 MiB", "512 B"    -> bytes
+  Rate        "68 Bps", "1.17 KBps"           -> bytes per second
+  Expiration  "94 sec", "4 min", "(grace period)" -> seconds
+  Profiles    "2,681.16", "28.78", "--"       -> float (thousands separators dropped)
+
+Binary suffixes (KiB, MiB, ...) are powers of 1024 and plain ones (KB, MB,
+K, M, ...) powers of 1000, matching the router's formatSize2/formatSize2Decimal.
+Unparsable values return None.
+
+Requires: nothing beyond the standard library
+"""
+
+import re
+
+_PREFIX = {"": 0, "K": 1, "M": 2, "G": 3, "T": 4, "P": 5}
+_SIZE_RE = re.compile(r"^\s*([0-9]+(?:[.,][0-9]+)?)\s*([KMGTP]?)(i?)(B?)\s*$", re.I)
+_NUMBER_RE = re.compile(r"^-?[0-9]+(?:\.[0-9]+)?$")
+_DURATION_RE = re.compile(r"^\s*(-?[0-9]+(?:\.[0-9]+)?)\s*([a-z]+)\s*$", re.I)
+_SECONDS = {
+    "ms": 0.001, "sec": 1, "s": 1, "secs": 1, "second": 1, "seconds": 1,
+    "min": 60, "mins": 60, "m": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+}
+
+
+def _normalize(text):
+    # the console separates number and unit with NBSP / narrow NBSP
+    return (text or "").replace("\u202f", " ").replace("\xa0", " ").strip()
+
+
+def parse_bytes(text):
+    match = _SIZE_RE.match(_normalize(text))
+    if not match:
+        return None
+    number, prefix, binary, _ = match.groups()
+    base = 1024 if binary else 1000
+    return float(number.replace(",", ".")) * base ** _PREFIX[prefix.upper()]
+
+
+def parse_rate(text):
+    text = _normalize(text)
+    if text.lower().endswith("ps"):
+        text = text[:-2]
+    elif text.lower().endswith("/s"):
+        text = text[:-2]
+    return parse_bytes(text)
+
+
+def parse_seconds(text):
+    text = _normalize(text)
+    if text.startswith("("):  # "(grace period)"
+        return 0.0
+    match = _DURATION_RE.match(text)
+    if not match or match.group(2).lower() not in _SECONDS:
+        return None
+    return float(match.group(1)) * _SECONDS[match.group(2).lower()]
+
+
+def parse_number(text):
+    text = _normalize(text).replace(",", "").replace(" ", "")
+    if not _NUMBER_RE.match(text):
+        return None
+    return float(text)
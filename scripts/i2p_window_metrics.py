@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+I2P Sliding-Window Peer-Selection Metrics
+Streaming version of the rolling entropy / Gini / capability-share analysis
+in Entropy&Gini.ipynb, which re-counts and re-sorts every window from
+scratch. Selections (timestamp, node ID) enter and leave the window one at
+a time and every metric is updated in O(log n):
+
+  entropy     H = log2(N) - (1/N) * sum(c * log2 c), kept as a running sum
+  H_max       log2(unique nodes); normalized entropy = H / H_max
+  Gini        2 * sum(rank * c) / (n * N) - (n + 1) / n over the ascending
+              counts; a Fenwick tree over count values gives each node's
+              rank, so a count change adjusts the rank-weighted sum in place
+  shares      fraction of unique nodes whose caps contain X, f, R and XfR
+
+The same engine runs offline (rolling_metrics over a whole FastSet dump,
+matching the notebook's window/step semantics) and live in the snapshot
+collector (--selection-metrics, over client-tunnel peers).
+
+Usage:
+  python3 i2p_window_metrics.py 4-Fastset-Nodes-By-Time.txt [profiles.csv] [--window 2h] [--step 30min]
+
+Requires: nothing beyond the standard library
+"""
+
+import argparse
+import csv
+import math
+import re
+import sys
+from collections import deque
+from datetime import datetime
+
+from i2p_router_ids import RID_RE
+
+# === Configuration ===
+WINDOW = 2 * 60 * 60    # seconds, the notebook's window='2h'
+STEP = 30 * 60          # seconds, the notebook's freq='30min'
+CAPABILITIES = ("X", "f", "R")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+METRIC_HEADERS = [
+    "window_start", "window_end", "num_selections", "unique_nodes", "entropy", "h_max",
+    "normalized_entropy", "gini", "share_X", "share_f", "share_R", "share_XfR",
+]
+
+
+def caps_flags(caps):
+    """Bitmask of X/f/R in a caps string (case-insensitive, like the notebook)."""
+    caps = (caps or "").lower()
+    return sum(1 << i for i, cap in enumerate(CAPABILITIES) if cap.lower() in caps)
+
+
+class _Fenwick:
+    """Prefix sums over count values 1..size (number of nodes with each count)."""
+
+    def __init__(self, size=64):
+        self.tree = [0] * (size + 1)
+
+    def add(self, value, delta):
+        if value >= len(self.tree):
+            self._grow(value)
+        while value < len(self.tree):
+            self.tree[value] += delta
+            value += value & -value
+
+    def prefix(self, value):
+        value = min(value, len(self.tree) - 1)
+        total = 0
+        while value > 0:
+            total += self.tree[value]
+            value -= value & -value
+        return total
+
+    def _grow(self, value):
+        size = len(self.tree) - 1
+        counts = [self.prefix(v) - self.prefix(v - 1) for v in range(1, size + 1)]
+        while size < value:
+            size *= 2
+        self.tree = [0] * (size + 1)
+        for v, n in enumerate(counts, 1):
+            if n:
+                self.add(v, n)
+
+
+def _clogc(c):
+    return c * math.log2(c) if c > 0 else 0.0
+
+
+class SelectionWindow:
+    """Per-node selection counts with incrementally maintained metrics.
+
+    `caps` maps node ID -> caps string (dict or anything with .get); a
+    node's capabilities are read when it enters the window.
+    """
+
+    def __init__(self, caps=None):
+        self.caps = caps if caps is not None else {}
+        self.counts = {}          # node -> selections in window
+        self.flags = {}           # node -> caps bitmask
+        self.total = 0            # N, selections in window
+        self.sum_clogc = 0.0      # sum(c * log2 c)
+        self.rank_sum = 0         # sum(rank * c) over ascending counts
+        self.by_count = _Fenwick()
+        self.cap_nodes = [0] * (len(CAPABILITIES) + 1)   # X, f, R, XfR
+
+    def _cap_delta(self, flags, delta):
+        for i in range(len(CAPABILITIES)):
+            if flags & (1 << i):
+                self.cap_nodes[i] += delta
+        if flags == (1 << len(CAPABILITIES)) - 1:
+            self.cap_nodes[-1] += delta
+
+    def add(self, node):
+        c = self.counts.get(node, 0)
+        if c == 0:
+            # a new smallest element shifts every rank up by one
+            self.rank_sum += self.total + 1
+            flags = caps_flags(self.caps.get(node))
+            self.flags[node] = flags
+            self._cap_delta(flags, 1)
+        else:
+            # the last node with count c becomes the first with c + 1: same rank
+            self.rank_sum += self.by_count.prefix(c)
+            self.by_count.add(c, -1)
+        self.by_count.add(c + 1, 1)
+        self.counts[node] = c + 1
+        self.total += 1
+        self.sum_clogc += _clogc(c + 1) - _clogc(c)
+
+    def remove(self, node):
+        c = self.counts[node]
+        self.by_count.add(c, -1)
+        if c == 1:
+            # the smallest element leaves; every other rank drops by one
+            self.rank_sum -= self.total
+            del self.counts[node]
+            self._cap_delta(self.flags.pop(node), -1)
+        else:
+            # the first node with count c becomes the last with c - 1: same rank
+            self.rank_sum -= self.by_count.prefix(c - 1) + 1
+            self.by_count.add(c - 1, 1)
+            self.counts[node] = c - 1
+        self.total -= 1
+        self.sum_clogc += _clogc(c - 1) - _clogc(c)
+
+    def metrics(self):
+        n, total = len(self.counts), self.total
+        if total == 0:
+            return {"num_selections": 0, "unique_nodes": 0, "entropy": 0.0, "h_max": 0.0,
+                    "normalized_entropy": 0.0, "gini": 0.0, "share_X": 0.0, "share_f": 0.0,
+                    "share_R": 0.0, "share_XfR": 0.0}
+        entropy = max(0.0, math.log2(total) - self.sum_clogc / total)
+        h_max = math.log2(n) if n > 1 else 0.0
+        shares = [count / n for count in self.cap_nodes]
+        return {
+            "num_selections": total,
+            "unique_nodes": n,
+            "entropy": entropy,
+            "h_max": h_max,
+            "normalized_entropy": entropy / h_max if h_max else 0.0,
+            "gini": 2.0 * self.rank_sum / (n * total) - (n + 1) / n,
+            "share_X": shares[0], "share_f": shares[1], "share_R": shares[2], "share_XfR": shares[3],
+        }
+
+
+class SlidingSelectionMetrics:
+    """Time window over a selection stream; events must arrive in time order."""
+
+    def __init__(self, window=WINDOW, caps=None):
+        self.window = window
+        self.state = SelectionWindow(caps)
+        self.events = deque()
+
+    def add(self, timestamp, node):
+        self.events.append((timestamp, node))
+        self.state.add(node)
+
+    def expire(self, before):
+        """Drop selections with timestamp < before."""
+        events = self.events
+        while events and events[0][0] < before:
+            self.state.remove(events.popleft()[1])
+
+    def observe(self, timestamp, nodes):
+        """Live use: add one poll's selections and slide the window to end at `timestamp`."""
+        for node in nodes:
+            self.add(timestamp, node)
+        self.expire(timestamp - self.window)
+        return self.state.metrics()
+
+
+class SelectionMetricsTracker:
+    """SnapshotPipeline transform of the "client" stream: every poll's tunnel
+    peers are selections, and each poll emits the swarm-wide window metrics."""
+
+    name = "selection_metrics"
+    headers = METRIC_HEADERS[2:]
+    column_types = {"num_selections": "int", "unique_nodes": "int",
+                    **{h: "float" for h in METRIC_HEADERS[4:]}}
+    id_column = "Full ID"
+
+    def __init__(self, window=WINDOW, caps=None):
+        self.engine = SlidingSelectionMetrics(window, caps)
+
+    def update(self, router, timestamp, records):
+        nodes = [r[self.id_column] for r in records if r[self.id_column] not in ("Local", "Unknown")]
+        metrics = self.engine.observe(datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp(), nodes)
+        return [dict(metrics, Timestamp=timestamp, Router=router)]
+
+    def state_dict(self):
+        """Picklable window state (without the caps lookup), for i2p_checkpoint."""
+        window = {k: v for k, v in vars(self.engine.state).items() if k != "caps"}
+        return {"events": list(self.engine.events), "window": window}
+
+    def load_state_dict(self, state):
+        self.engine.events = deque(state["events"])
+        vars(self.engine.state).update(state["window"])
+
+
+def rolling_metrics(events, window=WINDOW, step=STEP, caps=None, min_unique=2):
+    """Notebook-equivalent rolling windows [t0, t0 + window] on a `step` grid
+    from the first event; windows with fewer than `min_unique` nodes are skipped.
+
+    events: time-ordered (epoch seconds, node ID). Yields metric rows.
+    """
+    events = iter(events)
+    pending = next(events, None)
+    if pending is None:
+        return
+    engine = SlidingSelectionMetrics(window, caps)
+    t0 = last = pending[0]
+    while True:
+        t1 = t0 + window
+        while pending is not None and pending[0] <= t1:
+            engine.add(*pending)
+            last = pending[0]
+            pending = next(events, None)
+        engine.expire(t0)
+        metrics = engine.state.metrics()
+        if metrics["unique_nodes"] >= min_unique:
+            yield dict(window_start=t0, window_end=t1, **metrics)
+        t0 += step
+        if pending is None and t0 > last:
+            break
+
+
+def read_fastset_by_time(path):
+    """(epoch seconds, node ID) from 4-Fastset-Nodes-By-Time.txt lines
+    "M/D/YYYY<TAB>H:MM:SS<TAB>router<TAB>node ID", sorted by time."""
+    events = []
+    with open(path, errors="ignore") as f:
+        for line in f:
+            parts = [p for p in line.rstrip("\n").split("\t") if p]
+            match = RID_RE.search(line)
+            if len(parts) < 3 or not match:
+                continue
+            try:
+                ts = datetime.strptime(f"{parts[0].strip()} {parts[1].strip()}", "%m/%d/%Y %H:%M:%S")
+            except ValueError:
+                continue
+            events.append((ts.timestamp(), match.group(0)))
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def read_profile_caps(path):
+    """node ID -> Caps from a profiles CSV (Full Node ID / node_id column)."""
+    caps = {}
+    with open(path, newline="", encoding="utf-8", errors="ignore") as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        id_col = next((fields[k] for k in ("full node id", "full_node_id", "node_id", "router_id") if k in fields), None)
+        caps_col = fields.get("caps")
+        if id_col is None or caps_col is None:
+            return caps
+        for row in reader:
+            caps[row[id_col].strip()] = row[caps_col] or ""
+    return caps
+
+
+def _duration(text):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(s|sec|min|m|h|d)", text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"bad duration {text!r} (e.g. 90s, 30min, 2h, 1d)")
+    return float(match.group(1)) * {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "d": 86400}[match.group(2)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rolling entropy/Gini/caps shares over a FastSet stream.")
+    parser.add_argument("fastset", help="4-Fastset-Nodes-By-Time.txt")
+    parser.add_argument("profiles", nargs="?", help="profiles CSV with node ID and Caps columns")
+    parser.add_argument("--window", type=_duration, default=WINDOW)
+    parser.add_argument("--step", type=_duration, default=STEP)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    caps = read_profile_caps(args.profiles) if args.profiles else {}
+    writer = csv.DictWriter(sys.stdout, fieldnames=METRIC_HEADERS)
+    writer.writeheader()
+    for row in rolling_metrics(read_fastset_by_time(args.fastset), args.window, args.step, caps):
+        for key in ("window_start", "window_end"):
+            row[key] = datetime.fromtimestamp(row[key]).strftime(TIMESTAMP_FORMAT)
+        writer.writerow(row)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the collectors are standalone scripts importing each other from scripts/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+DATA_DIR = os.path.join(ROOT, "data")
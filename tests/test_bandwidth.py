@@ -0,0 +1,46 @@
+from i2p_bandwidth import BandwidthRollup, top_from_rows
+from i2p_units import parse_bytes
+
+T = 1745107200   # on a day boundary in UTC
+PEER = "P" * 44
+OTHER = "Q" * 44
+
+
+def _hop(usage, expiration, peer=PEER):
+    return {"Direction": "Inbound", "Expiration": expiration, "Usage": usage, "Node Role": "Gateway",
+            "Full ID": peer, "Country": "Germany"}
+
+
+def _bytes(rollup, **kwargs):
+    return {key: nbytes for key, nbytes, *_ in rollup.top("day", buckets=1, **kwargs)}
+
+
+def test_first_readings_are_baselines_and_rebuilt_tunnels_are_new():
+    rollup = BandwidthRollup()
+    rollup.add("client", "7657", T, [_hop("100 KB", "5 min")])
+    assert _bytes(rollup, dimension="peer") == {PEER: 0}
+    rollup.add("client", "7657", T + 60, [_hop("150 KB", "4 min"), _hop("900 KB", "5 min", OTHER)])
+    # the same peer, direction and role rebuilt one poll later: a new tunnel, counted in full
+    rollup.add("client", "7657", T + 120, [_hop("20 KB", "9 min"), _hop("950 KB", "4 min", OTHER)])
+    assert _bytes(rollup, dimension="peer") == {
+        PEER: parse_bytes("150 KB") - parse_bytes("100 KB") + parse_bytes("20 KB"),
+        OTHER: parse_bytes("950 KB") - parse_bytes("900 KB"),
+    }
+    assert rollup.stats["baselines"] == 2
+
+
+def test_multi_peer_totals_are_kept_out_of_cross_source_totals():
+    rollup = BandwidthRollup()
+    for ts, usage in ((T, "1 MB"), (T + 60, "3 MB"), (T + 120, "2 MB")):
+        rollup.add("client", "7657", ts, [_hop(usage, "9 min" if ts == T else "8 min")])
+        rollup.add("multi_peers", "7657", ts, [{"Full Peer ID": PEER, "Country": "Germany", "Tunnels": "2",
+                                                "Usage": usage}])
+    assert _bytes(rollup, dimension="router", source="multi_peers") == {"7657": parse_bytes("2 MB")}
+    assert _bytes(rollup, dimension="router") == {"7657": parse_bytes("2 MB")}
+
+    rows = rollup.close_buckets()
+    assert {row["Router"] for row in rows if row["Dimension"] != "router"} == {""}
+    assert {row["Router"] for row in rows if row["Dimension"] == "router"} == {"7657"}
+    totals = top_from_rows([dict(row, **{k: str(v) for k, v in row.items()}) for row in rows],
+                           resolution="day", dimension="router")
+    assert [(key, nbytes) for key, nbytes, *_ in totals] == [("7657", parse_bytes("2 MB"))]
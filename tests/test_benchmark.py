@@ -0,0 +1,15 @@
+import glob
+import os
+import shutil
+
+from conftest import DATA_DIR
+from i2p_benchmark import parse_benchmark
+
+
+def test_parse_benchmark_reads_pages_with_invalid_utf8(tmp_path):
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))[:2]:
+        shutil.copy(path, tmp_path)
+    with open(tmp_path / "tunnels_data_1.html", "wb") as f:
+        f.write(b"<html><body><h3>Participating tunnels</h3>\xff\xfe truncated capture</body></html>")
+    results = parse_benchmark(str(tmp_path), repeat=1)
+    assert results["tunnels"]["pages"] == 3 and results["tunnels"]["rows"] > 0
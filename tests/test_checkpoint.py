@@ -0,0 +1,78 @@
+import glob
+import os
+
+from conftest import DATA_DIR
+from i2p_checkpoint import Checkpointer
+from i2p_tunnel_snapshot import SnapshotPipeline, extract_sections
+from i2p_tunnel_tracker import TunnelTracker
+
+PAGES = sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))[:4]
+ROUTERS = ["32797", "32808", "32830"]
+TIMESTAMPS = ["2025-04-18 12:57:00", "2025-04-18 12:58:00", "2025-04-18 12:59:00",
+              "2025-04-18 13:00:00", "2025-04-18 13:01:00", "2025-04-18 13:02:00"]
+
+
+def _cycles():
+    htmls = []
+    for path in PAGES:
+        with open(path, encoding="utf-8") as f:
+            htmls.append(f.read())
+    for i, timestamp in enumerate(TIMESTAMPS):
+        yield [(router, timestamp, htmls[(r + i // 2) % len(htmls)]) for r, router in enumerate(ROUTERS)]
+
+
+def _pipeline(output_dir):
+    pipeline = SnapshotPipeline(None, output_dir=output_dir, changes_only=True,
+                                trackers={"participating": TunnelTracker()},
+                                checkpointer=Checkpointer(os.path.join(output_dir, ".checkpoint"), interval=3600))
+    return pipeline
+
+
+def _apply(pipeline, cycle):
+    pipeline.apply([(router, timestamp, extract_sections(html, pipeline.extractors))
+                    for router, timestamp, html in cycle])
+
+
+def _outputs(output_dir):
+    out = {}
+    for path in sorted(glob.glob(os.path.join(output_dir, "*.csv"))):
+        with open(path, "rb") as f:
+            out[os.path.basename(path)] = f.read()
+    return out
+
+
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path):
+    reference_dir, crashed_dir = str(tmp_path / "reference"), str(tmp_path / "crashed")
+    cycles = list(_cycles())
+
+    reference = _pipeline(reference_dir)
+    reference.resume()
+    for cycle in cycles:
+        _apply(reference, cycle)
+    reference.close()
+    expected = _outputs(reference_dir)
+    assert len(expected) > 3   # hourly segments on both sides of 13:00
+
+    crashed = _pipeline(crashed_dir)
+    assert crashed.resume() == 0
+    for i, cycle in enumerate(cycles[:5]):
+        _apply(crashed, cycle)
+        if i == 1:
+            crashed.checkpoint()
+    for sink in crashed.sinks.values():
+        sink.flush()
+    # killed mid-write: a torn output row and a torn journal line
+    torn = sorted(crashed.output_files())[-1]
+    with open(torn, "a", encoding="utf-8") as f:
+        f.write("2025-04-18 13:01:00,32797,IN,")
+    crashed.checkpointer.journal.file.write(b"0badc0de {\"seq\": 6, \"cyc")
+    crashed.checkpointer.close()
+    assert _outputs(crashed_dir) != expected
+
+    resumed = _pipeline(crashed_dir)
+    assert resumed.resume() == 3          # cycles 3-5 come back from the journal
+    assert resumed.seq == 5
+    assert resumed.checkpointer.stats["truncated"] + resumed.checkpointer.stats["removed"] > 0
+    _apply(resumed, cycles[5])
+    resumed.close()
+    assert _outputs(crashed_dir) == expected
@@ -0,0 +1,54 @@
+from i2p_dedup import ChangeDetector, hash_key
+
+HOUR = 3600
+
+
+def test_changed_tracks_values_per_key():
+    detector = ChangeDetector()
+    assert detector.changed(("32797", "peerA"), ("OK",), now=0)
+    assert not detector.changed(("32797", "peerA"), ("OK",), now=60)
+    assert detector.changed(("32797", "peerA"), ("Unreachable",), now=120)
+    assert detector.changed(("32808", "peerA"), ("OK",), now=120)   # keyed per router
+    assert not detector.seen("x", now=0)
+    assert detector.seen("x", now=1)
+    assert len(detector) == 3
+    assert hash_key(None) == 0 and hash_key(("a", "b")) == hash_key(["a", "b"])
+
+
+def test_keys_expire_after_ttl_unless_seen_again():
+    detector = ChangeDetector(ttl=2 * HOUR, bucket_seconds=HOUR)
+    detector.changed("idle", now=0)
+    detector.changed("active", now=0)
+    for t in range(HOUR, 5 * HOUR, HOUR):
+        assert detector.seen("active", now=t)
+    assert not detector.seen("idle", now=4 * HOUR)
+    assert detector.stats["expired"] == 1
+    assert len(detector) == 2
+
+
+def test_max_bytes_evicts_oldest_first():
+    detector = ChangeDetector(ttl=100 * HOUR, bucket_seconds=HOUR, max_bytes=1)
+    detector.max_entries = 10
+    for i in range(30):
+        detector.changed(i, now=i * HOUR / 5)
+    assert len(detector) == 10
+    assert detector.stats["evicted"] == 20
+    assert all(detector.seen(i, now=6 * HOUR) for i in range(20, 30))
+
+
+def test_late_clock_keeps_buckets_ordered():
+    detector = ChangeDetector(ttl=2 * HOUR, bucket_seconds=HOUR)
+    detector.changed("new", now=10 * HOUR)
+    detector.changed("late", now=5 * HOUR)          # e.g. a cycle delivered late
+    assert list(detector.buckets) == sorted(detector.buckets)
+    assert not detector.seen("new", now=13 * HOUR)  # both expire together
+    assert detector.stats["expired"] == 2
+
+
+def test_state_dict_round_trip():
+    detector = ChangeDetector()
+    detector.changed("a", 1, now=0)
+    restored = ChangeDetector()
+    restored.load_state_dict(detector.state_dict())
+    assert not restored.changed("a", 1, now=60)
+    assert restored.changed("a", 2, now=60)
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import socket
+
+import aiohttp
+
+from i2p_metrics import Histogram, Metrics, serve, summary
+
+
+def test_prometheus_text_and_json():
+    metrics = Metrics()
+    metrics.inc("i2p_errors_total", router="32797", stage="fetch", kind="timeout")
+    metrics.inc("i2p_errors_total", 2, router='a"b', stage="parse", kind="ValueError")
+    metrics.set("i2p_fetch_in_flight", 3)
+    for value in (0.003, 0.2, 0.2, 100):
+        metrics.observe("i2p_fetch_seconds", value, status="ok")
+    metrics.watch("i2p_sink_buffered_rows", lambda: {(("stream", "client"),): 5})
+
+    text = metrics.render()
+    assert "# HELP i2p_errors_total Failures by router, stage and kind" in text
+    assert "# TYPE i2p_fetch_seconds histogram" in text
+    assert 'i2p_errors_total{kind="ValueError",router="a\\"b",stage="parse"} 2' in text
+    assert 'i2p_fetch_seconds_bucket{status="ok",le="0.005"} 1' in text
+    assert 'i2p_fetch_seconds_bucket{status="ok",le="0.25"} 3' in text
+    assert 'i2p_fetch_seconds_bucket{status="ok",le="+Inf"} 4' in text
+    assert 'i2p_fetch_seconds_count{status="ok"} 4' in text
+    assert 'i2p_sink_buffered_rows{stream="client"} 5' in text
+
+    data = metrics.as_dict()
+    assert data["i2p_fetch_seconds"][0]["p50"] == 0.25
+    assert data["i2p_fetch_seconds"][0]["p95"] == float("inf")
+    assert metrics.total("i2p_errors_total") == 3
+    assert metrics.total("i2p_errors_total", stage="fetch") == 1
+    assert metrics.total("i2p_sink_buffered_rows") == 5
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((1, 2, 5))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1, 1.5, 3, 4, 10):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(1, 2), (2, 3), (5, 5), (float("inf"), 6)]
+    assert [histogram.quantile(q) for q in (0.3, 0.5, 0.8, 1.0)] == [1, 2, 5, float("inf")]
+
+
+def test_failing_watch_is_logged_once_and_skipped(capsys):
+    metrics = Metrics()
+    state = {"fail": True}
+
+    def flaky():
+        if state["fail"]:
+            raise KeyError("stream")
+        return 7
+
+    metrics.watch("i2p_netdb_cache_entries", flaky)
+    metrics.render()
+    metrics.render()
+    assert "i2p_netdb_cache_entries" not in metrics.render()
+    assert capsys.readouterr().err.count("i2p_netdb_cache_entries unavailable (KeyError") == 1
+    state["fail"] = False
+    assert metrics.total("i2p_netdb_cache_entries") == 7
+    state["fail"] = True
+    metrics.render()
+    assert capsys.readouterr().err.count("unavailable") == 1   # reported again after recovering
+
+
+def test_summary_reports_interval_deltas():
+    metrics = Metrics()
+    metrics.inc("i2p_cycles_total")
+    metrics.inc("i2p_rows_total", 10, section="client")
+    metrics.inc("i2p_errors_total", router="32797", stage="fetch", kind="timeout")
+    line, previous = summary(metrics)
+    assert "1 cycles" in line and "10 rows" in line and "1 errors (most: 32797=1)" in line
+    metrics.inc("i2p_rows_total", 5, section="client")
+    line, _ = summary(metrics, previous)
+    assert "0 cycles" in line and "5 rows" in line
+
+
+def test_endpoint_serves_both_formats():
+    metrics = Metrics()
+    metrics.inc("i2p_cycles_total", 4)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    async def scrape():
+        runner = await serve(metrics, "127.0.0.1", port)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                    text = await resp.text()
+                async with session.get(f"http://127.0.0.1:{port}/metrics.json") as resp:
+                    data = json.loads(await resp.text())
+        finally:
+            await runner.cleanup()
+        return text, data
+
+    text, data = asyncio.run(scrape())
+    assert "i2p_cycles_total 4" in text
+    assert data["i2p_cycles_total"] == [{"labels": {}, "value": 4}]
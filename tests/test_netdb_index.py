@@ -0,0 +1,67 @@
+import os
+
+from i2p_netdb_index import NetDbIndex, encode_router_info, parse_router_info
+
+
+def _write(netdb, router_id, data, mtime):
+    subdir = netdb / ("r" + router_id[0])
+    subdir.mkdir(exist_ok=True)
+    path = subdir / ("routerInfo-%s.dat" % router_id)
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_encode_parse_round_trip():
+    router_id, data = encode_router_info([("NTCP2", "10.0.0.1", 12345), ("SSU2", "10.0.0.1", 12345)],
+                                         caps="PfR", version="0.9.64", published=1000, seed=b"a")
+    parsed_id, published, addresses, options = parse_router_info(data)
+    assert parsed_id == router_id
+    assert published == 1000
+    assert addresses == [("NTCP2", "10.0.0.1", "12345"), ("SSU2", "10.0.0.1", "12345")]
+    assert options == {"caps": "PfR", "router.version": "0.9.64"}
+
+
+def test_lookup_by_full_and_abbreviated_id(tmp_path):
+    good_id, good = encode_router_info([("NTCP2", "10.0.0.1", 1), ("SSU2", "10.0.0.1", 1)], seed=b"good")
+    hidden_id, hidden = encode_router_info([], seed=b"hidden")
+    _write(tmp_path, good_id, good, 100)
+    _write(tmp_path, hidden_id, hidden, 100)
+    index = NetDbIndex(str(tmp_path))
+    assert index.refresh() == 2
+
+    assert index.ip(good_id) == "10.0.0.1"
+    assert index.ip(good_id[:6]) == "10.0.0.1"
+    assert index.ip(hidden_id) == "Unknown"
+    assert index.ip("notarouter") is None
+
+
+def test_unparsable_file_is_left_out_until_it_changes(tmp_path):
+    router_id, data = encode_router_info([("NTCP2", "10.0.0.2", 1)], seed=b"partial")
+    path = _write(tmp_path, router_id, data[:420], 100)  # still being written
+    index = NetDbIndex(str(tmp_path))
+    assert index.refresh() == 0
+    assert index.ip(router_id) is None
+    assert index.ip(router_id[:6]) is None
+    assert index.stats["errors"] == 1
+
+    # same mtime: not re-parsed on every refresh
+    assert index.refresh() == 0
+    assert index.stats["errors"] == 1
+
+    _write(tmp_path, router_id, data, 200)
+    assert index.refresh() == 1
+    assert index.ip(router_id) == "10.0.0.2"
+    assert index.failed == {}
+    assert path in index.by_path
+
+
+def test_refresh_drops_deleted_files(tmp_path):
+    router_id, data = encode_router_info([("NTCP2", "10.0.0.3", 1)], seed=b"gone")
+    path = _write(tmp_path, router_id, data, 100)
+    index = NetDbIndex(str(tmp_path))
+    index.refresh()
+    os.remove(path)
+    index.refresh()
+    assert index.ip(router_id) is None
+    assert index.stats["removed"] == 1
@@ -0,0 +1,31 @@
+import sqlite3
+import time
+
+from i2p_netdb_resolver import NetDbResolver
+
+
+def _rows(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT node_id FROM netdb_ips ORDER BY resolved_at").fetchall()
+
+
+def test_flush_persists_without_trimming_until_close(tmp_path):
+    path = str(tmp_path / "netdb.sqlite")
+    resolver = NetDbResolver(None, db_path=path, max_entries=3)
+    now = time.time()
+    for i in range(5):
+        resolver.put("node%d" % i, "10.0.0.%d" % i, now=now + i)
+    resolver.flush()
+    assert len(_rows(path)) == 5
+    resolver.close()
+    assert _rows(path) == [("node2",), ("node3",), ("node4",)]
+
+
+def test_trim_drops_expired_entries(tmp_path):
+    path = str(tmp_path / "netdb.sqlite")
+    resolver = NetDbResolver(None, db_path=path, max_entries=10)
+    resolver.put("stale", "10.0.0.1", now=1.0)
+    resolver.put("fresh", "10.0.0.2")
+    resolver.flush(trim=True)
+    assert _rows(path) == [("fresh",)]
+    resolver.close()
@@ -0,0 +1,53 @@
+import os
+
+import pyarrow.dataset as ds
+
+from i2p_output_sinks import ParquetSink
+
+HEADERS = ["Timestamp", "Router", "Peer", "Usage"]
+
+
+def _records(hour, n, router="7657"):
+    return [{"Timestamp": f"2025-04-01 {hour:02d}:{i % 60:02d}:00", "Router": router,
+             "Peer": f"peer{i}", "Usage": str(i)} for i in range(n)]
+
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, fs in os.walk(root) for f in fs)
+
+
+def _sink(tmp_path):
+    return ParquetSink(str(tmp_path), "client", HEADERS, column_types={"Usage": "int"}, flush_rows=10)
+
+
+def test_every_flush_leaves_readable_files(tmp_path):
+    sink = _sink(tmp_path)
+    records = _records(13, 25)
+    for i in range(0, 25, 10):
+        sink.write(records[i:i + 10])
+    sink.flush()
+    # no close(): as after a crash, every file on disk has a footer
+    assert ds.dataset(sink.root, partitioning="hive").count_rows() == 25
+    assert len(_files(sink.root)) == 3
+
+
+def test_segments_are_compacted_on_rotation_and_close(tmp_path):
+    sink = _sink(tmp_path)
+    records = _records(13, 25) + _records(14, 5)
+    for i in range(0, 30, 10):
+        sink.write(records[i:i + 10])
+    sink.close()
+    assert _files(sink.root) == ["router=7657/date=2025-04-01/part-20250401_13.parquet",
+                                 "router=7657/date=2025-04-01/part-20250401_14.parquet"]
+    table = ds.dataset(sink.root, partitioning="hive").to_table()
+    assert table.num_rows == 30
+    assert sorted(table.column("Usage").to_pylist()) == sorted(list(range(25)) + list(range(5)))
+
+
+def test_restart_keeps_the_pieces_of_a_crashed_run(tmp_path):
+    crashed = _sink(tmp_path)
+    crashed.write(_records(13, 10))
+    restarted = _sink(tmp_path)
+    restarted.write(_records(13, 10))
+    restarted.close()
+    assert ds.dataset(crashed.root, partitioning="hive").count_rows() == 20
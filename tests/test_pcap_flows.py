@@ -0,0 +1,50 @@
+import csv
+import struct
+
+import pytest
+
+from i2p_pcap_flows import extract, write_synthetic
+
+
+def _totals(path):
+    totals = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            key = (row["Src IP"], int(row["Src Port"]), row["Dst IP"], int(row["Dst Port"]), row["Proto"])
+            stats = totals.setdefault(key, [0, 0])
+            stats[0] += int(row["Packets"])
+            stats[1] += int(row["PacketSize(Bytes)"])
+    return totals
+
+
+@pytest.mark.parametrize("fmt", ["pcap", "pcapng"])
+def test_flows_and_buckets_match_synthetic_capture(tmp_path, fmt):
+    capture = str(tmp_path / ("test." + fmt))
+    expected = write_synthetic(capture, count=5000, flows=200, fmt=fmt)
+    counts = extract(capture, str(tmp_path / "out"), packets=True, bucket_seconds=1)
+
+    assert counts["frames"] == 5000
+    assert counts["ip_packets"] == sum(s[0] for s in expected.values())
+    assert counts["bytes"] == sum(s[1] for s in expected.values())
+    assert counts["skipped_blocks"] == 0
+    assert _totals(tmp_path / "out" / "flows.csv") == expected
+    assert _totals(tmp_path / "out" / "buckets.csv") == expected
+    assert any(":" in key[0] for key in expected)   # IPv6 flows are kept
+
+    with open(tmp_path / "out" / "packets.csv", newline="", encoding="utf-8") as f:
+        assert sum(1 for _ in csv.DictReader(f)) == counts["ip_packets"]
+
+
+def test_pcapng_block_with_undeclared_interface_is_skipped(tmp_path):
+    capture = str(tmp_path / "test.pcapng")
+    expected = write_synthetic(capture, count=500, flows=20, fmt="pcapng")
+    frame = bytes(60)
+    block_len = 32 + len(frame)
+    with open(capture, "ab") as f:
+        f.write(struct.pack("<IIIIIII", 6, block_len, 3, 0, 0, len(frame), len(frame))
+                + frame + struct.pack("<I", block_len))
+    counts = extract(capture, str(tmp_path / "out"), bucket_seconds=0)
+
+    assert counts["skipped_blocks"] == 1
+    assert counts["frames"] == 500
+    assert _totals(tmp_path / "out" / "flows.csv") == expected
@@ -0,0 +1,102 @@
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from i2p_peer_graph import PeerGraph
+
+
+def _graph(seed=11, peers=30, tunnels=60):
+    rng = random.Random(seed)
+    graph = PeerGraph(dedup_ttl=None)
+    ids = [f"peer{i:02d}" for i in range(peers)]
+    for _ in range(tunnels):
+        hops = rng.sample(ids, rng.randrange(2, 5))
+        if rng.random() < 0.2:
+            hops.insert(rng.randrange(len(hops) + 1), "Local")
+        graph.add_path(hops)
+    return graph
+
+
+def _dense_pagerank(a, damping=0.85, iterations=2000):
+    n = len(a)
+    out = a.sum(axis=1)
+    p = np.divide(a, out[:, None], out=np.zeros_like(a), where=out[:, None] > 0)
+    x = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        x = damping * (p.T @ x + x[out == 0].sum() / n) + (1 - damping) / n
+    return x / x.sum()
+
+
+def _dense_betweenness(a, directed):
+    """Brandes over an adjacency matrix, one BFS per source."""
+    n = len(a)
+    neighbours = [np.flatnonzero(a[v]) for v in range(n)]
+    scores = np.zeros(n)
+    for s in range(n):
+        order, preds = [], [[] for _ in range(n)]
+        sigma, dist = np.zeros(n), np.full(n, -1)
+        sigma[s], dist[s] = 1, 0
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            for w in neighbours[v]:
+                if dist[w] < 0:
+                    dist[w] = dist[v] + 1
+                    queue.append(w)
+                if dist[w] == dist[v] + 1:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+        delta = np.zeros(n)
+        for w in reversed(order):
+            for v in preds[w]:
+                delta[v] += sigma[v] / sigma[w] * (1 + delta[w])
+            if w != s:
+                scores[w] += delta[w]
+    if not directed:
+        scores /= 2
+    return scores / ((n - 1) * (n - 2) / (1 if directed else 2))
+
+
+@pytest.mark.parametrize("kind", ["hop", "co"])
+def test_centrality_matches_dense_reference(kind):
+    graph = _graph()
+    active = graph.active_nodes(kind)
+    dense = graph.matrix(kind).toarray()[np.ix_(active, active)]
+    assert kind == "hop" or np.array_equal(dense, dense.T)
+
+    assert np.allclose(graph.pagerank(kind)[active], _dense_pagerank(dense), atol=1e-8)
+    exact = graph.betweenness(kind, samples=len(active), batch=7)
+    assert np.allclose(exact[active], _dense_betweenness(dense != 0, directed=kind == "hop"))
+    sampled = graph.betweenness(kind, samples=len(active) // 2)
+    assert np.corrcoef(sampled[active], exact[active])[0, 1] > 0.5
+
+
+def test_paths_edges_and_repeat_sightings():
+    graph = PeerGraph()
+    assert graph.add_path(["a", "b", "Local", "c"], key=("r", "out", "a", "b", "c"), now=0)
+    assert not graph.add_path(["a", "b", "Local", "c"], key=("r", "out", "a", "b", "c"), now=60)
+    hop, co = graph.matrix("hop").toarray(), graph.matrix("co").toarray()
+    a, b, c = (graph.index[p] for p in "abc")
+    assert hop[a, b] == 1 and hop.sum() == 1          # "Local" breaks hop adjacency
+    assert co[a, c] == co[c, a] == 1 and co.sum() == 6
+    assert list(graph.degree("co")) == [2, 2, 2]
+    assert graph.summary() == {"tunnels": 1, "nodes": 3, "hop_edges": 1, "co_edges": 3}
+
+
+def test_incremental_matrices_match_one_batch():
+    whole, incremental = _graph(seed=4), PeerGraph(dedup_ttl=None)
+    rng = random.Random(4)
+    ids = [f"peer{i:02d}" for i in range(30)]
+    for i in range(60):
+        hops = rng.sample(ids, rng.randrange(2, 5))
+        if rng.random() < 0.2:
+            hops.insert(rng.randrange(len(hops) + 1), "Local")
+        incremental.add_path(hops)
+        if i % 13 == 0:
+            incremental.matrix("hop")
+            incremental.matrix("co")
+    for kind in ("hop", "co"):
+        assert (whole.matrix(kind) != incremental.matrix(kind)).nnz == 0
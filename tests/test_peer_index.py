@@ -0,0 +1,73 @@
+import random
+
+from i2p_peer_index import TUNNEL_TYPES, PeerIndex
+
+WINDOW, BUCKET = 3600, 300
+
+
+class BruteIndex:
+    """Every accepted sighting kept; answers recomputed from scratch."""
+
+    def __init__(self):
+        self.sightings = []
+        self.newest = None
+
+    def advance(self, ts):
+        number = int(ts // BUCKET)
+        self.newest = number if self.newest is None else max(self.newest, number)
+
+    def observe(self, router, ts, peers, tunnel_type):
+        self.advance(ts)
+        number = int(ts // BUCKET)
+        if number >= self.newest - WINDOW // BUCKET + 1:
+            self.sightings.extend((number, peer, router, tunnel_type) for peer in peers)
+
+    def groups(self):
+        routers, types = {}, {}
+        if self.newest is None:
+            return routers, types
+        oldest = self.newest - WINDOW // BUCKET + 1
+        for number, peer, router, tunnel_type in self.sightings:
+            if number >= oldest:
+                routers.setdefault(peer, set()).add(router)
+                types.setdefault(peer, set()).add(tunnel_type)
+        return routers, types
+
+    def peers(self, min_routers, min_types):
+        routers, types = self.groups()
+        return {p for p in routers if len(routers[p]) >= min_routers and len(types[p]) >= min_types}
+
+
+def test_window_queries_match_brute_force_with_late_sightings():
+    rng = random.Random(2)
+    index, brute = PeerIndex(WINDOW, BUCKET, min_routers=3, min_types=2), BruteIndex()
+    peers = [f"peer{i}" for i in range(60)]
+    t = 1744848000.0
+    for step in range(1500):
+        t += rng.expovariate(1 / 20)
+        # some sightings arrive late: a few minutes, or more than the whole window
+        ts = t - rng.choice([0, 0, 0, 0, 240, 900, 2 * WINDOW])
+        router, tunnel_type = rng.randrange(8), rng.choice(TUNNEL_TYPES)
+        seen = rng.sample(peers, rng.randrange(1, 6)) + (["Local"] if step % 7 == 0 else [])
+
+        brute.advance(ts)   # crossings are relative to the window ending at this sighting
+        before = brute.peers(3, 2)
+        crossed = index.observe(router, ts, seen, tunnel_type)
+        brute.observe(router, ts, [p for p in seen if p != "Local"], tunnel_type)
+        assert set(crossed) == brute.peers(3, 2) - before
+
+        if step % 25 == 0:
+            for k, m in ((1, 1), (2, 1), (3, 2), (4, 3), (2, 4)):
+                assert set(index.peers(k, m)) == brute.peers(k, m), (step, k, m)
+            routers, types = brute.groups()
+            for row in index.table(1, 1):
+                assert row["Router List"] == ";".join(str(r) for r in sorted(routers[row["Full Peer ID"]]))
+                assert set(row["Type List"].split(";")) == types[row["Full Peer ID"]]
+    assert index.stats["late"] > 0 and index.stats["expired_buckets"] > 0
+
+
+def test_profiles_count_only_high_capacity_peers():
+    index = PeerIndex(WINDOW, BUCKET, min_routers=1)
+    records = [{"Full Node ID": "a", "Groups": "Fast, High Capacity"}, {"Full Node ID": "b", "Groups": "Standard"}]
+    assert index.ingest("32797", 0, "profiles", records) == ["a"]
+    assert index.describe("a")["Type List"] == "high_capacity"
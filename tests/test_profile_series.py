@@ -0,0 +1,92 @@
+import csv
+import math
+import time
+
+from i2p_profile_series import ProfileSeries, ingest
+
+START = 1745107200   # 2025-04-20 00:00:00 UTC, on an hour boundary
+PEER = "A" * 44
+
+
+def _write_router_csv(path, router, hours=6, interval=300):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Timestamp", "Router", "Full Node ID", "Speed", "Capacity",
+                                               "Integration"])
+        writer.writeheader()
+        for ts in range(START, START + hours * 3600, interval):
+            writer.writerow({"Timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)),
+                             "Router": router, "Full Node ID": PEER, "Speed": "1,000.00",
+                             "Capacity": str(router), "Integration": "--"})
+
+
+def test_per_router_files_roll_up_into_one_row_per_bucket(tmp_path):
+    for router in (32797, 32808):
+        _write_router_csv(tmp_path / f"profiles_{router}.csv", router)
+    series = ProfileSeries()
+    assert ingest(series, [str(tmp_path)]) == 2 * 72
+    assert series.stats["late"] == 0
+    hours = series.rollup(PEER, "hour")
+    assert len(hours["bucket"]) == 6
+    assert hours["count"].tolist() == [24] * 6
+    assert hours["capacity_mean"].tolist() == [(32797 + 32808) / 2] * 6
+    assert all(math.isnan(v) for v in hours["integration_mean"])
+
+
+def test_late_observations_are_merged_into_the_closed_bucket(tmp_path):
+    series = ProfileSeries(grace=60)
+    series.observe(START, PEER, 1, 10.0, 1.0, None)
+    series.observe(START + 2 * 3600, PEER, 1, 10.0, 1.0, None)
+    series.observe(START + 30, PEER, 2, 20.0, 3.0, 5.0)
+    assert series.stats["late"] == 2   # minute and hour; the day is still open
+    hours = series.rollup(PEER, "hour")
+    assert hours["count"].tolist() == [2, 1]
+    assert hours["speed_mean"].tolist() == [15.0, 10.0]
+    assert hours["capacity_min"].tolist() == [1.0, 1.0]
+    assert hours["integration_max"][0] == 5.0
+
+    path = str(tmp_path / "series.npz")
+    series.save(path)
+    loaded = ProfileSeries.load(path)
+    assert loaded.rollup(PEER, "hour")["count"].tolist() == [2, 1]
+    assert len(loaded.rollups["hour"]) == 1
+
+
+def test_merged_rollups_match_a_brute_force_aggregation(tmp_path):
+    import random
+    from collections import defaultdict
+
+    import numpy as np
+
+    rng = random.Random(4)
+    series = ProfileSeries(grace=60, retention={"minute": None, "hour": None, "day": None})
+    expected = {name: defaultdict(list) for name in series.resolutions}
+    ts = START
+    for _ in range(6000):
+        ts += rng.randint(0, 4)
+        # about 5% of the observations arrive late, after their bucket was closed
+        seen = ts - rng.randint(120, 4000) if rng.random() < 0.05 else ts
+        peer = f"peer{rng.randrange(5)}"
+        values = [rng.random() if rng.random() > 0.3 else None for _ in range(3)]
+        series.observe(seen, peer, 1, *values)
+        for name, seconds in series.resolutions.items():
+            expected[name][(peer, seen - seen % seconds)].append(values)
+    assert series.stats["late"]
+
+    path = str(tmp_path / "series.npz")
+    series.save(path)
+    for loaded in (series, ProfileSeries.load(path)):
+        for name in ("minute", "hour"):
+            for peer in (f"peer{i}" for i in range(5)):
+                rows = loaded.rollup(peer, name)
+                assert rows["bucket"].tolist() == sorted(b for p, b in expected[name] if p == peer)
+                for i, bucket in enumerate(rows["bucket"].tolist()):
+                    observations = expected[name][(peer, bucket)]
+                    assert rows["count"][i] == len(observations)
+                    for j, metric in enumerate(("speed", "capacity", "integration")):
+                        present = [v[j] for v in observations if v[j] is not None]
+                        assert rows[f"{metric}_count"][i] == len(present)
+                        mean = np.mean(present) if present else math.nan
+                        assert np.isclose(rows[f"{metric}_mean"][i], mean, rtol=1e-5, equal_nan=True)
+                        if present:
+                            assert np.isclose(rows[f"{metric}_min"][i], min(present))
+                            assert np.isclose(rows[f"{metric}_max"][i], max(present))
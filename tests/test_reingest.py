@@ -0,0 +1,59 @@
+import glob
+import os
+import shutil
+
+import pytest
+
+from conftest import DATA_DIR
+from i2p_reingest import reingest
+
+
+@pytest.fixture
+def pages(tmp_path):
+    directory = tmp_path / "pages"
+    directory.mkdir()
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))[:2]:
+        shutil.copy(path, directory)
+    return str(directory)
+
+
+def _tables(directory):
+    tables = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            tables[name] = f.read()
+    return tables
+
+
+def test_rerun_replaces_the_tables(pages, tmp_path):
+    out = str(tmp_path / "out")
+    first = reingest([pages], out, workers=1)
+    tables = _tables(out)
+    assert first["participating"] and tables
+    with pytest.raises(ValueError, match="not empty"):
+        reingest([pages], out, workers=1)
+    assert reingest([pages], out, workers=1, overwrite=True) == first
+    assert _tables(out) == tables
+    assert sorted(os.listdir(tmp_path)) == ["out", "pages"]
+
+
+def test_output_directory_must_not_contain_the_inputs(pages):
+    with pytest.raises(ValueError, match="inside the output directory"):
+        reingest([pages], os.path.dirname(pages), workers=1, overwrite=True)
+
+
+
+# shipped lists written from another poll than the saved page (see i2p_reingest's docstring)
+OTHER_POLL = {f"client_tunnels_{port}.txt" for port in (32808, 32852, 32918, 32951, 32984, 33061)}
+
+
+def test_peer_lists_match_the_shipped_lists_of_the_same_poll(tmp_path):
+    out = str(tmp_path / "out")
+    reingest([DATA_DIR], out, workers=1)
+    different = set()
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*_tunnels*.txt"))):
+        name = os.path.basename(path)
+        with open(path, encoding="utf-8") as shipped, open(os.path.join(out, name), encoding="utf-8") as regenerated:
+            if shipped.read() != regenerated.read():
+                different.add(name)
+    assert different == OTHER_POLL
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+
+from conftest import DATA_DIR
+from i2p_router_ids import RESERVED_IDS, UNKNOWN_CODE, RouterIdRegistry, extract_ids
+
+
+def _ids():
+    with open(os.path.join(DATA_DIR, "client_tunnels.txt"), encoding="utf-8") as f:
+        return [rid for line in f for rid in extract_ids(line)]
+
+
+def test_codes_are_stable_across_processes_and_restarts(tmp_path):
+    path = str(tmp_path / "ids.sqlite")
+    ids = _ids()
+    assert len(ids) > 10
+    first, second = RouterIdRegistry(path), RouterIdRegistry(path)
+    try:
+        assert [first.intern(r) for r in RESERVED_IDS] == [0, 1, 2]
+        codes = first.intern_many(ids[:10])
+        assert min(codes) >= len(RESERVED_IDS)
+        # the second registry interns overlapping IDs after the first assigned them
+        assert second.intern_many(ids[5:15])[:5] == codes[5:]
+        assert first.intern_many(ids[:15]) == [second.code(r) for r in ids[:15]]
+    finally:
+        first.close()
+        second.close()
+
+    reopened = RouterIdRegistry(path)
+    try:
+        assert reopened.intern_many(ids[:10]) == codes
+        assert len(reopened) == len(RESERVED_IDS) + len(set(ids[:15]))
+    finally:
+        reopened.close()
+
+
+def test_abbreviations_and_column_codes(tmp_path):
+    registry = RouterIdRegistry(str(tmp_path / "ids.sqlite"))
+    try:
+        a, b, c = "AAAA" + "x" * 40, "AAAA" + "y" * 40, "BBBB" + "z" * 40
+        registry.intern_many([a, b, c])
+        assert registry.code("BBBB") == registry.code(c)
+        assert registry.code("AAAAx") == registry.code(a)
+        assert registry.code("AAAA") is None                 # ambiguous
+        assert registry.code("CCCC") is None
+
+        codes = registry.encode([a, "Local", c, a])
+        assert codes.dtype == np.int32
+        assert list(registry.decode(codes)) == [a, "Local", c, a]
+        assert list(registry.encode(["DDDD" + "w" * 40, c], assign=False)) == [UNKNOWN_CODE, registry.code(c)]
+    finally:
+        registry.close()
@@ -0,0 +1,34 @@
+import glob
+import os
+from types import SimpleNamespace
+
+import i2p_scheduler
+from conftest import DATA_DIR
+from i2p_scheduler import AdaptiveScheduler, tunnel_churn, tunnel_keys
+
+TUNNEL_PAGES = sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_churn_between_key_sets():
+    assert tunnel_churn(None, frozenset({("1", "2")})) is None
+    assert tunnel_churn(frozenset(), frozenset()) == 0.0
+    assert tunnel_churn(frozenset({("1", "2"), ("3", "4")}), frozenset({("1", "2"), ("5", "6")})) == 2 / 3
+
+
+def test_each_poll_parses_its_page_once(monkeypatch):
+    parsed = []
+    parse = i2p_scheduler.parse_participating_tunnels
+    monkeypatch.setattr(i2p_scheduler, "parse_participating_tunnels", lambda html: parsed.append(html) or parse(html))
+    poller = SimpleNamespace(targets=[SimpleNamespace(name="router1")], deadline=30)
+    scheduler = AdaptiveScheduler(poller, interval=60)
+    router = scheduler.routers["router1"]
+    pages = [_read(path) for path in TUNNEL_PAGES[:3]]
+    for now, html in enumerate(pages):
+        scheduler._after_poll(router, SimpleNamespace(status="ok", elapsed=0.1, html=html), now)
+    assert parsed == pages
+    assert router.last_keys == tunnel_keys(pages[-1])
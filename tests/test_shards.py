@@ -0,0 +1,78 @@
+import time
+
+from i2p_shards import Aggregator, HashRing
+from i2p_swarm_poller import Target
+from i2p_tunnel_snapshot import SnapshotPipeline
+
+ROUTERS = [str(port) for port in range(20000, 20200)]
+
+
+def _stamp(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+
+def test_ring_moves_only_the_joining_or_leaving_share():
+    before = HashRing(["a", "b", "c"])
+    joined = HashRing(["a", "b", "c", "d"])
+    left = HashRing(["a", "c"])
+    assert all(len(keys) > 20 for keys in before.assign(ROUTERS).values())
+
+    moved = [r for r in ROUTERS if before.owner(r) != joined.owner(r)]
+    assert moved and all(joined.owner(r) == "d" for r in moved)
+    assert len(moved) < len(ROUTERS) / 2
+
+    moved = [r for r in ROUTERS if before.owner(r) != left.owner(r)]
+    assert sorted(moved) == sorted(before.assign(ROUTERS)["b"])
+    assert HashRing([]).owner("20000") is None
+
+
+def _aggregator(tmp_path):
+    pipeline = SnapshotPipeline(None, output_dir=str(tmp_path), sink_options={"rotate": None})
+    applied = []
+    apply = pipeline.apply
+
+    def record(entries):
+        applied.extend((router, timestamp) for router, timestamp, _ in entries)
+        return apply(entries)
+
+    pipeline.apply = record
+    targets = [Target(name, f"http://127.0.0.1:{name}") for name in ROUTERS]
+    return Aggregator(pipeline, targets, interval=60), applied
+
+
+def test_receive_rejects_duplicate_stale_and_late_cycles(tmp_path):
+    aggregator, applied = _aggregator(tmp_path)
+    aggregator.heartbeat("w1")
+    router = next(r for r in ROUTERS if HashRing(["w1", "w2"]).owner(r) == "w2")
+    now = time.time()
+    early, earlier, late = _stamp(now - 120), _stamp(now - 60), _stamp(now + 60)
+    empty = {extractor.name: [] for extractor in aggregator.pipeline.extractors}
+
+    assert aggregator.receive("w1", [[(router, early, empty)]])["accepted"] == 1
+    assert aggregator.receive("w1", [[(router, early, empty)]])["duplicate"] == 1   # resent batch
+
+    aggregator.heartbeat("w2")                                       # router moves to w2
+    assert aggregator.assignment("w2")["targets"].count([router, f"http://127.0.0.1:{router}"]) == 1
+    assert aggregator.receive("w1", [[(router, late, empty)]])["stale"] == 1
+    assert aggregator.receive("w2", [[(router, late, empty)]])["accepted"] == 1
+    # w1's queued pre-handoff poll arrives after w2's newer one
+    assert aggregator.receive("w1", [[(router, earlier, empty)]])["late"] == 1
+
+    assert applied == [(router, early), (router, late)]
+    assert {k: aggregator.stats[k] for k in ("accepted", "duplicate", "stale", "late")} == \
+        {"accepted": 2, "duplicate": 1, "stale": 1, "late": 1}
+    aggregator.pipeline.close()
+
+
+def test_leave_hands_routers_back(tmp_path):
+    aggregator, _ = _aggregator(tmp_path)
+    aggregator.heartbeat("w1")
+    aggregator.heartbeat("w2")
+    shares = {w: len(aggregator.assignment(w)["targets"]) for w in ("w1", "w2")}
+    assert sum(shares.values()) == len(ROUTERS) and min(shares.values()) > 0
+    epoch = aggregator.epoch
+    aggregator.leave("w2")
+    assert aggregator.epoch == epoch + 1
+    assert len(aggregator.assignment("w1")["targets"]) == len(ROUTERS)
+    assert aggregator.stats["joined"] == 2 and aggregator.stats["left"] == 1
+    aggregator.pipeline.close()
@@ -0,0 +1,33 @@
+import glob
+import os
+import sys
+
+from conftest import DATA_DIR
+from i2p_tunnel_snapshot import SnapshotPipeline, extract_sections, make_trackers, parse_args
+
+PAGES = sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))
+TIMESTAMPS = ["2025-04-18 12:00:00", "2025-04-18 12:01:00"]
+
+
+def test_all_tracker_options_together(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["i2p_tunnel_snapshot.py", "--participating", "both", "--selection-metrics",
+                                      "--cross-router", "2", "--bandwidth"])
+    trackers = make_trackers(parse_args())
+    assert all(isinstance(group, list) and all(hasattr(t, "name") for t in group) for group in trackers.values())
+    assert [t.name for t in trackers["participating"]] == ["participating_events", "multi_router_peers",
+                                                           "bandwidth_rollups"]
+    assert [t.name for t in trackers["client"]] == ["selection_metrics", "multi_router_peers", "bandwidth_rollups"]
+
+    pipeline = SnapshotPipeline(None, output_dir=str(tmp_path), trackers=trackers,
+                                sink_options={"rotate": None})
+    for timestamp in TIMESTAMPS:
+        cycle = []
+        for path in PAGES:
+            with open(path, encoding="utf-8") as f:
+                sections = extract_sections(f.read(), pipeline.extractors)
+            cycle.append((os.path.basename(path)[len("tunnels_data_"):-len(".html")], timestamp, sections))
+        pipeline.apply(cycle)
+    pipeline.close()
+    for name in ("participating_events", "multi_router_peers", "bandwidth_rollups", "selection_metrics"):
+        with open(tmp_path / f"{name}.csv", encoding="utf-8") as f:
+            assert len(f.readlines()) > 1, name
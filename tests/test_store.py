@@ -0,0 +1,63 @@
+import csv
+import glob
+import os
+import sys
+
+from conftest import DATA_DIR
+from i2p_store import ObservationStore, csv_layout, main
+from i2p_tunnel_parser import parse_participating_tunnels
+from i2p_tunnel_snapshot import ParticipatingTunnelExtractor
+from i2p_tunnel_tracker import EVENT_HEADERS, TunnelTracker
+
+PAGE = sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))[0]
+TIMESTAMP = "2025-04-18 12:00:00"
+
+
+def _write(path, headers, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_participating_events_are_not_sightings(tmp_path):
+    with open(PAGE, encoding="utf-8") as f:
+        records = parse_participating_tunnels(f.read())
+    assert records
+    rows = [dict(r, Timestamp=TIMESTAMP, Router="32797") for r in records]
+    _write(tmp_path / "participating_tunnels.csv",
+           ["Timestamp", "Router"] + ParticipatingTunnelExtractor.headers, rows)
+    _write(tmp_path / "participating_events_20250418_12.csv", EVENT_HEADERS,
+           TunnelTracker().update("32797", TIMESTAMP, records))
+
+    assert csv_layout("participating_events_20250418_12.csv", EVENT_HEADERS) is None
+    store = ObservationStore(str(tmp_path / "store.sqlite"))
+    try:
+        assert store.ingest(str(tmp_path)) == 2 * len(records)
+    finally:
+        store.close()
+
+
+def test_node_summary_honours_time_range(tmp_path, monkeypatch, capsys):
+    with open(PAGE, encoding="utf-8") as f:
+        records = parse_participating_tunnels(f.read())
+    rows = [dict(r, Timestamp=ts, Router="32797") for ts in (TIMESTAMP, "2025-04-18 13:00:00") for r in records]
+    _write(tmp_path / "participating_tunnels.csv",
+           ["Timestamp", "Router"] + ParticipatingTunnelExtractor.headers, rows)
+    db = str(tmp_path / "store.sqlite")
+    store = ObservationStore(db)
+    try:
+        store.ingest(str(tmp_path))
+        node = store.top(limit=1)[0][0]
+        full = store.summary(node)
+    finally:
+        store.close()
+
+    monkeypatch.setattr(sys, "argv", ["i2p_store.py", "--db", db, "node", node, "--summary",
+                                      "--from", "2025-04-18 12:30:00"])
+    main()
+    printed = [line.split("\t") for line in capsys.readouterr().out.splitlines()]
+    assert printed
+    for kind, role, sightings, observers, first, last in printed:
+        assert int(sightings) == full[(kind, role)][0] // 2
+        assert first >= "2025-04-18 12:30:00"
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import socket
+
+import i2p_stub_console
+from conftest import DATA_DIR
+from i2p_stub_console import Faults, recorded_ports, start_stub_consoles, stop_stub_consoles
+from i2p_swarm_poller import SwarmPoller, Target, make_targets
+
+
+def _free_ports(count):
+    """Start of `count` consecutive ports nothing listens on."""
+    while True:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            base = s.getsockname()[1]
+        if base + count > 65535:
+            continue
+        try:
+            for port in range(base, base + count):
+                with socket.socket() as s:
+                    s.bind(("127.0.0.1", port))
+            return base
+        except OSError:
+            continue
+
+
+def _poll(routers, faults=None, deadline=5, extra_targets=()):
+    async def run():
+        base = _free_ports(routers)
+        runners, ports = await start_stub_consoles(DATA_DIR, routers=routers, base_port=base, faults=faults)
+        try:
+            targets = make_targets("127.0.0.1", ports) + list(extra_targets)
+            async with SwarmPoller(targets, max_concurrency=4, deadline=deadline) as poller:
+                return await poller.poll_cycle(), poller.metrics
+        finally:
+            await stop_stub_consoles(runners)
+
+    return asyncio.run(run())
+
+
+def test_cycle_fetches_every_router_and_reports_failures():
+    recorded = recorded_ports(DATA_DIR)
+    dead = Target("dead", "http://127.0.0.1:%d" % _free_ports(1))
+    results, metrics = _poll(len(recorded) + 2, extra_targets=[dead])
+
+    assert len({r.timestamp for r in results}) == 1
+    assert [r.status for r in results] == ["ok"] * (len(recorded) + 2) + ["error"]
+    for i, result in enumerate(results[:-1]):
+        port = recorded[i % len(recorded)]
+        with open(os.path.join(DATA_DIR, "tunnels_data_%d.html" % port), encoding="utf-8") as f:
+            assert result.html == f.read()
+    assert results[-1].html is None and results[-1].error
+    assert metrics.total("i2p_errors_total", router="dead") == 1
+
+
+def test_failing_and_hanging_consoles_cost_only_their_deadline(monkeypatch):
+    monkeypatch.setattr(i2p_stub_console, "HANG_SECONDS", 2)
+    results, _ = _poll(2, faults=Faults(failure_rate=1.0))
+    assert [r.status for r in results] == ["error", "error"]
+    assert all("503" in r.error for r in results)
+
+    results, _ = _poll(2, faults=Faults(timeout_rate=1.0), deadline=0.5)
+    assert [r.status for r in results] == ["timeout", "timeout"]
+    assert all(r.elapsed < 1.5 for r in results)
@@ -0,0 +1,22 @@
+from i2p_targets import ComposeSource
+
+
+def test_compose_published_ports(tmp_path):
+    path = tmp_path / "docker-compose.yml"
+    path.write_text("""
+services:
+  i2p1:
+    ports: ["127.0.0.1:20001:7657", "7654:7654"]
+  i2p2:
+    ports: ["7657"]
+  i2p3:
+    ports: ["20003:7657/tcp", "20013:7657/udp"]
+  i2p4:
+    ports: ["20004:7657/udp"]
+  i2p5:
+    ports:
+      - {target: 7657, published: 20005}
+      - {target: 7657, published: 20015, protocol: udp}
+""", encoding="utf-8")
+    source = ComposeSource(str(path))
+    assert source.published_ports() == {"i2p1": [20001], "i2p2": [0], "i2p3": [20003], "i2p5": [20005]}
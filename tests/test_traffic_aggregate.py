@@ -0,0 +1,77 @@
+import csv
+import random
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import pytest
+
+from i2p_traffic_aggregate import COLUMNS, aggregate
+
+
+def _write_capture(path, rows=5000, raw=False, seed=5):
+    """Synthetic metadata CSV (header, 8 or 10 columns, some bad rows); returns the good rows."""
+    rng = random.Random(seed)
+    ips = [f"10.8.0.{i}" for i in range(1, 40)]
+    start = datetime(2025, 4, 17, 12).timestamp()
+    good = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        writer = csv.writer(f)
+        for i in range(rows):
+            if i % 500 == 499:
+                f.write("garbage line without the right fields\n")
+                continue
+            src, dst = rng.sample(ips, 2)
+            ts = datetime.fromtimestamp(start + i * 0.7).strftime("%Y-%m-%d %H:%M:%S")
+            proto, size = rng.choice(["TCP", "UDP", "TLSv1.3"]), rng.randrange(40, 1500)
+            if raw:
+                writer.writerow([ts, src, 1234, "", dst, 443, "", proto, 64, size])
+            else:
+                writer.writerow([ts, src, 1234, dst, 443, proto, 64, size])
+            good.append((ts, src, dst, proto, size))
+    return good
+
+
+def _brute(rows, bucket=60):
+    edges, timeline, protocols = defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0])
+    for ts, src, dst, proto, size in rows:
+        epoch = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").timestamp()
+        minute = datetime.fromtimestamp(epoch - epoch % bucket)
+        for table, key in ((edges, (src, dst)), (timeline, minute), (protocols, proto)):
+            table[key][0] += 1
+            table[key][1] += size
+    return edges, timeline, protocols
+
+
+def _table(frame, key_columns):
+    return {tuple(row[c] for c in key_columns) if len(key_columns) > 1 else row[key_columns[0]]:
+            [row["Packets"], row["Bytes"]] for _, row in frame.iterrows()}
+
+
+@pytest.mark.parametrize("raw", [False, True])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_totals_match_brute_force(tmp_path, raw, workers):
+    path = str(tmp_path / "traffic.csv")
+    rows = _write_capture(path, raw=raw)
+    result = aggregate(path, workers=workers, block_bytes=4096)
+    edges, timeline, protocols = _brute(rows)
+
+    assert result.rows - result.skipped == len(rows)
+    assert _table(result.edge_table(), ["Src IP", "Dst IP"]) == edges
+    assert _table(result.protocol_table(), ["Proto"]) == protocols
+    assert {t.to_pydatetime(): v for t, v in _table(result.timeline_table(), ["Time"]).items()} == timeline
+
+    sizes = sorted(size for *_, size in rows)
+    stats = result.size_stats()
+    assert stats["packets"] == len(rows) and stats["bytes"] == sum(sizes)
+    assert stats["median"] == sizes[(len(sizes) + 1) // 2 - 1] and stats["max"] == sizes[-1]
+    histogram = result.size_histogram()
+    assert histogram["Packets"].sum() == len(rows)
+    assert int(histogram.loc[histogram["Bin Start"] == 1024, "Packets"].iloc[0]) == \
+        sum(1024 <= s < 1280 for s in sizes)
+
+    sent = Counter()
+    for (src, _), (_, size) in edges.items():
+        sent[src] += size
+    top = result.top_talkers(5)
+    assert list(top["Bytes Sent"]) == sorted(sent.values(), reverse=True)[:5]
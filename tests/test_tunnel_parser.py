@@ -0,0 +1,50 @@
+import glob
+import os
+
+import pytest
+
+from conftest import DATA_DIR
+from i2p_tunnel_parser import FAST_PARSERS, as_legacy, legacy_oracles
+
+TUNNEL_PAGES = sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))
+PROFILE_PAGES = sorted(glob.glob(os.path.join(DATA_DIR, "high_capacity_routers_*.html")))
+CASES = [(path, section) for path in TUNNEL_PAGES
+         for section in ("client", "exploratory", "participating", "multi_peers")]
+CASES += [(path, "profiles") for path in PROFILE_PAGES]
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def oracles():
+    return legacy_oracles()
+
+
+@pytest.mark.parametrize("path,section", CASES, ids=lambda v: os.path.basename(v) if "/" in v else v)
+def test_fast_parser_matches_original_collectors(oracles, path, section):
+    html = _read(path)
+    assert as_legacy(section, FAST_PARSERS[section](html)) == oracles[section](html)
+
+
+def test_client_section_is_found_without_the_original_header_id():
+    for path in TUNNEL_PAGES:
+        html = _read(path)
+        assert 'id="UsNd"' not in html
+        assert FAST_PARSERS["client"](html)
+
+
+def test_local_hops_are_recorded(oracles):
+    local = 0
+    for path in TUNNEL_PAGES:
+        html = _read(path)
+        for section in ("client", "exploratory"):
+            records = FAST_PARSERS[section](html)
+            for record in records:
+                if record["Full ID"] == "Local":
+                    local += 1
+                    assert (record["Country"], record["IP Address"]) == ("Localhost", "127.0.0.1")
+            assert all(r["Full ID"] != "Local" for r in oracles[section](html))
+    assert local
@@ -0,0 +1,82 @@
+import asyncio
+import csv
+import glob
+import os
+
+import pytest
+
+from conftest import DATA_DIR
+from i2p_swarm_poller import PollResult, Target
+from i2p_tunnel_snapshot import (
+    ClientTunnelExtractor, ExploratoryTunnelExtractor, MultiTunnelPeerExtractor, ParticipatingTunnelExtractor,
+    SnapshotPipeline, extract_sections,
+)
+
+PAGES = sorted(glob.glob(os.path.join(DATA_DIR, "tunnels_data_*.html")))
+EXTRACTORS = [ClientTunnelExtractor(), ExploratoryTunnelExtractor(), ParticipatingTunnelExtractor(),
+              MultiTunnelPeerExtractor()]
+TIMESTAMP = "2025-04-18 12:00:00"
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class StubResolver:
+    def __init__(self):
+        self.calls = 0
+
+    async def resolve(self, target, node_ids):
+        self.calls += 1
+        return {node_id: "10.0.0.%d" % (len(node_id) % 250) for node_id in node_ids}
+
+
+@pytest.mark.parametrize("path", PAGES, ids=os.path.basename)
+def test_fast_parsers_match_the_dom_extractors(path):
+    html = _read(path)
+    assert extract_sections(html, EXTRACTORS) == extract_sections(html, EXTRACTORS, use_bs4=True)
+
+
+def test_one_parse_feeds_every_stream(tmp_path):
+    results = [PollResult(Target(os.path.basename(p)[len("tunnels_data_"):-len(".html")], ""), TIMESTAMP, "ok",
+                          _read(p), 0.0, None) for p in PAGES]
+    results.append(PollResult(Target("99999", ""), TIMESTAMP, "timeout", None, 10.0, "no response"))
+    resolver = StubResolver()
+    pipeline = SnapshotPipeline(None, output_dir=str(tmp_path), resolver=resolver, sink_options={"rotate": None})
+    asyncio.run(pipeline.process(results))
+    pipeline.close()
+
+    expected = {extractor.name: [] for extractor in pipeline.extractors}
+    for result in results[:-1]:
+        for name, records in extract_sections(result.html, pipeline.extractors).items():
+            expected[name].extend((result.target.name, record) for record in records)
+    for extractor in pipeline.extractors:
+        path = tmp_path / f"{extractor.name}_tunnels_snapshot.csv"
+        if not expected[extractor.name]:   # no recorded page has a multi-peer section
+            assert not path.exists()
+            continue
+        rows = _rows(path)
+        assert len(rows) == len(expected[extractor.name]), extractor.name
+        assert {row["Timestamp"] for row in rows} == {TIMESTAMP}
+        assert [row["Router"] for row in rows] == [router for router, _ in expected[extractor.name]]
+        for row in rows:
+            for id_col, ip_col in extractor.ip_columns.items():
+                if row[id_col] not in ("", "Local"):
+                    assert row[ip_col] == "10.0.0.%d" % (len(row[id_col]) % 250)
+    assert pipeline.metrics.total("i2p_errors_total") == 0
+
+
+def test_changes_only_writes_a_repeated_page_once(tmp_path):
+    html = _read(PAGES[0])
+    pipeline = SnapshotPipeline(None, output_dir=str(tmp_path), changes_only=True, sink_options={"rotate": None})
+    for timestamp in (TIMESTAMP, "2025-04-18 12:01:00"):
+        pipeline.apply([("32797", timestamp, extract_sections(html, pipeline.extractors))])
+    pipeline.close()
+    rows = _rows(tmp_path / "participating_tunnels_snapshot.csv")
+    assert rows and {row["Timestamp"] for row in rows} == {TIMESTAMP}
@@ -0,0 +1,45 @@
+import csv
+
+from i2p_tunnel_tracker import EVENT_HEADERS, TunnelTracker, read_events, rebuild_snapshot
+
+POLLS = ["2025-04-18 12:00:00", "2025-04-18 12:01:00", "2025-04-18 12:02:00"]
+
+
+def _tunnel(receive, usage):
+    return {"Receive on": receive, "Send on": str(int(receive) + 1), "From Full ID": "F" * 44,
+            "To Full ID": "T" * 44, "Expiration": "9 min", "Usage": usage, "Rate": "1 KBps", "Role": "Participant"}
+
+
+def _events(tracker, polls):
+    events = []
+    for timestamp, records in polls:
+        # as SnapshotPipeline.transform does, the records carry their poll's Timestamp
+        records = [dict(r, Timestamp=timestamp, Router="7657") for r in records]
+        events += tracker.update("7657", timestamp, records)
+    return events
+
+
+def test_expired_events_carry_the_time_of_the_poll_that_missed_the_tunnel():
+    events = _events(TunnelTracker(), [(POLLS[0], [_tunnel("1", "1 KB"), _tunnel("5", "2 KB")]),
+                                       (POLLS[1], [_tunnel("1", "3 KB"), _tunnel("5", "2 KB")]),
+                                       (POLLS[2], [_tunnel("5", "4 KB")])])
+    assert [(e["Timestamp"], e["Event"]) for e in events] == [
+        (POLLS[0], "created"), (POLLS[0], "created"), (POLLS[1], "usage"),
+        (POLLS[2], "usage"), (POLLS[2], "expired")]
+    assert [row["Receive on"] for row in rebuild_snapshot(events, POLLS[1])] == ["1", "5"]
+    assert [row["Usage"] for row in rebuild_snapshot(events, POLLS[1])] == ["3 KB", "2 KB"]
+    assert [row["Receive on"] for row in rebuild_snapshot(events, POLLS[2])] == ["5"]
+
+
+def test_rotated_event_files_are_read_in_time_order(tmp_path):
+    events = _events(TunnelTracker(), [(POLLS[0], [_tunnel("1", "1 KB")]), (POLLS[2], [])])
+    for i, event in enumerate(events):
+        # hourly rotation names, written in reverse so the file order is not the time order
+        with open(tmp_path / f"participating_events_20250418_1{2 - i}.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=EVENT_HEADERS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerow(event)
+    log = read_events([str(tmp_path)])
+    assert [e["Event"] for e in log] == ["created", "expired"]
+    assert read_events([str(tmp_path / "participating_events_*.csv")]) == log
+    assert rebuild_snapshot(log, POLLS[1])[0]["Receive on"] == "1"
@@ -0,0 +1,57 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from i2p_window_metrics import SelectionWindow, caps_flags, rolling_metrics
+
+
+def _brute(nodes, caps=None):
+    counts = sorted(Counter(nodes).values())
+    n, total = len(counts), sum(counts)
+    entropy = -sum(c / total * math.log2(c / total) for c in counts)
+    gini = 2 * sum(rank * c for rank, c in enumerate(counts, 1)) / (n * total) - (n + 1) / n
+    unique = set(nodes)
+    shares = {f"share_{cap}": sum(cap.lower() in (caps or {}).get(node, "").lower() for node in unique) / n
+              for cap in ("X", "f", "R")}
+    shares["share_XfR"] = sum(caps_flags((caps or {}).get(node)) == 7 for node in unique) / n
+    return dict(num_selections=total, unique_nodes=n, entropy=entropy, gini=gini, **shares)
+
+
+def _check(metrics, expected):
+    for key, value in expected.items():
+        assert metrics[key] == pytest.approx(value, abs=1e-9), key
+
+
+def test_incremental_metrics_match_brute_force():
+    rng = random.Random(7)
+    nodes = [f"node{i}" for i in range(40)]
+    caps = {node: rng.choice(["XfR", "PfR", "XR", "LU", "Of", ""]) for node in nodes}
+    window, members = SelectionWindow(caps), []
+    for step in range(3000):
+        # skewed selections so some counts pass the Fenwick tree's initial size
+        if members and (rng.random() < 0.45 or len(members) > 400):
+            window.remove(members.pop(rng.randrange(len(members))))
+        else:
+            node = nodes[min(int(rng.paretovariate(0.8)) - 1, len(nodes) - 1)]
+            window.add(node)
+            members.append(node)
+        if members and step % 50 == 0:
+            _check(window.metrics(), _brute(members, caps))
+    while members:
+        window.remove(members.pop())
+    assert window.metrics()["num_selections"] == 0 and window.rank_sum == 0
+
+
+def test_rolling_windows_match_brute_force():
+    rng = random.Random(3)
+    events, t = [], 0.0
+    for _ in range(2000):
+        t += rng.expovariate(1 / 20)
+        events.append((t, f"node{rng.randrange(30)}"))
+    rows = list(rolling_metrics(events, window=3600, step=900))
+    assert len(rows) > 30
+    for row in rows:
+        inside = [node for ts, node in events if row["window_start"] <= ts <= row["window_end"]]
+        _check(row, _brute(inside))